@@ -43,10 +43,18 @@ export function AgentSessionDetailPage() {
     setLoading(true)
     setError(null)
     try {
-      const res = await apiClient.get<TranscriptMessage[]>(
-        `/admin/agent-sessions/${sessionId}/messages`,
-      )
-      setMessages(res.data)
+      // The API returns one page at a time; follow X-Next-Cursor to the end
+      const all: TranscriptMessage[] = []
+      let cursor: string | undefined
+      do {
+        const res = await apiClient.get<TranscriptMessage[]>(
+          `/admin/agent-sessions/${sessionId}/messages`,
+          { params: { limit: 500, cursor } },
+        )
+        all.push(...res.data)
+        cursor = (res.headers['x-next-cursor'] as string | undefined) || undefined
+      } while (cursor)
+      setMessages(all)
     } catch {
       setError('Failed to load messages')
     } finally {
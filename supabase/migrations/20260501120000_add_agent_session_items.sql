@@ -0,0 +1,109 @@
+-- Append-only conversation item log for agent sessions.
+--
+-- Previously every turn read the whole `agent_sessions.items` jsonb array,
+-- appended in the API and wrote the array back: O(history) bytes each way,
+-- and concurrent writers (voice + chat on one session) lost updates.
+-- Items now live one-per-row with a per-session sequence number. Appends go
+-- through `append_agent_session_items`, which allocates sequence numbers under
+-- the session row lock so concurrent appends never collide.
+
+alter table "public"."agent_sessions"
+  add column "item_seq" bigint not null default 0;
+
+create table public.agent_session_items (
+  id          bigserial primary key,
+  session_id  text not null references public.agent_sessions(session_id) on delete cascade,
+  seq         bigint not null,
+  item        jsonb not null,
+  created_at  timestamp with time zone not null default now(),
+  constraint agent_session_items_session_seq_key unique (session_id, seq)
+);
+
+-- The unique (session_id, seq) index serves both the ordered full read and
+-- the `order by seq desc limit n` tail read.
+
+-- Backfill from the legacy jsonb array. The `items` column is left in place
+-- for rollback but is no longer written by the API.
+insert into public.agent_session_items (session_id, seq, item)
+select s.session_id, e.ordinality, e.value
+  from public.agent_sessions s
+  cross join lateral jsonb_array_elements(s.items) with ordinality as e(value, ordinality);
+
+update public.agent_sessions
+   set item_seq = jsonb_array_length(items)
+ where jsonb_array_length(items) > 0;
+
+-- Permissions
+grant all on public.agent_session_items to service_role;
+grant all on public.agent_session_items to authenticated;
+grant usage, select on sequence public.agent_session_items_id_seq to service_role, authenticated;
+
+alter table public.agent_session_items enable row level security;
+
+create policy "Users can manage items of their own agent sessions"
+  on public.agent_session_items
+  for all
+  to authenticated
+  using (
+    exists (
+      select 1 from public.agent_sessions s
+       where s.session_id = agent_session_items.session_id
+         and s.user_id = auth.uid()
+    )
+  )
+  with check (
+    exists (
+      select 1 from public.agent_sessions s
+       where s.session_id = agent_session_items.session_id
+         and s.user_id = auth.uid()
+    )
+  );
+
+-- Atomically append a jsonb array of items. Returns the last allocated seq.
+create or replace function public.append_agent_session_items(p_session_id text, p_items jsonb)
+returns bigint
+language plpgsql
+as $$
+declare
+  v_count integer := jsonb_array_length(p_items);
+  v_last  bigint;
+begin
+  if v_count = 0 then
+    select item_seq into v_last from public.agent_sessions where session_id = p_session_id;
+    return coalesce(v_last, 0);
+  end if;
+
+  update public.agent_sessions
+     set item_seq = item_seq + v_count
+   where session_id = p_session_id
+  returning item_seq into v_last;
+
+  if v_last is null then
+    raise exception 'agent session % not found', p_session_id;
+  end if;
+
+  insert into public.agent_session_items (session_id, seq, item)
+  select p_session_id, v_last - v_count + e.ordinality, e.value
+    from jsonb_array_elements(p_items) with ordinality as e(value, ordinality);
+
+  return v_last;
+end;
+$$;
+
+-- Delete and return the most recent item of a session (null when empty).
+create or replace function public.pop_agent_session_item(p_session_id text)
+returns jsonb
+language sql
+as $$
+  delete from public.agent_session_items
+   where id = (
+     select id from public.agent_session_items
+      where session_id = p_session_id
+      order by seq desc
+      limit 1
+   )
+  returning item;
+$$;
+
+grant execute on function public.append_agent_session_items(text, jsonb) to service_role, authenticated;
+grant execute on function public.pop_agent_session_item(text) to service_role, authenticated;
@@ -0,0 +1,10 @@
+-- Rolling summary of older conversation history.
+--
+-- Long sessions send only the most recent turns verbatim; everything before
+-- them is replaced by a summary the API regenerates incrementally.
+-- `history_summary_items` is how many leading items (by seq order) the
+-- summary covers, so the API knows which items still need folding in.
+
+alter table "public"."agent_sessions"
+  add column "history_summary" text,
+  add column "history_summary_items" bigint not null default 0;
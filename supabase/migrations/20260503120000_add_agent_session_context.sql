@@ -0,0 +1,30 @@
+-- Snapshot of the API's in-memory session context (AppContext).
+--
+-- Context (language, response mode, lesson, onboarding progress) used to
+-- live only in API memory and was silently reset to defaults after a restart
+-- or deploy. The API now writes a snapshot shortly after each change and
+-- restores it the first time a worker needs a session it does not hold.
+
+alter table "public"."agent_sessions"
+  add column "context" jsonb,
+  add column "context_updated_at" timestamp with time zone;
+
+-- Write many snapshots in one round trip: p_snapshots is a jsonb array of
+-- {"session_id": ..., "context": {...}}. Sessions that no longer exist are
+-- skipped. Returns the number of rows updated.
+create or replace function public.snapshot_agent_session_contexts(p_snapshots jsonb)
+returns integer
+language sql
+as $$
+  with updated as (
+    update public.agent_sessions s
+       set context = e.value -> 'context',
+           context_updated_at = now()
+      from jsonb_array_elements(p_snapshots) as e(value)
+     where s.session_id = e.value ->> 'session_id'
+    returning 1
+  )
+  select count(*)::integer from updated;
+$$;
+
+grant execute on function public.snapshot_agent_session_contexts(jsonb) to service_role;
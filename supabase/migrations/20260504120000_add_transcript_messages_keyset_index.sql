@@ -0,0 +1,12 @@
+-- Keyset pagination index for transcript reads.
+--
+-- Transcript pages are read with `session_id = ? and (created_at, message_id)
+-- > cursor order by created_at, message_id limit n`. This index serves that
+-- as a single range scan, so a page costs the same however long the session
+-- is. It also covers plain session_id lookups, which makes the old
+-- single-column index redundant.
+
+create index if not exists idx_transcript_messages_session_keyset
+  on public.transcript_messages using btree (session_id, created_at, message_id);
+
+drop index if exists public.idx_transcript_messages_session_id;
@@ -0,0 +1,19 @@
+-- Shared cache of scaffolded / transliterated display text.
+--
+-- Keyed by a hash of the normalized canonical Arabic, the prompt version,
+-- the learner's learned-words set and a coarse bucket of the user's message
+-- (see web-api/harness/display_cache.py). Entries never go stale — a prompt
+-- edit changes the key — so old rows can simply be pruned by age.
+
+create table if not exists public.display_text_cache (
+  cache_key   text primary key,
+  mode        text not null check (mode in ('scaffold', 'transliterate')),
+  result      jsonb not null,
+  created_at  timestamp with time zone not null default now()
+);
+
+create index if not exists idx_display_text_cache_created_at
+  on public.display_text_cache using btree (created_at);
+
+-- Written and read only by the API's service role
+alter table public.display_text_cache enable row level security;
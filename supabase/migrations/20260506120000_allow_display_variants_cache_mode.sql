@@ -0,0 +1,9 @@
+-- Allow combined scaffolding + transliteration results in display_text_cache
+-- (generate_display_variants in web-api/harness/scaffolding.py).
+
+alter table public.display_text_cache
+  drop constraint if exists display_text_cache_mode_check;
+
+alter table public.display_text_cache
+  add constraint display_text_cache_mode_check
+  check (mode in ('scaffold', 'transliterate', 'variants'));
@@ -0,0 +1,58 @@
+-- Per-user learned vocabulary, keyed by a light stem of the Arabic.
+--
+-- Built incrementally from the highlighted words of tutor transcript
+-- messages and from completed flashcard sets (see
+-- web-api/services/vocab_service.py). Scaffolding only pulls the few entries
+-- whose stems occur in the text being scaffolded, so prompts stay small
+-- however many words a learner knows.
+
+create table if not exists public.learned_vocabulary (
+  user_id       uuid not null references auth.users(id) on delete cascade,
+  stem          text not null,
+  canonical     text not null,
+  arabizi       text,
+  meaning       text,
+  seen_count    integer not null default 0,
+  flashcard     boolean not null default false,
+  first_seen_at timestamp with time zone not null default now(),
+  last_seen_at  timestamp with time zone not null default now(),
+  primary key (user_id, stem)
+);
+
+create index if not exists idx_learned_vocabulary_user_seen
+  on public.learned_vocabulary using btree (user_id, seen_count desc);
+
+alter table public.learned_vocabulary enable row level security;
+
+create policy "Users can view their own vocabulary"
+  on public.learned_vocabulary
+  for select
+  to authenticated
+  using (auth.uid() = user_id);
+
+-- Record many sightings in one round trip: p_words is a jsonb array of
+-- {"stem", "canonical", "arabizi", "meaning", "count", "flashcard"} with
+-- distinct stems. Counts add up; the latest Arabizi and meaning win.
+create or replace function public.record_learned_vocabulary(p_user_id uuid, p_words jsonb)
+returns void
+language sql
+as $$
+  insert into public.learned_vocabulary as v
+    (user_id, stem, canonical, arabizi, meaning, seen_count, flashcard)
+  select p_user_id,
+         e.value ->> 'stem',
+         e.value ->> 'canonical',
+         e.value ->> 'arabizi',
+         e.value ->> 'meaning',
+         coalesce((e.value ->> 'count')::integer, 1),
+         coalesce((e.value ->> 'flashcard')::boolean, false)
+    from jsonb_array_elements(p_words) as e(value)
+  on conflict (user_id, stem) do update
+     set seen_count   = v.seen_count + excluded.seen_count,
+         arabizi      = coalesce(excluded.arabizi, v.arabizi),
+         meaning      = coalesce(excluded.meaning, v.meaning),
+         flashcard    = v.flashcard or excluded.flashcard,
+         last_seen_at = now();
+$$;
+
+grant execute on function public.record_learned_vocabulary(uuid, jsonb) to service_role;
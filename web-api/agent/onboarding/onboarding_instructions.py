@@ -1,17 +1,16 @@
 """System instructions for the onboarding agent.
 
 The prompt body lives in `system.md` next to this file so it can be edited
-from the admin app without touching code.
+from the admin app without touching code; it's served from `harness.prompts`.
 """
 
-from pathlib import Path
-
 from agents import Agent, RunContextWrapper
 
+from harness import prompts
 from harness.context import AppContext
 
 
-SYSTEM_PROMPT_PATH = Path(__file__).parent / "system.md"
+SYSTEM_PROMPT = "onboarding/system.md"
 
 
 def get_instructions(
@@ -30,5 +29,4 @@ def get_instructions(
             "Onboarding is complete. Do not call any tools. "
             'Respond with exactly: {"messages": []}'
         )
-    template = SYSTEM_PROMPT_PATH.read_text(encoding="utf-8")
-    return template.replace("{collected}", str(collected or "{}"))
+    return prompts.get(SYSTEM_PROMPT).render(collected=str(collected or "{}"))
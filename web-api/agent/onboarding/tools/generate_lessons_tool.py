@@ -15,15 +15,15 @@ from pydantic import BaseModel
 
 from harness.context import AppContext
 from harness.session_manager import get_session
-from services.supabase_client import get_supabase_admin_client
+from services.supabase_client import get_supabase_async_admin_client
 
 
 def _log(msg: str) -> None:
     print(f"[generate_lessons] {msg}", flush=True, file=sys.stderr)
 
 
-def _write_profile(app_context: AppContext, props: dict) -> None:
-    session = get_session(app_context.session_id)
+async def _write_profile(app_context: AppContext, props: dict) -> None:
+    session = await get_session(app_context.session_id)
     user_id = getattr(getattr(session, "user", None), "id", None)
     if not user_id:
         _log(f"No user_id on session {app_context.session_id}; skipping profile write")
@@ -42,7 +42,7 @@ def _write_profile(app_context: AppContext, props: dict) -> None:
     }
 
     try:
-        get_supabase_admin_client().table("profiles").upsert(
+        await get_supabase_async_admin_client().table("profiles").upsert(
             row, on_conflict="id"
         ).execute()
         _log(f"Persisted profile for user {user_id}")
@@ -96,8 +96,9 @@ async def generate_lessons(
 
     app_context.onboarding.collected["suggestions"] = props
     app_context.onboarding.completed = True
+    app_context.mark_changed()
 
-    _write_profile(app_context, props)
+    await _write_profile(app_context, props)
 
     return json.dumps({
         "status": "ok",
@@ -14,7 +14,7 @@ from agents import RunContextWrapper, function_tool
 
 from harness.context import AppContext
 from harness.session_manager import get_session
-from services.supabase_client import get_supabase_admin_client
+from services.supabase_client import get_supabase_async_admin_client
 
 
 def _log(msg: str) -> None:
@@ -22,7 +22,7 @@ def _log(msg: str) -> None:
 
 
 @function_tool
-def record_profile(
+async def record_profile(
     context: RunContextWrapper[AppContext],
     name: Optional[str],
     motivation: Optional[str],
@@ -45,14 +45,15 @@ def record_profile(
 
     app_context.onboarding.collected["name"] = name
     app_context.onboarding.collected["motivation"] = motivation
+    app_context.mark_changed()
 
     # Early partial write so the name survives even if the session drops
     # before generate_lessons is called.
-    session = get_session(app_context.session_id)
+    session = await get_session(app_context.session_id)
     user_id = getattr(getattr(session, "user", None), "id", None)
     if user_id and name:
         try:
-            get_supabase_admin_client().table("profiles").upsert(
+            await get_supabase_async_admin_client().table("profiles").upsert(
                 {"id": user_id, "name": name, "motivation": motivation},
                 on_conflict="id",
             ).execute()
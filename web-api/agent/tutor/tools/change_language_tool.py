@@ -1,7 +1,7 @@
 """Tool for changing the tutoring language."""
 
-from pathlib import Path
 from agents import RunContextWrapper, function_tool
+from harness import prompts
 from harness.context import AppContext
 
 
@@ -46,10 +46,7 @@ def change_language(
         return f"Language code '{language_code}' is not available. Available languages: {available}"
 
     # Verify the language file exists
-    current_dir = Path(__file__).parent.parent
-    language_file = current_dir / "languages" / f"{language_code}.md"
-
-    if not language_file.exists():
+    if not prompts.exists(f"tutor/languages/{language_code}.md"):
         return f"Language file not found for '{language_code}'. Please contact support."
 
     # Update the language in context
@@ -12,7 +12,7 @@ from pydantic import BaseModel
 from agents import RunContextWrapper, function_tool
 from harness.context import AppContext
 from services.flashcard_service import create_flashcard_set
-from services.supabase_client import get_supabase_admin_client
+from services.session_owner_service import get_session_owner
 
 
 class FlashcardInput(BaseModel):
@@ -54,12 +54,7 @@ async def generate_flashcards(
     language = app_context.agent.language
     session_id = app_context.session_id
 
-    user_id = app_context.user.user_id
-    if not user_id:
-        supabase = get_supabase_admin_client()
-        session_response = supabase.table("agent_sessions").select("user_id").eq("session_id", session_id).execute()
-        if session_response.data:
-            user_id = session_response.data[0]["user_id"]
+    user_id = app_context.user.user_id or await get_session_owner(session_id)
     if not user_id:
         return "Sorry, I couldn't create flashcards — unable to identify the user."
 
@@ -19,7 +19,7 @@ from pydantic import BaseModel, Field
 
 from harness.context import AppContext
 from services.lesson_service import insert_lesson_proposals
-from services.supabase_client import get_supabase_admin_client
+from services.session_owner_service import get_session_owner
 
 
 class LessonProposal(BaseModel):
@@ -56,17 +56,7 @@ async def propose_lessons(
     if not (2 <= len(proposals) <= 4):
         return f"Expected 2-4 proposals; got {len(proposals)}."
 
-    user_id = app_context.user.user_id
-    if not user_id:
-        supabase = get_supabase_admin_client()
-        session_response = (
-            supabase.table("agent_sessions")
-            .select("user_id")
-            .eq("session_id", session_id)
-            .execute()
-        )
-        if session_response.data:
-            user_id = session_response.data[0]["user_id"]
+    user_id = app_context.user.user_id or await get_session_owner(session_id)
     if not user_id:
         return "Could not propose lessons — unable to identify the user."
 
@@ -76,7 +66,7 @@ async def propose_lessons(
     ]
 
     proposal_group_id = str(uuid.uuid4())
-    inserted = insert_lesson_proposals(
+    inserted = await insert_lesson_proposals(
         proposal_group_id=proposal_group_id,
         user_id=user_id,
         session_id=session_id,
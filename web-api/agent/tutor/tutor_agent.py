@@ -34,4 +34,5 @@ harness_options = HarnessOptions(
         "making the user feel comfortable by continuing the conversation"
     ),
     fire_opener=True,
+    history_token_budget=6000,
 )
@@ -1,6 +1,8 @@
-import os
-from pathlib import Path
+from functools import lru_cache
+from typing import Optional
+
 from agents import RunContextWrapper, Agent
+from harness import prompts
 from harness.context import AppContext
 
 
@@ -17,50 +19,73 @@ def _load_instructions(language: str) -> str:
     Raises:
         FileNotFoundError: If the language file doesn't exist
     """
-    current_dir = Path(__file__).parent
-    instructions_path = current_dir / "languages" / f"{language}.md"
-
-    if not instructions_path.exists():
-        raise FileNotFoundError(
-            f"Instructions file not found for language '{language}' at {instructions_path}"
-        )
+    return _language_prompt(language).text
 
-    return instructions_path.read_text(encoding="utf-8")
 
-
-def get_instructions(
-    context: RunContextWrapper[AppContext], agent: Agent[AppContext]
+def _language_prompt(language: str) -> prompts.Prompt:
+    try:
+        return prompts.get(f"tutor/languages/{language}.md")
+    except (FileNotFoundError, ValueError):
+        raise FileNotFoundError(
+            f"Instructions file not found for language '{language}'"
+        ) from None
+
+
+@lru_cache(maxsize=1024)
+def _assemble(
+    prompt: prompts.Prompt,
+    user_id: Optional[str],
+    user_name: Optional[str],
+    lesson_id: Optional[str],
+    lesson_title: Optional[str],
+    lesson_objective: Optional[str],
 ) -> str:
-    app_context = context.context
-
-    # Get language from agent state, defaulting to 'ar-AR'
-    language = app_context.agent.language if app_context and app_context.agent else "ar-AR"
-
-    # Load instructions for the specified language
-    instructions = _load_instructions(language)
-
-    # Generate user info bullet list dynamically based on AppContext fields
+    # Keyed on the prompt's version, so an edited prompt assembles afresh.
+    # The language prompt stays a byte-identical prefix for every learner so
+    # the provider can cache it; only this suffix is per user and lesson.
     user_info_lines = []
-    if app_context and app_context.user:
-        if app_context.user.user_id:
-            user_info_lines.append(f"- id: {app_context.user.user_id}")
-        if app_context.user.user_name:
-            user_info_lines.append(f"- name: {app_context.user.user_name}")
+    if user_id:
+        user_info_lines.append(f"- id: {user_id}")
+    if user_name:
+        user_info_lines.append(f"- name: {user_name}")
 
     user_context = "\n".join(user_info_lines) if user_info_lines else "- No user information available"
 
     lesson_section = ""
-    if app_context and app_context.lesson and app_context.lesson.lesson_id:
+    if lesson_id:
         lesson_section = f"""
 
 ## Current Lesson
-- title: {app_context.lesson.lesson_title}
-- objective: {app_context.lesson.lesson_objective}
+- title: {lesson_title}
+- objective: {lesson_objective}
 
 Open this session by introducing the lesson topic warmly and concisely, then start teaching immediately."""
 
-    return f"""{instructions}
+    return f"""{prompt.text}
 
 ## User Info
 {user_context}{lesson_section}
-"""
\ No newline at end of file
+"""
+
+
+def get_instructions(
+    context: RunContextWrapper[AppContext], agent: Agent[AppContext]
+) -> str:
+    app_context = context.context
+
+    # Get language from agent state, defaulting to 'ar-AR'
+    language = app_context.agent.language if app_context and app_context.agent else "ar-AR"
+
+    user = app_context.user if app_context else None
+    lesson = app_context.lesson if app_context else None
+
+    # Load instructions for the specified language, assembled once per
+    # (prompt version, user, lesson)
+    return _assemble(
+        _language_prompt(language),
+        user.user_id if user else None,
+        user.user_name if user else None,
+        lesson.lesson_id if lesson else None,
+        lesson.lesson_title if lesson else None,
+        lesson.lesson_objective if lesson else None,
+    )
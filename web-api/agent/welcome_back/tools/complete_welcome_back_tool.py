@@ -17,4 +17,5 @@ def complete_welcome_back(context: RunContextWrapper[AppContext]) -> str:
     app_context = context.context
     if app_context:
         app_context.welcome_back.completed = True
+        app_context.mark_changed()
     return "welcome-back complete"
@@ -1,11 +1,10 @@
-from pathlib import Path
-
 from agents import Agent, RunContextWrapper
 
+from harness import prompts
 from harness.context import AppContext
 
 
-SYSTEM_PROMPT_PATH = Path(__file__).parent / "system.md"
+SYSTEM_PROMPT = "welcome_back/system.md"
 
 
 def get_instructions(
@@ -18,5 +17,4 @@ def get_instructions(
     user_name = (app_context.user.user_name or "there") if app_context else "there"
     motivation = (app_context.user.user_motivation or "not specified") if app_context else "not specified"
 
-    template = SYSTEM_PROMPT_PATH.read_text(encoding="utf-8")
-    return template.replace("{user_name}", user_name).replace("{motivation}", motivation)
+    return prompts.get(SYSTEM_PROMPT).render(user_name=user_name, motivation=motivation)
@@ -1,9 +1,29 @@
-"""WebSocket connection manager — registry for active text-mode WebSocket connections."""
+"""WebSocket connection manager — registry for active text-mode WebSocket connections.
 
+Sockets live in the worker that accepted them. When the state store is shared
+(see services.state_store), each worker records which sockets it owns, and
+`send_message` for a socket held elsewhere is relayed to the owning worker
+over its `ws:<worker id>` channel.
+"""
+
+import json
+import sys
 from typing import Dict, Optional
 from fastapi import WebSocket
 from pydantic import BaseModel
 
+from services import state_store
+
+# Store key prefix recording the worker that holds a session's socket
+OWNER_KEY_PREFIX = "ws_owner:"
+# Ownership outlives any realistic connection; unregister deletes it
+OWNER_TTL_SECONDS = 24 * 60 * 60
+RELAY_CHANNEL = f"ws:{state_store.WORKER_ID}"
+
+
+def _log(msg: str) -> None:
+    print(f"[ConnectionManager] {msg}", flush=True, file=sys.stderr)
+
 
 class Message(BaseModel):
     """Message structure for WebSocket communication."""
@@ -23,6 +43,13 @@ def register_websocket(session_id: str, websocket: WebSocket) -> None:
         websocket: The WebSocket connection to register
     """
     _websockets[session_id] = websocket
+    if state_store.is_shared():
+        state_store.spawn(
+            state_store.get_state_store().set(
+                OWNER_KEY_PREFIX + session_id, state_store.WORKER_ID, ttl=OWNER_TTL_SECONDS
+            ),
+            f"Recording socket owner for {session_id}",
+        )
 
 
 def unregister_websocket(session_id: str) -> None:
@@ -34,6 +61,11 @@ def unregister_websocket(session_id: str) -> None:
     """
     if session_id in _websockets:
         del _websockets[session_id]
+        if state_store.is_shared():
+            state_store.spawn(
+                state_store.get_state_store().delete(OWNER_KEY_PREFIX + session_id),
+                f"Clearing socket owner for {session_id}",
+            )
 
 
 def get_websocket(session_id: str) -> Optional[WebSocket]:
@@ -51,7 +83,7 @@ def get_websocket(session_id: str) -> Optional[WebSocket]:
 
 async def send_message(session_id: str, message: Message) -> None:
     """
-    Send a message to a WebSocket connection.
+    Send a message to a WebSocket connection, on whichever worker holds it.
 
     Args:
         session_id: The session ID to send the message to
@@ -61,10 +93,32 @@ async def send_message(session_id: str, message: Message) -> None:
         ValueError: If no WebSocket connection exists for the session
     """
     websocket = get_websocket(session_id)
+    if websocket is not None:
+        await websocket.send_json(message.model_dump())
+        return
+
+    if state_store.is_shared():
+        store = state_store.get_state_store()
+        owner = await store.get(OWNER_KEY_PREFIX + session_id)
+        if owner and owner != state_store.WORKER_ID:
+            relayed = json.dumps({"session_id": session_id, "message": message.model_dump(mode="json")})
+            await store.publish(f"ws:{owner}", relayed)
+            return
+
+    raise ValueError(f"No WebSocket connection found for session: {session_id}")
+
+
+async def _deliver_relayed(raw: str) -> None:
+    """Send a message another worker relayed to a socket this worker holds."""
+    relayed = json.loads(raw)
+    websocket = get_websocket(relayed["session_id"])
     if websocket is None:
-        raise ValueError(f"No WebSocket connection found for session: {session_id}")
+        _log(f"Dropping relayed message: socket for {relayed['session_id']} is gone")
+        return
+    await websocket.send_json(relayed["message"])
+
 
-    await websocket.send_json(message.model_dump())
+state_store.subscribe(RELAY_CHANNEL, _deliver_relayed)
 
 
 async def send_audio_message(
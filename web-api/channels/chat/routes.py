@@ -2,7 +2,8 @@
 
 Both endpoints share the same accept/auth/register boilerplate. They differ
 only in which agent runs, its `harness_options`, and whether the channel
-should synthesize TTS audio (a delivery concern, declared per route).
+should synthesize TTS audio or stream bubbles as they are generated
+(delivery concerns, declared per route).
 """
 
 import sys
@@ -21,6 +22,7 @@ from channels.chat.session_loop import start_session_loop
 from channels.chat.turn_dispatcher import dispatch_turn
 from harness import session_manager as session_service
 from harness.options import HarnessOptions
+from harness.turn_scheduler import OPENER
 
 
 router = APIRouter(tags=["Session"])
@@ -33,6 +35,7 @@ async def _open_session(
     agent: Agent,
     options: HarnessOptions,
     synthesize_audio: bool = False,
+    stream: bool = False,
 ) -> None:
     """Shared boilerplate: accept WS, validate token, register, run loop."""
     await websocket.accept()
@@ -47,7 +50,7 @@ async def _open_session(
             await websocket.close(code=1008, reason="Missing authentication token")
             return
 
-        session = session_service.get_session(session_id, user_access_token=token)
+        session = await session_service.get_session(session_id, user_access_token=token)
         if not session:
             await websocket.send_json({
                 "kind": "error",
@@ -70,6 +73,8 @@ async def _open_session(
                         agent=agent,
                         config=options.turn_config(),
                         synthesize_audio=synthesize_audio,
+                        stream=stream,
+                        kind=OPENER,
                     )
                 except Exception as e:
                     print(f"[Routes] Opener failed: {e}", flush=True, file=sys.stderr)
@@ -88,9 +93,11 @@ async def _open_session(
                 agent=agent,
                 options=options,
                 synthesize_audio=synthesize_audio,
+                stream=stream,
             )
         finally:
             websocket_service.unregister_websocket(session_id)
+            await session_service.flush_session(session_id)
 
     except WebSocketDisconnect:
         pass
@@ -115,6 +122,7 @@ async def open_realtime_websocket(websocket: WebSocket, session_id: str):
         agent=tutor_module.agent,
         options=tutor_module.harness_options,
         synthesize_audio=True,
+        stream=True,
     )
 
 
@@ -4,26 +4,57 @@ Reads user messages off the WebSocket and dispatches each into the
 chat-channel `dispatch_turn`. Routes that need an opener turn (e.g.
 onboarding's greeting) call `dispatch_turn` themselves before invoking
 this loop.
+
+Receiving and turn execution run as separate tasks joined by a bounded
+inbox, so the socket keeps being read while the agent thinks:
+
+- Plain text frames are user messages. They go into the inbox and barge
+  in: the turn answering the previous message is cancelled, and messages
+  that pile up while a turn runs are answered together in one turn.
+- JSON frames with a control `kind` are handled on arrival, even mid-turn:
+  `{"kind": "typing"}` postpones idle followups,
+  `{"kind": "context", "data": {...}}` updates audio/language/response mode,
+  `{"kind": "ping"}` is answered with a `pong`.
 """
 
 import asyncio
+import json
 import sys
+import time
 import traceback
+from dataclasses import dataclass, field
+from typing import Optional
 
 from agents import Agent
 from fastapi import WebSocket
 from fastapi.websockets import WebSocketDisconnect
 
 from channels.chat.connection_manager import Message, send_message
-from channels.chat.turn_dispatcher import dispatch_turn
+from channels.chat.turn_dispatcher import broadcast_context, dispatch_turn
+from harness import context as context_service
+from harness import turn_scheduler
 from harness.options import HarnessOptions
+from harness.turn_scheduler import FOLLOWUP, USER
+from services import metrics_service
 from services.transcript_service import create_transcript_message
 
+# User messages waiting for a turn before new ones are turned away
+INBOX_SIZE = 8
+
+CONTROL_KINDS = {"typing", "context", "ping"}
+
 
 def _log(msg: str) -> None:
     print(f"[SessionLoop] {msg}", flush=True, file=sys.stderr)
 
 
+@dataclass
+class _LoopState:
+    inbox: asyncio.Queue = field(default_factory=lambda: asyncio.Queue(maxsize=INBOX_SIZE))
+    # Last time the client sent anything (message, typing, control)
+    last_activity: float = field(default_factory=time.monotonic)
+
+
 async def start_session_loop(
     websocket: WebSocket,
     session_id: str,
@@ -31,35 +62,121 @@ async def start_session_loop(
     agent: Agent,
     options: HarnessOptions,
     synthesize_audio: bool = False,
+    stream: bool = False,
 ) -> None:
     """Drive a session until the WebSocket closes."""
-    base_timeout = 5.0
-    max_followups = 3
-    followup_count = 0
-    current_timeout = base_timeout
-
+    state = _LoopState()
     turn_kwargs = dict(
         agent=agent,
         config=options.turn_config(),
         synthesize_audio=synthesize_audio,
+        stream=stream,
     )
 
+    receiver = asyncio.create_task(_receive(websocket, session_id, state))
+    worker = asyncio.create_task(_work(session_id, state, options, turn_kwargs))
+    try:
+        # The receiver ends when the socket closes; the worker only on error
+        await asyncio.wait([receiver, worker], return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Cancelling the worker also cancels its in-flight turn
+        for task in (receiver, worker):
+            task.cancel()
+        for task in (receiver, worker):
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            except Exception as e:
+                _log(f"Session loop task failed: {e}")
+                traceback.print_exc()
+
+
+async def _receive(websocket: WebSocket, session_id: str, state: _LoopState) -> None:
+    while True:
+        try:
+            raw = await websocket.receive_text()
+        except WebSocketDisconnect:
+            return
+        state.last_activity = time.monotonic()
+
+        control = _parse_control(raw)
+        if control is not None:
+            try:
+                await _handle_control(session_id, control)
+            except Exception as e:
+                _log(f"Control message {control.get('kind')} failed: {e}")
+            continue
+
+        try:
+            state.inbox.put_nowait(raw)
+        except asyncio.QueueFull:
+            metrics_service.incr("chat.inbox_rejected")
+            await _send_error(session_id, "Too many messages at once — please wait for a reply.")
+            continue
+        turn_scheduler.interrupt(session_id)
+
+
+def _parse_control(raw: str) -> Optional[dict]:
+    """Return the control message in `raw`, or None if it is user text."""
+    if not raw.startswith("{"):
+        return None
+    try:
+        message = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(message, dict) and message.get("kind") in CONTROL_KINDS:
+        return message
+    return None
+
+
+async def _handle_control(session_id: str, message: dict) -> None:
+    kind = message["kind"]
+    if kind == "ping":
+        await send_message(session_id, Message(kind="pong", data={}))
+    elif kind == "context":
+        data = message.get("data") or {}
+        context = await context_service.load_context(session_id)
+        if not context:
+            context = context_service.create_context(session_id=session_id)
+        if data.get("audio_enabled") is not None:
+            context.set_audio_enabled(bool(data["audio_enabled"]))
+        if data.get("language") is not None:
+            context.set_language(data["language"])
+        if data.get("response_mode") is not None:
+            context.set_response_mode(data["response_mode"])
+        await broadcast_context(session_id)
+    # "typing" only needs the activity timestamp the receiver already set
+
+
+async def _work(
+    session_id: str,
+    state: _LoopState,
+    options: HarnessOptions,
+    turn_kwargs: dict,
+) -> None:
+    base_timeout = 5.0
+    max_followups = 3
+    followup_count = 0
+    current_timeout = base_timeout
+
     while True:
         try:
             if options.idle_followups:
-                user_message = await asyncio.wait_for(
-                    websocket.receive_text(), timeout=current_timeout
-                )
+                first = await asyncio.wait_for(state.inbox.get(), timeout=current_timeout)
                 followup_count = 0
                 current_timeout = base_timeout
             else:
-                user_message = await websocket.receive_text()
-        except WebSocketDisconnect:
-            return
+                first = await state.inbox.get()
         except asyncio.TimeoutError:
+            if time.monotonic() - state.last_activity < current_timeout:
+                # The user is typing or adjusting settings — don't nudge yet
+                continue
             if followup_count < max_followups:
                 try:
-                    await dispatch_turn(session_id, user_message=None, **turn_kwargs)
+                    await dispatch_turn(
+                        session_id, user_message=None, kind=FOLLOWUP, **turn_kwargs
+                    )
                 except Exception as e:
                     _log(f"Followup turn failed: {e}")
                     traceback.print_exc()
@@ -69,31 +186,39 @@ async def start_session_loop(
                 current_timeout = base_timeout * (2**max_followups)
             continue
 
-        try:
-            await create_transcript_message(
-                session_id=session_id,
-                message_source="user",
-                message_kind=options.user_message_kind,
-                message_text=user_message,
-                flow=options.flow_tag,
-            )
-        except Exception as e:
-            _log(f"Failed to persist user message: {e}")
+        # Everything that arrived while the last turn ran is answered together
+        messages = [first]
+        while not state.inbox.empty():
+            messages.append(state.inbox.get_nowait())
+
+        for user_message in messages:
+            try:
+                await create_transcript_message(
+                    session_id=session_id,
+                    message_source="user",
+                    message_kind=options.user_message_kind,
+                    message_text=user_message,
+                    flow=options.flow_tag,
+                )
+            except Exception as e:
+                _log(f"Failed to persist user message: {e}")
 
         try:
             await dispatch_turn(
-                session_id, user_message=user_message, **turn_kwargs
+                session_id,
+                user_message="\n\n".join(messages),
+                kind=USER,
+                barge_in=True,
+                **turn_kwargs,
             )
         except Exception as e:
             _log(f"Agent turn failed: {e}")
             traceback.print_exc()
-            try:
-                await send_message(
-                    session_id,
-                    Message(
-                        kind="error",
-                        data={"message": f"Agent turn failed: {e}"},
-                    ),
-                )
-            except Exception:
-                pass
+            await _send_error(session_id, f"Agent turn failed: {e}")
+
+
+async def _send_error(session_id: str, message: str) -> None:
+    try:
+        await send_message(session_id, Message(kind="error", data={"message": message}))
+    except Exception:
+        pass
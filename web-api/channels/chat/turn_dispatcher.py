@@ -1,10 +1,23 @@
 """Run an agent turn and emit the result to the chat channel.
 
 `dispatch_turn` is the chat-channel-specific wrapper around
-`harness.turn.run_turn`. It pushes the persisted transcript to the
-client, optionally synthesizes TTS audio, and broadcasts the latest
-context. Other channels (voice, future HTTP/WhatsApp) wrap `run_turn`
+`harness.turn.run_turn`. It pushes each transcript row to the client as
+soon as the turn persists it, optionally synthesizes TTS audio, and
+broadcasts the latest context. Other channels (voice, future HTTP/WhatsApp) wrap `run_turn`
 their own way.
+
+With `stream=True` the turn runs on `harness.turn.run_turn_streamed`: each
+bubble goes out as a `transcript` message as soon as it is persisted, and
+text still being generated goes out as `transcript_delta` messages
+(`{"index": <bubble index>, "delta": <new text>}`) so clients can type it live.
+
+Display variants rendered later by `harness.variant_backfill` go out as
+`transcript_update` messages (`{"message_id": ..., <variant columns>}`).
+
+Every turn goes through the session's `harness.turn_scheduler` queue, so
+turns from the receive loop, the idle-followup timer and the Soniox webhook
+never run concurrently. `kind` and `barge_in` are passed straight through;
+a turn dropped or cancelled by a newer user message returns None.
 """
 
 import sys
@@ -18,8 +31,11 @@ from channels.chat.connection_manager import (
     send_audio_message,
     send_message,
 )
-from harness.context import get_context
-from harness.turn import TurnConfig, TurnResult, run_turn
+from harness import variant_backfill
+from harness.context import load_context
+from harness.turn import TurnConfig, TurnResult, run_turn, run_turn_streamed
+from harness.turn_scheduler import USER, schedule_turn
+from services.transcript_service import TranscriptMessage
 from services.tts_service import get_tts_service
 
 
@@ -34,13 +50,36 @@ async def dispatch_turn(
     agent: Agent,
     config: TurnConfig,
     synthesize_audio: bool = False,
-) -> TurnResult:
-    """Run a turn and emit it over the WebSocket."""
-    result = await run_turn(
-        session_id, user_message, agent=agent, config=config
+    stream: bool = False,
+    kind: str = USER,
+    barge_in: bool = False,
+) -> Optional[TurnResult]:
+    """Queue a turn on the session and emit it over the WebSocket."""
+    return await schedule_turn(
+        session_id,
+        lambda: _dispatch(session_id, user_message, agent, config, synthesize_audio, stream),
+        kind=kind,
+        barge_in=barge_in,
     )
 
-    await _send_transcript(session_id, result, config)
+
+async def _dispatch(
+    session_id: str,
+    user_message: Optional[str],
+    agent: Agent,
+    config: TurnConfig,
+    synthesize_audio: bool,
+    stream: bool,
+) -> TurnResult:
+    if stream:
+        result = await _run_streamed(session_id, user_message, agent, config)
+    else:
+        result = await run_turn(
+            session_id, user_message, agent=agent, config=config,
+            emit=lambda row: _send_row(session_id, row),
+        )
+        if not result.persisted_messages:
+            await _send_degraded_transcript(session_id, result)
 
     if synthesize_audio:
         await _maybe_synthesize_audio(session_id, result)
@@ -49,20 +88,56 @@ async def dispatch_turn(
     return result
 
 
-async def _send_transcript(
-    session_id: str, result: TurnResult, config: TurnConfig
-) -> None:
-    if result.persisted_messages:
-        for msg in result.persisted_messages:
-            await send_message(
-                session_id,
-                Message(
-                    kind="transcript",
-                    data=msg.model_dump(mode="json"),
-                ),
-            )
-        return
+async def _run_streamed(
+    session_id: str,
+    user_message: Optional[str],
+    agent: Agent,
+    config: TurnConfig,
+) -> TurnResult:
+    async def emit_text_delta(index: int, delta: str) -> None:
+        await send_message(
+            session_id,
+            Message(kind="transcript_delta", data={"index": index, "delta": delta}),
+        )
+
+    result = await run_turn_streamed(
+        session_id,
+        user_message,
+        agent=agent,
+        config=config,
+        emit=lambda row: _send_row(session_id, row),
+        emit_text_delta=emit_text_delta,
+    )
+    if not result.persisted_messages:
+        await _send_degraded_transcript(session_id, result)
+    return result
+
+
+async def _send_row(session_id: str, row: TranscriptMessage) -> None:
+    await send_message(
+        session_id,
+        Message(
+            kind="transcript",
+            data=row.model_dump(mode="json"),
+        ),
+    )
+
+
+async def _send_variants(session_id: str, message_id: str, columns: dict) -> None:
+    try:
+        await send_message(
+            session_id,
+            Message(kind="transcript_update", data={"message_id": message_id, **columns}),
+        )
+    except ValueError:
+        # Nobody connected; the row has the variant for the next load
+        pass
+
+
+variant_backfill.on_variant_ready(_send_variants)
+
 
+async def _send_degraded_transcript(session_id: str, result: TurnResult) -> None:
     # Persistence produced nothing but we still have visible text —
     # send a degraded payload so the user isn't stuck waiting.
     if result.display_text.strip():
@@ -78,7 +153,7 @@ async def _send_transcript(
 async def _maybe_synthesize_audio(
     session_id: str, result: TurnResult
 ) -> None:
-    context = get_context(session_id)
+    context = await load_context(session_id)
     if not (
         context
         and context.agent.audio_enabled
@@ -99,7 +174,7 @@ async def _maybe_synthesize_audio(
 
 
 async def broadcast_context(session_id: str) -> None:
-    context = get_context(session_id)
+    context = await load_context(session_id)
     if context:
         await send_message(
             session_id,
@@ -29,44 +29,16 @@ from pipecat.processors.frameworks.rtvi import (
     RTVIObserverParams,
 )
 
+from agent.tutor import tutor_agent as tutor_module
 from agent.tutor.tutor_instructions import _load_instructions
+from harness.history import WindowedSession, items_to_chat_messages
 from harness.session import AgentSession
-from harness.context import get_context
+from harness.context import load_context
 from services.transcript_service import create_transcript_message
 
 from .processors import DisplayTextGate, TTSTranscriptProcessor
 
 
-def _convert_session_items_to_messages(items: list[dict]) -> list[dict]:
-    """Convert OpenAI Agents SDK session items to simple chat messages.
-
-    Filters for message-type items and extracts role/content pairs suitable
-    for Pipecat's LLMContext.
-    """
-    messages = []
-    for item in items:
-        if item.get("type") != "message":
-            continue
-        role = item.get("role")
-        if role not in ("user", "assistant"):
-            continue
-        content = item.get("content", "")
-        # Content may be a list of content blocks (OpenAI format)
-        if isinstance(content, list):
-            text_parts = []
-            for block in content:
-                if isinstance(block, dict) and block.get("type") == "output_text":
-                    text_parts.append(block.get("text", ""))
-                elif isinstance(block, dict) and block.get("type") == "input_text":
-                    text_parts.append(block.get("text", ""))
-                elif isinstance(block, str):
-                    text_parts.append(block)
-            content = " ".join(text_parts)
-        if content:
-            messages.append({"role": role, "content": content})
-    return messages
-
-
 async def run_pipecat_agent(
     websocket: WebSocket,
     session_id: str,
@@ -83,7 +55,7 @@ async def run_pipecat_agent(
         user_access_token: Optional user access token for authentication
     """
     # Get context for language and settings
-    context = get_context(session_id)
+    context = await load_context(session_id)
     language = context.agent.language if context else "ar-AR"
 
     # Map language to voice and STT settings
@@ -135,10 +107,12 @@ async def run_pipecat_agent(
     system_prompt = _load_instructions(language)
     messages: list[dict] = [{"role": "system", "content": system_prompt}]
 
-    # Load prior conversation history from the session
-    session_items = await session.get_items()
+    # Load prior conversation history from the session, windowed like chat turns
+    budget = tutor_module.harness_options.history_token_budget
+    history_source = WindowedSession(session, budget) if budget else session
+    session_items = await history_source.get_items()
     if session_items:
-        history = _convert_session_items_to_messages(session_items)
+        history = items_to_chat_messages(session_items)
         messages.extend(history)
         logger.info(f"Loaded {len(history)} messages from session history for {session_id}")
 
@@ -213,9 +187,10 @@ async def run_pipecat_agent(
     async def on_user_turn_stopped(aggregator, strategy, message):
         logger.info(f"User turn stopped: {message.content}")
         # Store last user message on context for scaffolding context-awareness
-        ctx = get_context(session_id)
+        ctx = await load_context(session_id)
         if ctx:
             ctx.agent.last_user_message = message.content
+            ctx.mark_changed()
         try:
             await create_transcript_message(
                 session_id=session_id,
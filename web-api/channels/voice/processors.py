@@ -14,7 +14,7 @@ from pipecat.frames.frames import (
 )
 from pipecat.processors.frame_processor import FrameProcessor, FrameDirection
 
-from harness.context import get_context
+from harness.context import load_context
 from harness.scaffolding import generate_scaffolded_text, generate_transliterated_text
 from harness.session_manager import get_session
 from services import posthog_service
@@ -38,8 +38,8 @@ class DisplayTextGate(FrameProcessor):
         self._session_id = session_id
         self._llm_start_time: float | None = None
 
-    def _get_response_mode(self) -> str:
-        context = get_context(self._session_id)
+    async def _get_response_mode(self) -> str:
+        context = await load_context(self._session_id)
         return context.agent.response_mode if context else "scaffolded"
 
     async def process_frame(self, frame, direction: FrameDirection):
@@ -61,7 +61,7 @@ class DisplayTextGate(FrameProcessor):
             canonical_text = "".join(f.text for f in self._buffered_frames)
             logger.info(f"DisplayTextGate: canonical='{canonical_text}'")
 
-            response_mode = self._get_response_mode()
+            response_mode = await self._get_response_mode()
 
             if response_mode == "canonical":
                 # Canonical: pass through raw Arabic text with no transformation
@@ -70,7 +70,9 @@ class DisplayTextGate(FrameProcessor):
                     await self.push_frame(buffered_frame, direction)
             elif response_mode == "transliterated":
                 # Transliteration: word count matches canonical, enable word-by-word sync
-                display_text = await generate_transliterated_text(canonical_text)
+                context = await load_context(self._session_id)
+                dialect = context.agent.language if context else None
+                display_text = await generate_transliterated_text(canonical_text, dialect=dialect)
                 logger.info(f"DisplayTextGate: transliterated='{display_text}'")
                 transliterated_words = display_text.split()
                 self._tts_transcript.set_transliteration_queue(transliterated_words)
@@ -78,7 +80,7 @@ class DisplayTextGate(FrameProcessor):
                     await self.push_frame(buffered_frame, direction)
             else:
                 # Scaffolding: build TTS text (Arabic script) and display text (Arabizi)
-                context = get_context(self._session_id)
+                context = await load_context(self._session_id)
                 last_user_message = context.agent.last_user_message if context else None
                 scaffolded = await generate_scaffolded_text(canonical_text, user_message=last_user_message)
                 display_text = scaffolded.text
@@ -238,8 +240,8 @@ class TTSTranscriptProcessor(FrameProcessor):
                 # Track response time analytics (fires once per agent turn)
                 if self._llm_start_time is not None:
                     tts_end = time.monotonic()
-                    context = get_context(self._session_id)
-                    session = get_session(self._session_id)
+                    context = await load_context(self._session_id)
+                    session = await get_session(self._session_id)
                     user = getattr(session, "user", None) if session else None
                     posthog_service.capture(
                         distinct_id=user.id if user else self._session_id,
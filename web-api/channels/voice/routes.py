@@ -47,7 +47,7 @@ async def pipecat_session_websocket(websocket: WebSocket, session_id: str):
             return
 
         # Retrieve the session
-        session = session_service.get_session(session_id, user_access_token=token)
+        session = await session_service.get_session(session_id, user_access_token=token)
         if not session:
             await websocket.send_json({
                 "kind": "error",
@@ -57,14 +57,14 @@ async def pipecat_session_websocket(websocket: WebSocket, session_id: str):
             return
 
         # Resolve user and enforce voice quota before starting the pipeline.
-        user = resolve_user_from_token(token)
+        user = await resolve_user_from_token(token)
         if not user:
             await websocket.send_json({"kind": "error", "data": {"message": "Invalid token"}})
             await websocket.close(code=1008, reason="Invalid token")
             return
 
         try:
-            plan_service.check_voice_quota(user.id)
+            await plan_service.check_voice_quota(user.id)
         except plan_service.QuotaExceeded as exc:
             await websocket.send_json({
                 "kind": "quota_exceeded",
@@ -79,10 +79,11 @@ async def pipecat_session_websocket(websocket: WebSocket, session_id: str):
         try:
             await run_pipecat_agent(websocket, session_id, session, token)
         finally:
+            await session_service.flush_session(session_id)
             elapsed = int(time.monotonic() - started_at)
             if elapsed > 0:
                 try:
-                    plan_service.record_usage(user.id, "voice_seconds", elapsed)
+                    await plan_service.record_usage(user.id, "voice_seconds", elapsed)
                 except Exception as e:
                     logger.error(f"Failed to record voice usage for {user.id}: {e}")
 
@@ -3,12 +3,13 @@
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from services.supabase_client import get_supabase_admin_client
+from services.supabase_client import get_supabase_async_admin_client
+from services.token_service import InvalidTokenError, verify_token
 
 security = HTTPBearer()
 
 
-def get_admin_user(
+async def get_admin_user(
     credentials: HTTPAuthorizationCredentials = Security(security)
 ) -> str:
     """
@@ -23,22 +24,24 @@ def get_admin_user(
         raise HTTPException(status_code=401, detail="Missing authentication credentials")
 
     token = credentials.credentials
-    admin_client = get_supabase_admin_client()
 
-    # Verify the JWT and get the user
+    # Admin access is revocation-sensitive: confirm with Supabase Auth rather
+    # than trusting a locally verified (possibly signed-out) token.
     try:
-        user_response = admin_client.auth.get_user(token)
-    except Exception:
-        raise HTTPException(status_code=401, detail="Invalid authentication token")
-
-    if not user_response or not user_response.user:
+        user_id = (await verify_token(token, check_revocation=True)).id
+    except InvalidTokenError:
         raise HTTPException(status_code=401, detail="Invalid authentication token")
 
-    user_id = user_response.user.id
-
     # Check admin flag in profiles table
     try:
-        result = admin_client.table("profiles").select("is_admin").eq("id", user_id).single().execute()
+        result = await (
+            get_supabase_async_admin_client()
+            .table("profiles")
+            .select("is_admin")
+            .eq("id", user_id)
+            .single()
+            .execute()
+        )
     except Exception:
         raise HTTPException(status_code=403, detail="Access denied — not an admin")
 
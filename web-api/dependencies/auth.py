@@ -4,7 +4,7 @@ from typing import Optional
 from fastapi import Depends, HTTPException, Security, Query
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 
-from services.supabase_client import get_supabase_user_client
+from services.token_service import InvalidTokenError, verify_token
 
 security = HTTPBearer()
 
@@ -16,7 +16,7 @@ def get_current_user_token(
     Extract and return the JWT access token from the Authorization header.
 
     This dependency validates that a Bearer token is present and returns it.
-    The actual JWT validation is handled by Supabase when the token is used.
+    Use `get_current_user` when the token itself must be verified.
 
     Args:
         credentials: HTTP Bearer credentials from the Authorization header
@@ -63,28 +63,23 @@ def get_websocket_token(
     return token
 
 
-def get_current_user(access_token: str = Depends(get_current_user_token)):
+async def get_current_user(access_token: str = Depends(get_current_user_token)):
     """Resolve the authenticated Supabase user from the Bearer token.
 
-    Returns the Supabase `User` object (with `.id`, `.email`, `.is_anonymous`).
+    The token is verified locally (signature + expiry), see `token_service`.
+    Returns a `TokenUser` (with `.id`, `.email`, `.is_anonymous`).
     Raises 401 if the token is invalid.
     """
     try:
-        client = get_supabase_user_client(access_token)
-        resp = client.auth.get_user(access_token)
-    except Exception as e:
-        raise HTTPException(status_code=401, detail=f"Invalid or expired token: {e}")
-    if not resp or not resp.user:
-        raise HTTPException(status_code=401, detail="Invalid or expired token")
-    return resp.user
+        return await verify_token(access_token)
+    except InvalidTokenError as e:
+        raise HTTPException(status_code=401, detail=str(e))
 
 
-def resolve_user_from_token(access_token: str):
+async def resolve_user_from_token(access_token: str):
     """Same resolution logic as `get_current_user`, but usable outside FastAPI
     dependency injection (e.g. in WebSocket handlers)."""
     try:
-        client = get_supabase_user_client(access_token)
-        resp = client.auth.get_user(access_token)
-    except Exception:
+        return await verify_token(access_token)
+    except InvalidTokenError:
         return None
-    return resp.user if resp else None
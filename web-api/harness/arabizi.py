@@ -0,0 +1,386 @@
+"""Rule-based Arabic → Arabizi transliteration.
+
+Follows the same convention as the transliteration prompt (3 for ع, 7 for ح,
+2 for ء/ق, 5 for خ, 8 for غ, 6 for ط, 9 for ص), with the harakaat deciding the
+vowels:
+
+- fatha/damma/kasra → a/u/i; a long vowel letter after its matching haraka
+  → aa/oo/ee; fatha + و/ي with sukun → aw/ay (diphthongs);
+- shadda doubles the consonant; tanween → an/un/in (the seat alif is silent);
+- the article ال → "al-", assimilated before sun letters ("ash-shams"),
+  including after و/ف/ب/ك/ل prefixes ("wal-", "bil-", "lil-");
+- taa marbuta → "a", or "at" when it carries a vowel and another word
+  follows (construct state);
+- final -u/-i and -un/-in case endings are dropped (pausal form), final
+  -an is kept ("shukran"); a word-initial hamza is written as its vowel only
+  ("ana", "ahlan"); hamzat al-wasl after a vowel in the same word is silent
+  ("بِاسْمِ" → "bism").
+
+Words without enough harakaat to know their vowels are reported as
+low-confidence (see `Transliteration.low_confidence`) so the caller can send
+just those words to the model: any consonant other than the last without a
+haraka, or a word with no harakaat at all that the lexicon doesn't know. Whitespace-separated words map one to one
+between input and output. A small lexicon covers common
+undiacritized words.
+"""
+
+import re
+import unicodedata
+from dataclasses import dataclass, field
+from typing import Optional
+
+FATHA, DAMMA, KASRA = "َ", "ُ", "ِ"
+FATHATAN, DAMMATAN, KASRATAN = "ً", "ٌ", "ٍ"
+SUKUN, SHADDA = "ْ", "ّ"
+DAGGER_ALIF = "ٰ"
+MADDAH, HAMZA_ABOVE, HAMZA_BELOW = "ٓ", "ٔ", "ٕ"
+TATWEEL = "ـ"
+
+SHORT_VOWELS = {FATHA: "a", DAMMA: "u", KASRA: "i"}
+# `prev_vowel` after a long vowel or diphthong
+LONG = "long"
+TANWEEN = {FATHATAN: "an", DAMMATAN: "un", KASRATAN: "in"}
+HARAKAAT = set(SHORT_VOWELS) | set(TANWEEN) | {SUKUN, SHADDA, DAGGER_ALIF}
+MARKS = set(SHORT_VOWELS) | set(TANWEEN) | {SUKUN, SHADDA, DAGGER_ALIF, MADDAH, HAMZA_ABOVE, HAMZA_BELOW}
+
+CONSONANTS = {
+    "ب": "b", "ت": "t", "ث": "th", "ج": "j", "ح": "7", "خ": "5", "د": "d",
+    "ذ": "th", "ر": "r", "ز": "z", "س": "s", "ش": "sh", "ص": "9", "ض": "d",
+    "ط": "6", "ظ": "z", "ع": "3", "غ": "8", "ف": "f", "ق": "2", "ك": "k",
+    "ل": "l", "م": "m", "ن": "n", "ه": "h", "و": "w", "ي": "y",
+    "ء": "2", "ؤ": "2", "ئ": "2", "أ": "2", "إ": "2", "آ": "2", "ة": "t",
+    "گ": "g", "چ": "ch", "پ": "p", "ڤ": "v",
+}
+ALIFS = {"ا", "ٱ"}
+SUN_LETTERS = set("تثدذرزسشصضطظلن")
+ARTICLE_PREFIXES = {"و": "a", "ف": "a", "ب": "i", "ك": "a"}
+# Arabic punctuation and digits → ASCII
+_ASCII = str.maketrans(
+    {"،": ",", "؛": ";", "؟": "?", "٪": "%"}
+    | {chr(0x0660 + i): str(i) for i in range(10)}
+    | {chr(0x06F0 + i): str(i) for i in range(10)}
+)
+
+# Dialect-specific letter values (BCP-47 language tag → overrides)
+DIALECT_CONSONANTS = {
+    "ar-EG": {"ج": "g"},
+    "ar-IQ": {"ق": "g"},
+}
+
+# Common words as they are usually written without harakaat
+LEXICON = {
+    "مرحبا": "mar7aba", "اهلا": "ahlan", "أهلا": "ahlan", "شكرا": "shukran",
+    "انا": "ana", "أنا": "ana", "انت": "enta", "أنت": "enta", "انتي": "enti",
+    "هو": "huwa", "هي": "hiya", "نحن": "na7nu", "نعم": "na3am", "لا": "la",
+    "في": "fi", "من": "min", "على": "3ala", "الى": "ila", "إلى": "ila",
+    "مع": "ma3", "كيف": "keef", "شو": "shu", "ماذا": "matha", "وين": "ween",
+    "يلا": "yalla", "حبيبي": "7abibi", "حبيبتي": "7abibti", "صباح": "9aba7",
+    "مساء": "masa2", "الخير": "al-5eer", "السلام": "as-salaam", "عليكم": "3alaykum",
+    "جدا": "jiddan", "كتير": "kteer", "كثير": "katheer", "ممتاز": "mumtaaz",
+    "أحسنت": "a7santa", "احسنت": "a7santa", "الحمد": "al-7amd",
+    "ان": "in", "إن": "in", "شاء": "sha2", "بس": "bas",
+    "هذا": "haatha", "هذه": "haathihi", "كمان": "kamaan", "طيب": "6ayyib",
+    "يا": "ya",
+}
+
+# Words whose spelling never shows their pronunciation, however diacritized
+FIXED_WORDS = {"الله": "allah", "لله": "lillah", "بالله": "billah", "والله": "wallah"}
+
+# Arabic letters, harakaat and tatweel (punctuation and digits excluded)
+_ARABIC_RUN = re.compile(r"[\u0621-\u0655\u0670-\u06D3]+")
+
+
+@dataclass
+class Transliteration:
+    """Transliterated text plus the words the rules were unsure of."""
+
+    # Words and the whitespace between them, alternating (as `re.split` returns)
+    tokens: list[str]
+    # Indexes (among whitespace-separated words) of low-confidence words
+    low_confidence: list[int] = field(default_factory=list)
+
+    @property
+    def text(self) -> str:
+        return "".join(self.tokens)
+
+    @property
+    def confident(self) -> bool:
+        return not self.low_confidence
+
+    def with_words(self, replacements: dict[int, str]) -> str:
+        """The text with the words at the given indexes replaced."""
+        tokens = list(self.tokens)
+        index = -1
+        for t, token in enumerate(tokens):
+            if token and not token.isspace():
+                index += 1
+                if index in replacements:
+                    tokens[t] = replacements[index]
+        return "".join(tokens)
+
+
+@dataclass
+class _Unit:
+    letter: str
+    marks: str = ""
+
+    @property
+    def vowel(self) -> Optional[str]:
+        for mark in self.marks:
+            if mark in SHORT_VOWELS:
+                return SHORT_VOWELS[mark]
+        return None
+
+    @property
+    def tanween(self) -> Optional[str]:
+        for mark in self.marks:
+            if mark in TANWEEN:
+                return TANWEEN[mark]
+        return None
+
+    @property
+    def bare(self) -> bool:
+        return not any(m in self.marks for m in (*SHORT_VOWELS, *TANWEEN, SUKUN, DAGGER_ALIF))
+
+
+def _units(word: str) -> list[_Unit]:
+    units: list[_Unit] = []
+    for char in word:
+        if char == TATWEEL:
+            continue
+        if char in MARKS:
+            if units:
+                units[-1].marks += char
+            continue
+        units.append(_Unit(char))
+    return units
+
+
+def _strip_marks(word: str) -> str:
+    return "".join(c for c in word if c not in MARKS and c != TATWEEL)
+
+
+class _WordWriter:
+    """Transliterates one run of Arabic letters."""
+
+    def __init__(self, units: list[_Unit], consonants: dict[str, str], followed: bool):
+        self.units = units
+        self.consonants = consonants
+        # Another Arabic word follows (for taa marbuta in construct state)
+        self.followed = followed
+        self.out: list[str] = []
+        # Vowel written for the previous letter, if any
+        self.prev_vowel: Optional[str] = None
+        self.uncertain = 0
+        # The word carries the article (so it can't be the first term of a construct)
+        self.definite = False
+
+    def write(self) -> str:
+        start = self._article()
+        self.definite = start > 0
+        for i in range(start, len(self.units)):
+            self._unit(i)
+        return "".join(self.out)
+
+    def _article(self) -> int:
+        """Write a leading (prefix +) article; return the first unit after it."""
+        units = self.units
+        # Index of the article's lam, and what is written before it
+        if len(units) > 3 and units[0].letter == "ل" and units[1].letter == "ل":
+            # li + al- (the alif is dropped in writing)
+            lam_index, prefix = 1, "li"
+        elif len(units) > 4 and units[0].letter in ARTICLE_PREFIXES and units[1].letter in ALIFS \
+                and units[2].letter == "ل":
+            first = units[0]
+            lam_index = 2
+            prefix = self.consonants[first.letter] + (first.vowel or ARTICLE_PREFIXES[first.letter])
+        elif len(units) > 2 and units[0].letter in ALIFS and units[1].letter == "ل":
+            lam_index, prefix = 1, "a"
+        else:
+            return 0
+        i = lam_index
+
+        lam = units[i]
+        if lam.vowel:
+            # لَ / لِ with a vowel is not the article
+            return 0
+        after = units[i + 1]
+        if after.letter in SUN_LETTERS:
+            sun = self.consonants[after.letter]
+            article = f"{sun}-"
+            # The shadda of the assimilated letter is the article itself
+            after.marks = after.marks.replace(SHADDA, "")
+        else:
+            article = "l-"
+        self.out.append(prefix + article)
+        return i + 1
+
+    def _unit(self, i: int) -> None:
+        unit = self.units[i]
+        letter = unit.letter
+        first = i == 0
+        last = i == len(self.units) - 1
+
+        if letter in ALIFS:
+            self._alif(unit, first, last)
+            return
+        if letter == "ى":
+            self._emit_vowel("" if self.prev_vowel == "a" else "a", "a")
+            return
+        if letter == "آ":
+            self.out.append("aa" if first else "2aa")
+            self.prev_vowel = "a"
+            return
+        if letter in ("أ", "إ") and first:
+            vowel = unit.vowel or ("i" if letter == "إ" or HAMZA_BELOW in unit.marks else "a")
+            self._emit_vowel(vowel, vowel)
+            self._tanween_or_vowel(unit, last, skip_vowel=True)
+            return
+        if letter in ("و", "ي") and not first and self._long_vowel(unit, letter, last):
+            return
+        if letter == "ة":
+            construct = bool(unit.vowel) and self.followed and not self.definite
+            vowel = "" if self.prev_vowel == "a" else "a"
+            self.out.append(vowel + ("t" if construct else ""))
+            self.prev_vowel = "a"
+            return
+        if letter not in self.consonants:
+            self.uncertain += 1
+            return
+
+        consonant = self.consonants[letter]
+        self.out.append(consonant * 2 if SHADDA in unit.marks else consonant)
+        self.prev_vowel = None
+
+        if DAGGER_ALIF in unit.marks:
+            self._emit_vowel("aa", "a")
+            return
+        if unit.bare and not last:
+            # Its vowel (or lack of one) is a guess: حالك is 7aalak, not 7aalk
+            self.uncertain += 1
+        self._tanween_or_vowel(unit, last)
+
+    def _tanween_or_vowel(self, unit: _Unit, last: bool, skip_vowel: bool = False) -> None:
+        tanween = unit.tanween
+        if tanween:
+            # Pausal form keeps only -an
+            if last and tanween != "an":
+                return
+            self._emit_vowel(tanween, tanween[0])
+            return
+        vowel = unit.vowel
+        if vowel and not skip_vowel:
+            # Pausal form: drop a final -u / -i case ending, and any final
+            # short vowel at the end of a sentence
+            if last and (vowel in ("u", "i") or not self.followed):
+                return
+            self._emit_vowel(vowel, vowel)
+
+    def _emit_vowel(self, text: str, vowel: str) -> None:
+        if text:
+            self.out.append(text)
+        self.prev_vowel = vowel
+
+    def _alif(self, unit: _Unit, first: bool, last: bool) -> None:
+        if first:
+            vowel = unit.vowel or ("i" if HAMZA_BELOW in unit.marks else "a")
+            self._emit_vowel(vowel, vowel)
+            return
+        if FATHATAN in unit.marks:
+            # Fathatan written on its alif seat
+            self._emit_vowel("an", "a")
+        elif self.out and self.out[-1] == "an":
+            # Seat of fathatan written on the previous letter: silent
+            return
+        elif self.prev_vowel in ("i", "u", LONG):
+            # Hamzat al-wasl after a vowel, or the alif after plural -oo: silent
+            return
+        elif last:
+            # Final long a is written short ("ana", "haatha")
+            self._emit_vowel("" if self.prev_vowel == "a" else "a", "a")
+        elif self.prev_vowel == "a":
+            self._emit_vowel("a", "a")
+        else:
+            self._emit_vowel("aa", "a")
+
+    def _long_vowel(self, unit: _Unit, letter: str, last: bool) -> bool:
+        """Write و/ي as a long vowel or diphthong; False if it is a consonant."""
+        if unit.vowel or unit.tanween or SHADDA in unit.marks:
+            return False
+        matching = "u" if letter == "و" else "i"
+        # Final long vowels are written short ("7abibi", "ismi")
+        long_vowel = matching if last else ("oo" if letter == "و" else "ee")
+        diphthong = "aw" if letter == "و" else "ay"
+        if self.prev_vowel == matching:
+            self.out[-1] = self.out[-1][:-1] + long_vowel
+        elif self.prev_vowel == "a" and SUKUN in unit.marks:
+            self.out[-1] = self.out[-1][:-1] + diphthong
+        elif self.prev_vowel is None and unit.bare:
+            # Undiacritized: most often a long vowel
+            self.out.append(long_vowel)
+        else:
+            return False
+        self.prev_vowel = LONG
+        return True
+
+
+def transliterate_word(word: str, dialect: Optional[str] = None, followed: bool = False) -> tuple[str, bool]:
+    """
+    Transliterate one run of Arabic letters.
+
+    Returns:
+        (arabizi, confident)
+    """
+    word = unicodedata.normalize("NFC", word)
+    bare = _strip_marks(word)
+    if bare in FIXED_WORDS:
+        return FIXED_WORDS[bare], True
+    if bare == word and bare in LEXICON:
+        return LEXICON[bare], True
+
+    consonants = CONSONANTS | DIALECT_CONSONANTS.get(dialect or "", {})
+    units = _units(word)
+    if not units:
+        return "", True
+    writer = _WordWriter(units, consonants, followed)
+    text = writer.write()
+    unvowelled = not any(c in HARAKAAT for c in word)
+    return text, writer.uncertain == 0 and not unvowelled
+
+
+def transliterate(text: str, dialect: Optional[str] = None) -> Transliteration:
+    """
+    Transliterate every Arabic word in `text`, keeping everything else as is.
+
+    Args:
+        text: Text that may contain Arabic script
+        dialect: Language tag (e.g. "ar-EG") for dialect-specific letters
+
+    Returns:
+        Transliteration with the text and its low-confidence words
+    """
+    out: list[str] = []
+    low_confidence: list[int] = []
+    index = -1
+    tokens = re.split(r"(\s+)", text.translate(_ASCII))
+    for t, token in enumerate(tokens):
+        if token and not token.isspace():
+            index += 1
+        if not _ARABIC_RUN.search(token):
+            out.append(token)
+            continue
+
+        followed = any(_ARABIC_RUN.search(rest) for rest in tokens[t + 1:t + 3])
+        confident = True
+
+        def replace(match: re.Match) -> str:
+            nonlocal confident
+            arabizi, ok = transliterate_word(match.group(), dialect, followed=followed)
+            confident = confident and ok
+            return arabizi
+
+        out.append(_ARABIC_RUN.sub(replace, token))
+        if not confident:
+            low_confidence.append(index)
+
+    return Transliteration(out, low_confidence)
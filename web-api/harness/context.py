@@ -1,11 +1,59 @@
-"""Application context and state tracking for agent execution."""
-
+"""Application context and state tracking for agent execution.
+
+Contexts are held in a per-worker registry and snapshotted to
+`agent_sessions.context` shortly after each change (debounced, batched across
+sessions), and in bulk on shutdown. `load_context` restores a snapshot the
+first time this worker needs a session it does not hold, so a restart or deploy
+does not reset language, response mode, lesson or onboarding progress.
+
+When the state store is shared
+(see services.state_store), every change is also written to the store and
+announced on the `context` channel so other workers drop their stale copy;
+`load_context` pulls a context another worker created or changed. Code that
+mutates nested fields directly must call `mark_changed()` afterwards.
+"""
+
+import asyncio
+import json
+import sys
 from typing import Any, Dict, Optional
 from datetime import datetime
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, ValidationError
+
+from services import metrics_service, state_store
+from services.registry import BoundedRegistry
+from services.supabase_client import get_supabase_async_admin_client
+
+# Matches the session registry so a live session never outlives its context
+CONTEXT_IDLE_TTL_SECONDS = 2 * 60 * 60
+MAX_CONTEXTS = 2000
+
+# Store key prefix and invalidation channel for shared contexts
+CONTEXT_KEY_PREFIX = "context:"
+CONTEXT_CHANNEL = "context"
 
 # In-memory context storage indexed by session_id
-_contexts: Dict[str, "AppContext"] = {}
+_contexts: BoundedRegistry[str, "AppContext"] = BoundedRegistry(
+    "contexts",
+    max_size=MAX_CONTEXTS,
+    idle_ttl=CONTEXT_IDLE_TTL_SECONDS,
+)
+
+# Sessions with a shared-store write already scheduled (coalesces bursts of changes)
+_pending_saves: set[str] = set()
+
+# Snapshots are written this long after the first unsaved change, in one batch
+SNAPSHOT_DEBOUNCE_SECONDS = 2.0
+SNAPSHOT_BATCH_SIZE = 500
+SNAPSHOT_RPC = "snapshot_agent_session_contexts"
+
+# Contexts changed since their last snapshot, by session_id
+_unsnapshotted: Dict[str, "AppContext"] = {}
+_snapshot_task: Optional[asyncio.Task] = None
+
+
+def _log(msg: str) -> None:
+    print(f"[Context] {msg}", flush=True, file=sys.stderr)
 
 
 class UserInfo(BaseModel):
@@ -92,6 +140,11 @@ class AppContext(BaseModel):
             f"updated_at={self.updated_at}"
         )
 
+    def mark_changed(self) -> None:
+        """Bump `updated_at`, schedule a snapshot and share the new state with other workers."""
+        self.updated_at = datetime.now()
+        _on_changed(self)
+
     def set_active_tool(self, tool_name: Optional[str]) -> None:
         """
         Update the active tool and log the state change.
@@ -101,7 +154,7 @@ class AppContext(BaseModel):
         """
         previous_tool = self.agent.active_tool
         self.agent.active_tool = tool_name
-        self.updated_at = datetime.now()
+        self.mark_changed()
         print(
             f"[AppContext Tool Change] "
             f"session_id={self.session_id}, "
@@ -118,7 +171,7 @@ class AppContext(BaseModel):
         """
         previous_language = self.agent.language
         self.agent.language = language
-        self.updated_at = datetime.now()
+        self.mark_changed()
         print(
             f"[AppContext Language Change] "
             f"session_id={self.session_id}, "
@@ -135,7 +188,7 @@ class AppContext(BaseModel):
         """
         previous_state = self.agent.audio_enabled
         self.agent.audio_enabled = enabled
-        self.updated_at = datetime.now()
+        self.mark_changed()
         print(
             f"[AppContext Audio State Change] "
             f"session_id={self.session_id}, "
@@ -151,7 +204,7 @@ class AppContext(BaseModel):
             text: The text to pronounce (in target language with diacritics)
         """
         self.agent.audio_text = text
-        self.updated_at = datetime.now()
+        self.mark_changed()
         print(
             f"[AppContext Audio Text Set] "
             f"session_id={self.session_id}, "
@@ -161,7 +214,7 @@ class AppContext(BaseModel):
     def clear_audio_text(self) -> None:
         """Clear the audio text after it has been processed."""
         self.agent.audio_text = None
-        self.updated_at = datetime.now()
+        self.mark_changed()
 
     def set_response_mode(self, mode: str) -> None:
         """
@@ -172,7 +225,7 @@ class AppContext(BaseModel):
         """
         previous_mode = self.agent.response_mode
         self.agent.response_mode = mode
-        self.updated_at = datetime.now()
+        self.mark_changed()
         print(
             f"[AppContext Response Mode Change] "
             f"session_id={self.session_id}, "
@@ -241,6 +294,7 @@ def create_context(
 
     # Store context indexed by session_id
     _contexts[session_id] = context
+    _on_changed(context)
 
     return context
 
@@ -249,6 +303,9 @@ def get_context(session_id: str) -> Optional[AppContext]:
     """
     Retrieve a context by its session ID.
 
+    Only this worker's copy is consulted; entry points that may receive a
+    session created on another worker call `load_context` first.
+
     Args:
         session_id: The session ID to retrieve the context for
 
@@ -258,6 +315,40 @@ def get_context(session_id: str) -> Optional[AppContext]:
     return _contexts.get(session_id)
 
 
+async def load_context(session_id: str) -> Optional[AppContext]:
+    """
+    Retrieve a context, pulling it from the shared state store or restoring
+    its last snapshot if this worker does not hold it.
+
+    Args:
+        session_id: The session ID to retrieve the context for
+
+    Returns:
+        AppContext: The context object if found, None otherwise
+    """
+    context = _contexts.get(session_id)
+    if context is not None:
+        return context
+
+    if state_store.is_shared():
+        raw = await state_store.get_state_store().get(CONTEXT_KEY_PREFIX + session_id)
+        if raw is not None:
+            context = AppContext.model_validate_json(raw)
+            _contexts[session_id] = context
+            return context
+
+    # Evicted here with a snapshot still pending: that copy is newer than the table
+    context = _unsnapshotted.get(session_id)
+    if context is not None:
+        _contexts[session_id] = context
+        return context
+
+    context = await _restore_snapshot(session_id)
+    if context is not None:
+        _contexts[session_id] = context
+    return context
+
+
 def delete_context(session_id: str) -> bool:
     """
     Delete a context by its session ID.
@@ -268,7 +359,155 @@ def delete_context(session_id: str) -> bool:
     Returns:
         bool: True if context was deleted, False if not found
     """
+    _unsnapshotted.pop(session_id, None)
+    if state_store.is_shared():
+        state_store.spawn(_delete_shared(session_id), f"Deleting context {session_id}")
     if session_id in _contexts:
         del _contexts[session_id]
         return True
     return False
+
+
+def evict_context(session_id: str) -> None:
+    """
+    Drop this worker's copy of a context when its session is evicted.
+
+    Unlike `delete_context` (session deleted), the shared store key and
+    other workers' copies are left alone, and a pending snapshot is still
+    written; `load_context` serves it until then.
+    """
+    _contexts.pop(session_id, None)
+    pending = _unsnapshotted.get(session_id)
+    if pending is not None:
+        _schedule_snapshot(pending)
+
+
+def _on_changed(context: AppContext) -> None:
+    _schedule_snapshot(context)
+    _schedule_save(context)
+
+
+def _schedule_snapshot(context: AppContext) -> None:
+    global _snapshot_task
+    _unsnapshotted[context.session_id] = context
+    if _snapshot_task is None or _snapshot_task.done():
+        try:
+            _snapshot_task = asyncio.get_running_loop().create_task(_snapshot_later())
+        except RuntimeError:
+            # No loop (sync caller); written with the next batch or on shutdown
+            pass
+
+
+async def _snapshot_later() -> None:
+    global _snapshot_task
+    await asyncio.sleep(SNAPSHOT_DEBOUNCE_SECONDS)
+    try:
+        await flush_snapshots()
+    except Exception as e:
+        _log(f"Snapshot write failed: {e}")
+    finally:
+        # Pick up changes made mid-write, or retry a failed batch
+        _snapshot_task = None
+        if _unsnapshotted:
+            _snapshot_task = asyncio.create_task(_snapshot_later())
+
+
+async def flush_snapshots() -> None:
+    """Write every pending context snapshot to `agent_sessions.context` now."""
+    while _unsnapshotted:
+        batch = dict(list(_unsnapshotted.items())[:SNAPSHOT_BATCH_SIZE])
+        for session_id in batch:
+            del _unsnapshotted[session_id]
+        payload = [
+            {"session_id": session_id, "context": context.model_dump(mode="json")}
+            for session_id, context in batch.items()
+        ]
+        try:
+            await get_supabase_async_admin_client().rpc(SNAPSHOT_RPC, {"p_snapshots": payload}).execute()
+        except Exception:
+            # Keep newer changes made while the write was in flight
+            for session_id, context in batch.items():
+                _unsnapshotted.setdefault(session_id, context)
+            raise
+        metrics_service.incr("context.snapshots.written", len(batch))
+
+
+async def snapshot_all_contexts() -> None:
+    """Snapshot every context this worker holds. Call on graceful shutdown."""
+    global _snapshot_task
+    if _snapshot_task is not None and not _snapshot_task.done():
+        _snapshot_task.cancel()
+    _snapshot_task = None
+    for session_id, context in _contexts.values_snapshot().items():
+        _unsnapshotted[session_id] = context
+    try:
+        await flush_snapshots()
+    except Exception as e:
+        _log(f"Shutdown snapshot failed for {len(_unsnapshotted)} contexts: {e}")
+
+
+async def _restore_snapshot(session_id: str) -> Optional[AppContext]:
+    try:
+        response = await (
+            get_supabase_async_admin_client()
+            .table("agent_sessions")
+            .select("context")
+            .eq("session_id", session_id)
+            .limit(1)
+            .execute()
+        )
+    except Exception as e:
+        _log(f"Failed to read context snapshot for {session_id}: {e}")
+        return None
+    snapshot = response.data[0].get("context") if response.data else None
+    if not snapshot:
+        metrics_service.incr("context.snapshots.missing")
+        return None
+    try:
+        context = AppContext.model_validate(snapshot)
+    except ValidationError as e:
+        _log(f"Discarding unreadable context snapshot for {session_id}: {e}")
+        return None
+    metrics_service.incr("context.snapshots.restored")
+    return context
+
+
+def _schedule_save(context: AppContext) -> None:
+    if context.session_id in _pending_saves or not state_store.is_shared():
+        return
+    _pending_saves.add(context.session_id)
+    state_store.spawn(_save_shared(context), f"Saving context {context.session_id}")
+
+
+async def _save_shared(context: AppContext) -> None:
+    # Changes made before this runs are coalesced into one write
+    _pending_saves.discard(context.session_id)
+    store = state_store.get_state_store()
+    await store.set(
+        CONTEXT_KEY_PREFIX + context.session_id,
+        context.model_dump_json(),
+        ttl=CONTEXT_IDLE_TTL_SECONDS,
+    )
+    await _announce(context.session_id)
+
+
+async def _delete_shared(session_id: str) -> None:
+    await state_store.get_state_store().delete(CONTEXT_KEY_PREFIX + session_id)
+    await _announce(session_id)
+
+
+async def _announce(session_id: str) -> None:
+    message = json.dumps({"session_id": session_id, "origin": state_store.WORKER_ID})
+    await state_store.get_state_store().publish(CONTEXT_CHANNEL, message)
+
+
+def _on_context_changed(message: str) -> None:
+    """Drop this worker's copy when another worker changed or deleted it."""
+    event = json.loads(message)
+    if event.get("origin") != state_store.WORKER_ID:
+        _contexts.pop(event["session_id"], None)
+        # The changing worker snapshots its newer copy
+        _unsnapshotted.pop(event["session_id"], None)
+
+
+state_store.subscribe(CONTEXT_CHANNEL, _on_context_changed)
@@ -0,0 +1,158 @@
+"""Content-addressed cache for scaffolded and transliterated display text.
+
+The same canonical Arabic (openers, greetings, flashcard words, "أحسنت")
+is scaffolded over and over for every learner. Results are cached under a
+hash of everything that shapes the output:
+
+- the display mode ("scaffold" / "transliterate" / "variants", the
+  combined scaffolding + transliteration call);
+- the canonical text, NFC-normalized with whitespace collapsed;
+- the prompt version — a hash of the prompt file, so editing a prompt
+  invalidates every entry made with the old one;
+- the learner's learned-words set (order and duplicates ignored);
+- the dialect, for transliterations (its letters differ, e.g. Egyptian g
+  for ج);
+- a coarse bucket of the user's last message: "none", "general", or — for
+  "how do I say …"-style requests, whose output depends on the exact
+  request — that message's own hash.
+
+Two tiers: a per-worker LRU (`BoundedRegistry`) in front of the
+`display_text_cache` table, which all workers share and which survives
+deploys. Table writes happen in the background. Only successful LLM results
+are cached, never fallbacks.
+
+Hits per tier, misses and the overall hit rate are published to
+`metrics_service` under `display_cache.*`.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import sys
+import unicodedata
+from typing import Optional
+
+from services import metrics_service
+from services.registry import BoundedRegistry
+from services.supabase_client import get_supabase_async_admin_client
+
+TABLE = "display_text_cache"
+MAX_MEMORY_ENTRIES = 5000
+
+# The user's message changes the scaffolding only when they ask for a
+# specific phrase; everything else is "general conversation"
+_PHRASE_REQUEST = re.compile(
+    r"\b(how (do|would|can) (i|you) say|what('s| is) .+ in arabic|teach me|translate|say .+ in arabic)\b",
+    re.IGNORECASE,
+)
+
+_memory: BoundedRegistry[str, dict] = BoundedRegistry("display_cache", max_size=MAX_MEMORY_ENTRIES)
+_background: set[asyncio.Task] = set()
+# Lookups by outcome, for the hit-rate gauge
+_lookups = {"memory": 0, "db": 0, "miss": 0}
+
+
+def _log(msg: str) -> None:
+    print(f"[DisplayCache] {msg}", flush=True, file=sys.stderr)
+
+
+def _hit_rate() -> float:
+    total = sum(_lookups.values())
+    return (_lookups["memory"] + _lookups["db"]) / total if total else 0.0
+
+
+metrics_service.register_gauge("display_cache.hit_rate", _hit_rate)
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form of a text for keying: NFC, whitespace collapsed."""
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+def context_bucket(user_message: Optional[str]) -> str:
+    """Coarse bucket of the user's message; see module docstring."""
+    if not user_message or not user_message.strip():
+        return "none"
+    if _PHRASE_REQUEST.search(user_message):
+        digest = hashlib.sha256(normalize_text(user_message).lower().encode()).hexdigest()[:16]
+        return f"phrase:{digest}"
+    return "general"
+
+
+def make_key(
+    mode: str,
+    text: str,
+    prompt_version: str,
+    learned_words: Optional[list[str]] = None,
+    user_message: Optional[str] = None,
+    dialect: Optional[str] = None,
+) -> str:
+    """Cache key for one display-text generation."""
+    parts = {
+        "mode": mode,
+        "text": normalize_text(text),
+        "prompt": prompt_version,
+        "learned": sorted({normalize_text(w) for w in learned_words or []}),
+        "context": context_bucket(user_message),
+    }
+    if dialect:
+        # Only when given, so keys made without a dialect stay valid
+        parts["dialect"] = dialect
+    return hashlib.sha256(json.dumps(parts, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+
+async def get(key: str) -> Optional[dict]:
+    """Return the cached result for `key`, checking memory then the table."""
+    result = _memory.get(key)
+    if result is not None:
+        _lookups["memory"] += 1
+        metrics_service.incr("display_cache.hits.memory")
+        return result
+
+    try:
+        response = await (
+            get_supabase_async_admin_client()
+            .table(TABLE)
+            .select("result")
+            .eq("cache_key", key)
+            .limit(1)
+            .execute()
+        )
+    except Exception as e:
+        _log(f"Lookup failed: {e}")
+        response = None
+
+    if response is not None and response.data:
+        result = response.data[0]["result"]
+        _memory[key] = result
+        _lookups["db"] += 1
+        metrics_service.incr("display_cache.hits.db")
+        return result
+
+    _lookups["miss"] += 1
+    metrics_service.incr("display_cache.misses")
+    return None
+
+
+def put(key: str, mode: str, result: dict) -> None:
+    """Cache a result in memory now and in the table in the background."""
+    _memory[key] = result
+    try:
+        task = asyncio.get_running_loop().create_task(_write(key, mode, result))
+    except RuntimeError:
+        return
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def _write(key: str, mode: str, result: dict) -> None:
+    try:
+        await (
+            get_supabase_async_admin_client()
+            .table(TABLE)
+            .upsert({"cache_key": key, "mode": mode, "result": result})
+            .execute()
+        )
+    except Exception as e:
+        _log(f"Write failed: {e}")
@@ -5,9 +5,93 @@ Arabic word (`marhaban`, `duroos`, …). The frontend tints those spans
 and shows a tooltip with the meaning. Rather than asking the agent to
 return `highlights` arrays, the harness scans each text bubble against
 a per-flow vocab and computes the offsets server-side.
+
+Matching goes through `VocabMatcher`, which compiles a vocabulary once into
+an index keyed by normalized word, then finds every entry in one
+left-to-right pass over the text's words, longest entry first at each
+position, so matches never overlap. Arabizi spellings are normalized on
+both sides: case is ignored and the number letters fold to their usual
+letter spellings (`mar7aba` matches `marhaba`, `5alas` matches `khalas`).
+2 (hamza) and 3 (ayn) have no letter spelling; they fold to an apostrophe,
+so `3arabi` matches `'arabi` but never `arabi`, and `3an` never matches
+the English "an".
 """
 
 import re
+from functools import lru_cache
+from typing import Iterator
+
+# Arabizi number letters -> the letters they are also written with. 2 (hamza)
+# and 3 (ayn) are also written as an apostrophe; dropping them altogether
+# would make `3an`/`2in` match English "an"/"in"
+_DIGIT_FOLDS = str.maketrans({"2": "'", "3": "'", "5": "kh", "6": "t", "7": "h", "8": "gh", "9": "s"})
+# A word, with a leading apostrophe kept for `'arabi`-style spellings
+_TOKEN = re.compile(r"(?<!\w)'?\w+")
+
+
+@lru_cache(maxsize=65536)
+def fold(word: str) -> str:
+    """Normalized Arabizi spelling of one word, for matching."""
+    return word.casefold().translate(_DIGIT_FOLDS)
+
+
+class VocabMatcher:
+    """A vocabulary compiled once, matched against text in a single pass."""
+
+    def __init__(self, words: list[str]):
+        # First folded token -> [(folded tokens, separators, word)], longest first
+        self._index: dict[str, list[tuple[tuple[str, ...], tuple[str, ...], str]]] = {}
+        for word in sorted({w for w in words if w}, key=len, reverse=True):
+            spans = [m.span() for m in _TOKEN.finditer(word)]
+            if not spans:
+                continue
+            tokens = tuple(fold(word[a:b]) for a, b in spans)
+            separators = tuple(word[spans[k][1]:spans[k + 1][0]].strip() for k in range(len(spans) - 1))
+            entries = self._index.setdefault(tokens[0], [])
+            if not any(e[0] == tokens and e[1] == separators for e in entries):
+                entries.append((tokens, separators, word))
+        for entries in self._index.values():
+            entries.sort(key=lambda e: len(e[0]), reverse=True)
+
+    def finditer(self, text: str) -> Iterator[tuple[int, int, str]]:
+        """Yield `(start, end, vocab word)` for each non-overlapping match, in order."""
+        if not self._index:
+            return
+        matches = list(_TOKEN.finditer(text))
+        spans = [m.span() for m in matches]
+        folded = [fold(m.group()) for m in matches]
+        i = 0
+        while i < len(spans):
+            match = None
+            start = spans[i][0]
+            entries = self._index.get(folded[i])
+            if entries is None and folded[i].startswith("'"):
+                # An opening quote rather than an ayn: 'marhaba'
+                entries = self._index.get(folded[i][1:])
+                start += 1
+            for tokens, separators, word in entries or ():
+                n = len(tokens)
+                if tuple(folded[i + 1:i + n]) != tokens[1:]:
+                    continue
+                if all(
+                    text[spans[i + k][1]:spans[i + k + 1][0]].strip() == separators[k]
+                    for k in range(n - 1)
+                ):
+                    match = (n, word)
+                    break
+            if match is None:
+                i += 1
+                continue
+            n, word = match
+            yield start, spans[i + n - 1][1], word
+            i += n
+
+
+@lru_cache(maxsize=256)
+def get_matcher(words: frozenset[str]) -> VocabMatcher:
+    """The compiled matcher for a vocabulary, built once per distinct set."""
+    return VocabMatcher(list(words))
+
 
 ONBOARDING_VOCAB: dict[str, str] = {
     "marhaban": "hello",
@@ -27,29 +111,20 @@ FLOW_VOCAB: dict[str, dict[str, str]] = {
 def compute_highlights(text: str, flow: str | None) -> list[dict]:
     """Find flavour words in `text`, return DB-shaped highlight rows.
 
-    Case-insensitive match on whole words. Longest words first so a
-    multi-word vocab entry would win over a substring; non-overlapping
-    so we never double-tint a span.
+    Case-insensitive match on whole words, through the flow's compiled
+    `VocabMatcher`: the longest entry wins at a position so a multi-word
+    entry beats a substring, and matches never overlap so we never
+    double-tint a span.
     """
     if not flow or flow not in FLOW_VOCAB:
         return []
     vocab = FLOW_VOCAB[flow]
-    claimed: list[tuple[int, int]] = []
-    rows: list[dict] = []
-    for word in sorted(vocab, key=len, reverse=True):
-        pattern = rf"\b{re.escape(word)}\b"
-        for m in re.finditer(pattern, text, re.IGNORECASE):
-            start, end = m.start(), m.end()
-            if any(s < end and start < e for s, e in claimed):
-                continue
-            rows.append(
-                {
-                    "word": m.group(),
-                    "meaning": vocab[word],
-                    "start": start,
-                    "end": end,
-                }
-            )
-            claimed.append((start, end))
-    rows.sort(key=lambda h: h["start"])
-    return rows
+    return [
+        {
+            "word": text[start:end],
+            "meaning": vocab[word],
+            "start": start,
+            "end": end,
+        }
+        for start, end, word in get_matcher(frozenset(vocab)).finditer(text)
+    ]
@@ -0,0 +1,225 @@
+"""Bounded-context history — recent turns verbatim, older turns summarized.
+
+Long learner sessions would otherwise send an ever-growing prompt. The
+window keeps the most recent turns verbatim within a token budget and
+replaces everything older with a single rolling summary item. The summary
+is persisted on the `agent_sessions` row and regenerated incrementally in
+the background — only the items that have newly fallen out of the window
+are folded in — so no turn waits on a summarization call.
+
+Chat turns wrap their `AgentSession` in `WindowedSession`; the voice
+pipeline windows the history it loads into the Pipecat `LLMContext`.
+"""
+
+import asyncio
+import json
+import sys
+from typing import Any, Optional
+
+from agents.items import TResponseInputItem
+from agents.memory.session import SessionABC
+
+from harness.session import AgentSession
+
+# Rough size estimate; Arabic runs closer to 3 chars/token than English's 4.
+CHARS_PER_TOKEN = 3
+
+# Always keep at least this many of the most recent items verbatim.
+MIN_VERBATIM_ITEMS = 4
+
+# Re-summarize once this many items have fallen out of the window since the
+# last summary. Until then they stay verbatim (slightly over budget).
+SUMMARY_REFRESH_ITEMS = 10
+
+# If the un-summarized tail grows past budget × this factor (e.g. the first
+# window over a long legacy session), drop the overflow rather than send it.
+OVERFLOW_FACTOR = 2
+
+SUMMARY_PREFIX = "Summary of the earlier conversation with this learner:"
+
+SUMMARIZE_PROMPT = """You maintain a running summary of a conversation between a language tutor and a learner.
+
+Update the summary below with the new conversation excerpt. Keep it under 200 words. Preserve: \
+the learner's goals and level, words and phrases they have practised or struggled with, \
+lessons or activities in progress, and any personal details they shared. Drop greetings and small talk.
+
+## Current summary
+{summary}
+
+## New excerpt
+{excerpt}
+
+Return only the updated summary."""
+
+_refresh_tasks: dict[str, asyncio.Task] = {}
+
+
+def _log(msg: str) -> None:
+    print(f"[History] {msg}", flush=True, file=sys.stderr)
+
+
+def estimate_tokens(item: Any) -> int:
+    """Cheap token estimate for one history item."""
+    return len(json.dumps(item, ensure_ascii=False)) // CHARS_PER_TOKEN + 1
+
+
+def _starts_turn(item: Any) -> bool:
+    """True for user messages — the only safe place to cut the history.
+
+    Cutting anywhere else could separate a tool call from its output.
+    """
+    return isinstance(item, dict) and item.get("role") == "user"
+
+
+def window_start(items: list, token_budget: int) -> int:
+    """Index of the first item to keep verbatim under `token_budget`."""
+    used = 0
+    cut = len(items)
+    for i in range(len(items) - 1, -1, -1):
+        used += estimate_tokens(items[i])
+        if used > token_budget and len(items) - i > MIN_VERBATIM_ITEMS:
+            return cut
+        if _starts_turn(items[i]):
+            cut = i
+    return 0
+
+
+def summary_item(summary: str) -> dict:
+    return {
+        "type": "message",
+        "role": "system",
+        "content": f"{SUMMARY_PREFIX}\n{summary}",
+    }
+
+
+def items_to_chat_messages(items: list) -> list[dict]:
+    """Convert OpenAI Agents SDK session items to simple chat messages.
+
+    Keeps message-type items and extracts role/content pairs suitable
+    for Pipecat's LLMContext (and for summarization excerpts).
+    """
+    messages = []
+    for item in items:
+        if item.get("type") != "message":
+            continue
+        role = item.get("role")
+        if role not in ("user", "assistant", "system"):
+            continue
+        content = item.get("content", "")
+        # Content may be a list of content blocks (OpenAI format)
+        if isinstance(content, list):
+            text_parts = []
+            for block in content:
+                if isinstance(block, dict) and block.get("type") in ("output_text", "input_text"):
+                    text_parts.append(block.get("text", ""))
+                elif isinstance(block, str):
+                    text_parts.append(block)
+            content = " ".join(text_parts)
+        if content:
+            messages.append({"role": role, "content": content})
+    return messages
+
+
+async def _summarize(previous: Optional[str], items: list) -> Optional[str]:
+    from harness.scaffolding import _get_client
+
+    excerpt = "\n".join(
+        f"{m['role']}: {m['content']}"
+        for m in items_to_chat_messages(
+            # Chat-turn user items are stored without an explicit type
+            [{"type": "message", **i} if "type" not in i and "role" in i else i for i in items]
+        )
+    )
+    if not excerpt:
+        return previous
+
+    response = await _get_client().chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[{
+            "role": "user",
+            "content": SUMMARIZE_PROMPT.format(summary=previous or "(none yet)", excerpt=excerpt),
+        }],
+        temperature=0.2,
+        max_tokens=400,
+    )
+    text = response.choices[0].message.content
+    return text.strip() if text else previous
+
+
+async def _refresh_summary(
+    session: AgentSession, previous: Optional[str], covered: int, folded: list
+) -> None:
+    try:
+        summary = await _summarize(previous, folded)
+        if summary:
+            await session.set_history_summary(summary, covered + len(folded))
+    except Exception as e:
+        _log(f"Summary refresh failed for {session.session_id}: {e}")
+    finally:
+        _refresh_tasks.pop(session.session_id, None)
+
+
+def _schedule_refresh(
+    session: AgentSession, previous: Optional[str], covered: int, folded: list
+) -> None:
+    task = _refresh_tasks.get(session.session_id)
+    if task and not task.done():
+        return
+    _refresh_tasks[session.session_id] = asyncio.create_task(
+        _refresh_summary(session, previous, covered, folded)
+    )
+
+
+async def build_window(session: AgentSession, items: list, token_budget: int) -> list:
+    """Return `items` reduced to [summary] + recent verbatim turns."""
+    cut = window_start(items, token_budget)
+    if cut == 0:
+        return items
+
+    summary, covered = await session.get_history_summary()
+    if covered > len(items):
+        # History was cleared or popped below the summarized prefix
+        summary, covered = None, 0
+
+    if cut - covered >= SUMMARY_REFRESH_ITEMS:
+        _schedule_refresh(session, summary, covered, items[covered:cut])
+
+    verbatim_from = covered
+    tail_tokens = sum(estimate_tokens(i) for i in items[covered:])
+    if tail_tokens > token_budget * OVERFLOW_FACTOR:
+        verbatim_from = max(covered, cut)
+
+    windowed = list(items[verbatim_from:])
+    if summary:
+        windowed.insert(0, summary_item(summary))
+    return windowed
+
+
+class WindowedSession(SessionABC):
+    """`AgentSession` view whose reads are windowed to a token budget.
+
+    Writes pass straight through, so the full history stays in the item log.
+    The summary item is part of what `get_items` returns, which keeps the
+    Agents SDK from persisting it as new input.
+    """
+
+    def __init__(self, session: AgentSession, token_budget: int):
+        self.session_id = session.session_id
+        self._session = session
+        self._token_budget = token_budget
+
+    async def get_items(self, limit: Optional[int] = None) -> list[TResponseInputItem]:
+        items = await self._session.get_items()
+        windowed = await build_window(self._session, items, self._token_budget)
+        if limit is not None and limit > 0:
+            return windowed[-limit:]
+        return windowed
+
+    async def add_items(self, items: list[TResponseInputItem]) -> None:
+        await self._session.add_items(items)
+
+    async def pop_item(self) -> Optional[TResponseInputItem]:
+        return await self._session.pop_item()
+
+    async def clear_session(self) -> None:
+        await self._session.clear_session()
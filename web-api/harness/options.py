@@ -38,10 +38,15 @@ class HarnessOptions:
     # WebSocket is registered, before entering the receive loop.
     fire_opener: bool = False
 
+    # Approximate token budget for verbatim conversation history. Older turns
+    # are replaced by a rolling summary. None sends the full history.
+    history_token_budget: Optional[int] = None
+
     def turn_config(self) -> TurnConfig:
         """Project the per-turn fields out for `harness.turn.run_turn`."""
         return TurnConfig(
             scaffold=self.scaffold,
             flow_tag=self.flow_tag,
             user_none_system_prompt=self.user_none_system_prompt,
+            history_token_budget=self.history_token_budget,
         )
@@ -0,0 +1,216 @@
+"""Prompt registry — agent prompt files held in memory, versioned by content.
+
+Every markdown prompt under `agent/` (language base prompts, the onboarding
+and welcome-back system prompts, the scaffolding prompts) is read once and
+kept as a `Prompt`: its text, a version (hash of the text) that caches can
+key on, and its `{placeholder}` fields split out so `render` doesn't rescan
+the template on every turn. Rendered output is memoized per prompt version
+and values.
+
+Prompts are named by their path relative to `agent/`, e.g.
+`"tutor/languages/ar-AR.md"` or `"onboarding/system.md"`.
+
+Reloads:
+- `save` (the admin prompt editor) writes the file, swaps it in on this
+  worker and broadcasts the new text on `PROMPT_CHANNEL`, so every other
+  worker — on this host or another — serves it from its next turn.
+- Hand edits are picked up too: a prompt's mtime is checked at most once
+  every `CHECK_INTERVAL_SECONDS`.
+
+Loads and reloads are counted in `metrics_service` under `prompts.*`.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import sys
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional
+
+from services import metrics_service, state_store
+
+AGENT_DIR = Path(__file__).parent.parent / "agent"
+PROMPT_CHANNEL = "prompts:changed"
+# How often a prompt file is stat'ed for hand edits
+CHECK_INTERVAL_SECONDS = 2.0
+
+# Placeholders are bare identifiers; JSON examples in prompts ({"messages": []}) aren't
+_FIELD = re.compile(r"\{([a-z_][a-z0-9_]*)\}")
+
+
+def _log(msg: str) -> None:
+    print(f"[Prompts] {msg}", flush=True, file=sys.stderr)
+
+
+def _version(text: str) -> str:
+    return hashlib.sha256(text.encode()).hexdigest()[:12]
+
+
+@dataclass(frozen=True)
+class Prompt:
+    """One prompt file's text. Equal (and hashed) by name and version."""
+
+    name: str
+    version: str
+    text: str = field(compare=False, repr=False)
+    # Alternating literal text and field names: [text, field, text, field, ..., text]
+    parts: tuple[str, ...] = field(compare=False, repr=False, default=())
+
+    @classmethod
+    def parse(cls, name: str, text: str) -> "Prompt":
+        return cls(name, _version(text), text, tuple(_FIELD.split(text)))
+
+    def render(self, **values: str) -> str:
+        """
+        Fill `{field}` placeholders from `values`. Fields not given are left
+        as written, and substituted values are never rescanned.
+        """
+        return _render(self, tuple(sorted(values.items())))
+
+
+@lru_cache(maxsize=1024)
+def _render(prompt: Prompt, values: tuple[tuple[str, str], ...]) -> str:
+    lookup = dict(values)
+    parts = list(prompt.parts)
+    for i in range(1, len(parts), 2):
+        name = parts[i]
+        parts[i] = lookup[name] if name in lookup else "{" + name + "}"
+    return "".join(parts)
+
+
+@dataclass
+class _Entry:
+    prompt: Prompt
+    mtime_ns: int
+    checked_at: float
+
+
+_entries: dict[str, _Entry] = {}
+
+
+def path_of(name: str) -> Path:
+    """
+    Resolve a prompt name to its file under `agent/`.
+
+    Raises:
+        ValueError: If the name isn't a markdown file inside `agent/`
+    """
+    path = (AGENT_DIR / name).resolve()
+    if path.suffix != ".md" or not path.is_relative_to(AGENT_DIR.resolve()):
+        raise ValueError(f"Not a prompt name: {name}")
+    return path
+
+
+def _load(name: str, path: Path) -> _Entry:
+    text = path.read_text(encoding="utf-8")
+    entry = _Entry(Prompt.parse(name, text), path.stat().st_mtime_ns, time.monotonic())
+    previous = _entries.get(name)
+    if previous is not None and previous.prompt.version != entry.prompt.version:
+        metrics_service.incr("prompts.reloaded")
+        _log(f"Reloaded {name} ({entry.prompt.version})")
+    metrics_service.incr("prompts.loads")
+    _entries[name] = entry
+    return entry
+
+
+def get(name: str) -> Prompt:
+    """
+    Return a prompt, from memory unless its file changed.
+
+    Raises:
+        FileNotFoundError: If the prompt file doesn't exist
+    """
+    entry = _entries.get(name)
+    now = time.monotonic()
+    if entry is not None and now - entry.checked_at < CHECK_INTERVAL_SECONDS:
+        return entry.prompt
+
+    path = path_of(name)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        _entries.pop(name, None)
+        raise FileNotFoundError(f"Prompt file not found: {name} at {path}") from None
+    if entry is None or entry.mtime_ns != mtime_ns:
+        entry = _load(name, path)
+    entry.checked_at = now
+    return entry.prompt
+
+
+def exists(name: str) -> bool:
+    """Whether a prompt file exists (without loading it)."""
+    if name in _entries:
+        return True
+    try:
+        return path_of(name).is_file()
+    except ValueError:
+        return False
+
+
+def names(directory: str) -> list[str]:
+    """Names of the prompts in one directory under `agent/`, sorted."""
+    root = AGENT_DIR / directory
+    return [f"{directory}/{p.name}" for p in sorted(root.glob("*.md"))]
+
+
+def _install(name: str, text: str, path: Path) -> Prompt:
+    entry = _entries.get(name)
+    if entry is not None and entry.prompt.text == text:
+        return entry.prompt
+    prompt = Prompt.parse(name, text)
+    try:
+        mtime_ns = path.stat().st_mtime_ns
+    except FileNotFoundError:
+        mtime_ns = 0
+    _entries[name] = _Entry(prompt, mtime_ns, time.monotonic())
+    metrics_service.incr("prompts.reloaded")
+    return prompt
+
+
+async def save(name: str, text: str) -> Prompt:
+    """
+    Overwrite an existing prompt file and make every worker use it.
+
+    Raises:
+        FileNotFoundError: If the prompt file doesn't exist
+    """
+    path = path_of(name)
+    if not path.is_file():
+        raise FileNotFoundError(f"Prompt file not found: {name} at {path}")
+    await asyncio.to_thread(path.write_text, text, encoding="utf-8")
+    prompt = _install(name, text, path)
+    _log(f"Saved {name} ({prompt.version})")
+
+    message = json.dumps({"name": name, "text": text, "origin": state_store.WORKER_ID})
+    state_store.spawn(
+        state_store.get_state_store().publish(PROMPT_CHANNEL, message),
+        f"Announcing prompt {name}",
+    )
+    return prompt
+
+
+async def _on_prompt_changed(message: str) -> None:
+    """Swap in a prompt another worker saved, and bring this host's file up to date."""
+    event = json.loads(message)
+    if event.get("origin") == state_store.WORKER_ID:
+        return
+    name, text = event["name"], event["text"]
+    path = path_of(name)
+    _install(name, text, path)
+
+    current: Optional[str]
+    try:
+        current = await asyncio.to_thread(path.read_text, encoding="utf-8")
+    except FileNotFoundError:
+        current = None
+    if current is not None and current != text:
+        # Another host's edit; keep it across restarts of this one
+        await asyncio.to_thread(path.write_text, text, encoding="utf-8")
+        _entries[name].mtime_ns = path.stat().st_mtime_ns
+
+
+state_store.subscribe(PROMPT_CHANNEL, _on_prompt_changed)
@@ -0,0 +1,183 @@
+"""Incremental parser for a streamed `AgentResponse`.
+
+With a structured output type the model streams the `AgentResponse` JSON
+token by token. `AgentResponseStreamParser` consumes those text deltas and
+reports, as early as possible:
+
+- `TextDelta` — newly generated characters of a text bubble's
+  `content.text`, decoded (escapes resolved);
+- `CompletedMessage` — a `messages[i]` element whose JSON object has closed,
+  validated as an `AgentResponseMessage`.
+
+Each character is scanned once, tracking only the container stack and string
+state. Malformed elements are skipped; callers reconcile against the run's
+final output.
+"""
+
+import json
+import sys
+from dataclasses import dataclass, field
+from typing import Optional, Union
+
+from pydantic import TypeAdapter, ValidationError
+
+from harness.response import AgentResponseMessage
+
+_message_adapter: TypeAdapter = TypeAdapter(AgentResponseMessage)
+
+
+def _log(msg: str) -> None:
+    print(f"[ResponseStream] {msg}", flush=True, file=sys.stderr)
+
+
+@dataclass(frozen=True)
+class TextDelta:
+    """New characters of the text bubble at `messages[index]`."""
+
+    index: int
+    delta: str
+
+
+@dataclass(frozen=True)
+class CompletedMessage:
+    """A fully generated `messages[index]` element."""
+
+    index: int
+    message: AgentResponseMessage
+
+
+StreamEvent = Union[TextDelta, CompletedMessage]
+
+
+@dataclass
+class _Frame:
+    is_object: bool
+    # Key whose value is currently being parsed (objects only)
+    key: Optional[str] = None
+    expect_key: bool = field(default=False)
+
+
+def _decode_partial(raw: str) -> str:
+    """Decode the body of a JSON string that may end mid-escape."""
+    # An escape is at most 6 characters (\uXXXX); trim until the rest decodes
+    for trim in range(7):
+        try:
+            return json.loads(f'"{raw[:len(raw) - trim]}"')
+        except json.JSONDecodeError:
+            continue
+    return ""
+
+
+class AgentResponseStreamParser:
+    """Feed `AgentResponse` JSON deltas; get text deltas and completed messages back."""
+
+    def __init__(self) -> None:
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget everything — call when the model starts a new response."""
+        self._text = ""
+        self._pos = 0
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        # Index of the bubble whose `content.text` is being streamed, if any
+        self._text_index: Optional[int] = None
+        self._text_emitted = 0
+        self._element_start = 0
+        self._next_index = 0
+
+    def _in_messages_array(self) -> bool:
+        return (
+            len(self._stack) == 2
+            and self._stack[0].is_object
+            and self._stack[0].key == "messages"
+            and not self._stack[1].is_object
+        )
+
+    def _in_text_value(self) -> bool:
+        # root{messages: [ {content: {text: "..."}} ]}
+        return (
+            len(self._stack) == 4
+            and self._stack[0].key == "messages"
+            and self._stack[2].key == "content"
+            and self._stack[3].is_object
+            and self._stack[3].key == "text"
+        )
+
+    def _text_delta(self, end: int) -> Optional[TextDelta]:
+        decoded = _decode_partial(self._text[self._string_start:end])
+        if len(decoded) <= self._text_emitted or self._text_index is None:
+            return None
+        delta = decoded[self._text_emitted:]
+        self._text_emitted = len(decoded)
+        return TextDelta(self._text_index, delta)
+
+    def feed(self, chunk: str) -> list[StreamEvent]:
+        """Consume the next piece of output; return what it completed."""
+        events: list[StreamEvent] = []
+        self._text += chunk
+        text = self._text
+
+        while self._pos < len(text):
+            pos = self._pos
+            char = text[pos]
+            self._pos += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._string_is_key:
+                        self._stack[-1].key = json.loads(f'"{text[self._string_start:pos]}"')
+                        self._stack[-1].expect_key = False
+                    elif self._text_index is not None:
+                        delta = self._text_delta(pos)
+                        if delta is not None:
+                            events.append(delta)
+                        self._text_index = None
+                continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = self._pos
+                top = self._stack[-1] if self._stack else None
+                self._string_is_key = bool(top and top.is_object and top.expect_key)
+                if not self._string_is_key and self._in_text_value():
+                    self._text_index = self._next_index
+                    self._text_emitted = 0
+            elif char in "{[":
+                if char == "{" and self._in_messages_array():
+                    self._element_start = pos
+                self._stack.append(_Frame(is_object=char == "{", expect_key=char == "{"))
+            elif char in "}]":
+                if not self._stack:
+                    continue
+                self._stack.pop()
+                if char == "}" and self._in_messages_array():
+                    event = self._complete_element(text[self._element_start:pos + 1])
+                    if event is not None:
+                        events.append(event)
+            elif char == ",":
+                if self._stack and self._stack[-1].is_object:
+                    self._stack[-1].expect_key = True
+
+        if self._in_string and self._text_index is not None:
+            delta = self._text_delta(len(text))
+            if delta is not None:
+                events.append(delta)
+        return events
+
+    def _complete_element(self, raw: str) -> Optional[CompletedMessage]:
+        index = self._next_index
+        self._next_index += 1
+        try:
+            return CompletedMessage(index, _message_adapter.validate_json(raw))
+        except ValidationError as e:
+            _log(f"Skipping malformed message {index}: {e}")
+            return None
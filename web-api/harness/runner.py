@@ -3,7 +3,7 @@
 from agents import Runner, RunConfig
 
 from agent.tutor.tutor_agent import agent
-from harness.context import get_context
+from harness.context import load_context
 from harness.session_manager import get_session
 
 
@@ -23,12 +23,12 @@ async def generate_agent_response(session_id: str, user_message: str, user_acces
         ValueError: If session is not found
     """
     # Look up the session
-    session = get_session(session_id, user_access_token)
+    session = await get_session(session_id, user_access_token)
     if not session:
         raise ValueError(f"Session not found: {session_id}")
 
     # Look up the context
-    context = get_context(session_id)
+    context = await load_context(session_id)
 
     # Run the agent
     result = await Runner.run(agent, user_message, session=session, context=context)
@@ -58,11 +58,11 @@ async def generate_greeting(session_id: str, user_access_token: str | None = Non
     Raises:
         ValueError: If session is not found
     """
-    session = get_session(session_id, user_access_token)
+    session = await get_session(session_id, user_access_token)
     if not session:
         raise ValueError(f"Session not found: {session_id}")
 
-    context = get_context(session_id)
+    context = await load_context(session_id)
 
     system_message = {
         "role": "system",
@@ -104,12 +104,12 @@ async def generate_agent_followup(session_id: str, user_access_token: str | None
         ValueError: If session is not found
     """
     # Look up the session
-    session = get_session(session_id, user_access_token)
+    session = await get_session(session_id, user_access_token)
     if not session:
         raise ValueError(f"Session not found: {session_id}")
 
     # Look up the context
-    context = get_context(session_id)
+    context = await load_context(session_id)
 
     # Add a system message to the history to trigger the followup
     system_message = {
@@ -3,19 +3,42 @@
 Two modes:
 - Scaffolded text: Translates Arabic into English, keeping learned words as Arabizi.
 - Transliterated text: Pure Arabizi romanization of Arabic (no translation).
+
+`generate_scaffolded_text` and `generate_transliterated_text` go through
+`harness.display_cache` first; the `_with_metadata` variants (admin
+debugging) always call the model. Transliteration is mostly rule-based
+(`harness.arabizi`), with the model only filling in unvowelled words.
+
+`generate_display_variants` produces both at once: when the rules can't
+transliterate on their own it asks for scaffolding and transliteration in
+one structured call (or, with `COMBINED_DISPLAY_PROMPT=0`, runs the two
+calls concurrently).
+
+Every call sends the prompt file as a static system message and the
+per-call input (text, learned words, learner context) as the user message,
+so the provider's prefix cache can serve the instructions across learners.
+Prompt and cached token counts go to `metrics_service` under `llm.*`.
 """
 
+import asyncio
 import json
 import os
 import re
-from pathlib import Path
+import time
 from openai import AsyncOpenAI
 from loguru import logger
 
+from harness import arabizi, display_cache, prompts
+from harness.highlights import get_matcher
+from services import metrics_service
+
 
 _client: AsyncOpenAI | None = None
 
-PROMPTS_DIR = Path(__file__).parent.parent / "agent" / "tutor" / "prompts"
+# One structured call for scaffolding + transliteration; "0" runs them as two concurrent calls
+COMBINED_DISPLAY_PROMPT = os.getenv("COMBINED_DISPLAY_PROMPT", "1") != "0"
+
+_ARABIC_SCRIPT = re.compile(r"[\u0600-\u06FF]")
 
 
 def _get_client() -> AsyncOpenAI:
@@ -26,14 +49,48 @@ def _get_client() -> AsyncOpenAI:
     return _client
 
 
+def _load_prompt(name: str) -> tuple[str, str]:
+    """Return a tutor prompt's text and version (hash of its contents).
+
+    Served from `harness.prompts`, so edits are picked up (and change the
+    version, invalidating cached display text) without a restart.
+    """
+    prompt = prompts.get(f"tutor/prompts/{name}")
+    return prompt.text, prompt.version
+
+
 def _load_scaffolding_prompt() -> str:
-    path = PROMPTS_DIR / "scaffolding.md"
-    return path.read_text(encoding="utf-8")
+    return _load_prompt("scaffolding.md")[0]
 
 
 def _load_transliteration_prompt() -> str:
-    path = PROMPTS_DIR / "transliteration.md"
-    return path.read_text(encoding="utf-8")
+    return _load_prompt("transliteration.md")[0]
+
+
+def _messages(instructions: str, request: str) -> list[dict]:
+    """Static instructions first and the per-call input last, so requests share a cacheable prefix."""
+    return [
+        {"role": "system", "content": instructions},
+        {"role": "user", "content": request},
+    ]
+
+
+def _cached_tokens(usage) -> int:
+    """Prompt tokens the provider served from its prefix cache (0 when not reported)."""
+    cached = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+    return cached if isinstance(cached, int) else 0
+
+
+def _record_usage(call: str, response, started: float) -> None:
+    """Publish a completion's prompt and cached token counts (see `metrics_service.record_model_usage`)."""
+    usage = getattr(response, "usage", None)
+    input_tokens = getattr(usage, "prompt_tokens", None)
+    if not isinstance(input_tokens, int):
+        return
+    metrics_service.record_model_usage(
+        call, input_tokens, _cached_tokens(usage), (time.monotonic() - started) * 1000
+    )
+
 
 class ScaffoldedResult:
     """Result of scaffolding: the display text plus highlighted Arabizi words."""
@@ -62,30 +119,30 @@ class ScaffoldedResult:
 def _compute_highlight_offsets(text: str, highlights: list[dict]) -> list[dict]:
     """Find each highlight word in the text and fill in start/end offsets.
 
-    Uses word-boundary matching (case-insensitive) so that e.g. "an" does
+    Uses whole-word matching (case-insensitive, Arabizi digit spellings
+    folded — see `harness.highlights.VocabMatcher`) so that e.g. "an" does
     not match inside "marhaban".  If a word appears multiple times, each
-    occurrence gets its own entry.  Highlights whose word cannot be found
-    at a word boundary are dropped.
+    occurrence gets its own entry; where two words overlap the longer one
+    wins.  Highlights whose word cannot be found are dropped.
     """
-    result: list[dict] = []
+    by_word: dict[str, dict] = {}
     for h in highlights:
         word = h.get("word", "")
-        if not word:
-            continue
-        # Match the word at word boundaries, case-insensitive
-        pattern = re.compile(r'\b' + re.escape(word) + r'\b', re.IGNORECASE)
-        for m in pattern.finditer(text):
-            entry = {
-                "word": word,
-                "meaning": h.get("meaning", ""),
-                "start": m.start(),
-                "end": m.end(),
-            }
-            if h.get("canonical"):
-                entry["canonical"] = h["canonical"]
-            result.append(entry)
-    # Sort by position in text
-    result.sort(key=lambda h: h["start"])
+        if word:
+            by_word.setdefault(word, h)
+
+    result: list[dict] = []
+    for start, end, word in get_matcher(frozenset(by_word)).finditer(text):
+        h = by_word[word]
+        entry = {
+            "word": word,
+            "meaning": h.get("meaning", ""),
+            "start": start,
+            "end": end,
+        }
+        if h.get("canonical"):
+            entry["canonical"] = h["canonical"]
+        result.append(entry)
     return result
 
 
@@ -102,22 +159,22 @@ def _parse_scaffolding_json(raw: str, fallback_text: str) -> ScaffoldedResult:
         return ScaffoldedResult(text=raw.strip() if raw else fallback_text)
 
 
-LEARNED_WORDS_WITH_WORDS = """The learner has previously learned the following Arabic words (given as base/stem forms). \
-Keep these words — and any inflected variants (plurals, conjugations, dual forms, etc.) — \
-in the translated sentence as Arabizi (romanized Arabic) instead of translating them to English.
+# The per-call half of the scaffolding prompt; the instructions are in scaffolding.md
+SCAFFOLDING_REQUEST = """## Conversation Context
+{user_context_instruction}
 
-Use common Arabizi conventions (e.g., 3 for ع, 7 for ح, 2 for ء/ق).
+## Learned Words
+{learned_words_instruction}
 
-For example, if the learner knows "sayaara" (سيارة), then "السيارات" should appear as \
-"sayaaraat" rather than "cars".
+## Arabic text to scaffold
+{arabic_text}"""
 
-Learned words:
-{words}"""
+LEARNED_WORDS_WITH_WORDS = "Learned words: {words}"
 
 LEARNED_WORDS_EMPTY = "No learned words yet. Translate the ENTIRE text to English, except for the one new \
 Arabizi word described above."
 
-USER_CONTEXT_WITH_MESSAGE = "The user's most recent message was: \"{message}\"\nUse this to determine their intent — are they asking to learn a specific phrase/sentence, or just having a general conversation?"
+USER_CONTEXT_WITH_MESSAGE = "The user's most recent message was: \"{message}\""
 
 USER_CONTEXT_EMPTY = "No conversation context available. Assume general conversation mode (translate most Arabic, keep only learned words + one new word as Arabizi)."
 
@@ -147,6 +204,31 @@ class PhaseResult:
         return result
 
 
+def _format_scaffolding_request(
+    arabic_text: str,
+    learned_words: list[str] | None,
+    user_message: str | None,
+) -> str:
+    # Build learned words instruction
+    if learned_words:
+        words_str = ", ".join(learned_words)
+        learned_words_instruction = LEARNED_WORDS_WITH_WORDS.format(words=words_str)
+    else:
+        learned_words_instruction = LEARNED_WORDS_EMPTY
+
+    # Build user context instruction
+    if user_message:
+        user_context_instruction = USER_CONTEXT_WITH_MESSAGE.format(message=user_message)
+    else:
+        user_context_instruction = USER_CONTEXT_EMPTY
+
+    return SCAFFOLDING_REQUEST.format(
+        arabic_text=arabic_text,
+        learned_words_instruction=learned_words_instruction,
+        user_context_instruction=user_context_instruction,
+    )
+
+
 async def generate_scaffolded_text(
     arabic_text: str,
     learned_words: list[str] | None = None,
@@ -174,38 +256,33 @@ async def generate_scaffolded_text(
     Returns:
         ScaffoldedResult with text and highlights array.
     """
-    # Build learned words instruction
-    if learned_words:
-        words_str = ", ".join(learned_words)
-        learned_words_instruction = LEARNED_WORDS_WITH_WORDS.format(words=words_str)
-    else:
-        learned_words_instruction = LEARNED_WORDS_EMPTY
-
-    # Build user context instruction
-    if user_message:
-        user_context_instruction = USER_CONTEXT_WITH_MESSAGE.format(message=user_message)
-    else:
-        user_context_instruction = USER_CONTEXT_EMPTY
-
-    prompt = _load_scaffolding_prompt().format(
-        arabic_text=arabic_text,
-        learned_words_instruction=learned_words_instruction,
-        user_context_instruction=user_context_instruction,
+    template, version = _load_prompt("scaffolding.md")
+    cache_key = display_cache.make_key(
+        "scaffold", arabic_text, version, learned_words=learned_words, user_message=user_message
     )
+    cached = await display_cache.get(cache_key)
+    if cached is not None:
+        return ScaffoldedResult(text=cached["text"], highlights=cached["highlights"])
+
+    request = _format_scaffolding_request(arabic_text, learned_words, user_message)
 
     try:
         client = _get_client()
+        started = time.monotonic()
         response = await client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
+            messages=_messages(template, request),
             temperature=0.3,
             max_tokens=500,
             response_format={"type": "json_object"},
         )
+        _record_usage("scaffold", response, started)
 
         raw = response.choices[0].message.content
         if raw:
-            return _parse_scaffolding_json(raw, arabic_text)
+            result = _parse_scaffolding_json(raw, arabic_text)
+            display_cache.put(cache_key, "scaffold", result.to_dict())
+            return result
 
         logger.warning("Empty response from scaffolding LLM call, falling back to original text")
         return ScaffoldedResult(text=arabic_text)
@@ -217,7 +294,7 @@ async def generate_scaffolded_text(
 
 
 
-async def generate_transliterated_text(text: str) -> str:
+async def generate_transliterated_text(text: str, dialect: str | None = None) -> str:
     """
     Transliterate Arabic script to Arabizi (romanized Arabic).
 
@@ -225,31 +302,162 @@ async def generate_transliterated_text(text: str) -> str:
     Arabic words using the English alphabet. Any English words in the input
     are preserved as-is.
 
+    Vowelled text is handled locally by `harness.arabizi`; only the words the
+    rules are unsure of (missing harakaat) are sent to the model, and if its
+    answer doesn't line up word for word the rule output is kept.
+
     Args:
         text: Text that may contain Arabic script.
+        dialect: Language tag (e.g. "ar-EG") for dialect-specific letters.
 
     Returns:
         The same text with all Arabic script replaced by Arabizi.
     """
+    rules = arabizi.transliterate(text, dialect=dialect)
+    if rules.confident:
+        metrics_service.incr("transliteration.rules_only")
+        return rules.text
+
+    metrics_service.incr("transliteration.model_fallback")
+    metrics_service.incr("transliteration.model_words", len(rules.low_confidence))
+    words = text.split()
+    unsure = " ".join(words[i] for i in rules.low_confidence)
+    romanized = await _transliterate_with_model(unsure, dialect)
+    if romanized is None or len(romanized.split()) != len(rules.low_confidence):
+        return rules.text
+    return rules.with_words(dict(zip(rules.low_confidence, romanized.split())))
+
+
+async def _transliterate_with_model(text: str, dialect: str | None = None) -> str | None:
+    """Transliterate with the LLM (through the display cache); None on failure."""
+    template, version = _load_prompt("transliteration.md")
+    cache_key = display_cache.make_key("transliterate", text, version, dialect=dialect)
+    cached = await display_cache.get(cache_key)
+    if cached is not None:
+        return cached["text"]
+
     try:
         client = _get_client()
+        started = time.monotonic()
         response = await client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": _load_transliteration_prompt().format(text=text)}],
+            messages=_messages(template, text),
             temperature=0.2,
             max_tokens=500,
         )
+        _record_usage("transliterate", response, started)
 
         result = response.choices[0].message.content
         if result:
+            display_cache.put(cache_key, "transliterate", {"text": result.strip()})
             return result.strip()
 
-        logger.warning("Empty response from transliteration LLM call, falling back to original text")
-        return text
+        logger.warning("Empty response from transliteration LLM call, falling back to rule output")
+        return None
 
     except Exception as e:
         logger.error(f"Failed to generate transliterated text: {e}")
-        return text
+        return None
+
+
+class DisplayVariants:
+    """Both learner-facing renderings of one canonical Arabic message."""
+
+    def __init__(self, scaffolded: ScaffoldedResult, transliterated: str):
+        self.scaffolded = scaffolded
+        self.transliterated = transliterated
+
+
+async def generate_display_variants(
+    arabic_text: str,
+    learned_words: list[str] | None = None,
+    user_message: str | None = None,
+    dialect: str | None = None,
+) -> DisplayVariants:
+    """
+    Generate scaffolded text, highlights and transliteration for one message.
+
+    Costs at most one model call: if the rules can transliterate the whole
+    text, only scaffolding goes to the model; otherwise both come back from
+    a single structured-output call. With `COMBINED_DISPLAY_PROMPT=0` the
+    two are generated by concurrent calls instead.
+
+    Args:
+        arabic_text: The full Arabic text with harakaat.
+        learned_words: See generate_scaffolded_text.
+        user_message: See generate_scaffolded_text.
+        dialect: Language tag (e.g. "ar-EG") for dialect-specific letters.
+
+    Returns:
+        DisplayVariants with the scaffolded result and the transliteration.
+    """
+    rules = arabizi.transliterate(arabic_text, dialect=dialect)
+    if rules.confident:
+        metrics_service.incr("display_variants.rules_transliteration")
+        scaffolded = await generate_scaffolded_text(
+            arabic_text, learned_words=learned_words, user_message=user_message
+        )
+        return DisplayVariants(scaffolded, rules.text)
+
+    if not COMBINED_DISPLAY_PROMPT:
+        metrics_service.incr("display_variants.concurrent")
+        scaffolded, transliterated = await asyncio.gather(
+            generate_scaffolded_text(arabic_text, learned_words=learned_words, user_message=user_message),
+            generate_transliterated_text(arabic_text, dialect=dialect),
+        )
+        return DisplayVariants(scaffolded, transliterated)
+
+    metrics_service.incr("display_variants.combined")
+    template, version = _load_prompt("scaffolding.md")
+    addendum, addendum_version = _load_prompt("display_variants.md")
+    cache_key = display_cache.make_key(
+        "variants", arabic_text, f"{version}+{addendum_version}",
+        learned_words=learned_words, user_message=user_message, dialect=dialect,
+    )
+    cached = await display_cache.get(cache_key)
+    if cached is not None:
+        return DisplayVariants(
+            ScaffoldedResult(text=cached["text"], highlights=cached["highlights"]),
+            cached["transliteration"],
+        )
+
+    # The scaffolding instructions lead, so this shares its cached prefix with plain scaffolding calls
+    instructions = template + "\n\n" + addendum
+    request = _format_scaffolding_request(arabic_text, learned_words, user_message)
+
+    try:
+        client = _get_client()
+        started = time.monotonic()
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=_messages(instructions, request),
+            temperature=0.3,
+            max_tokens=800,
+            response_format={"type": "json_object"},
+        )
+        _record_usage("display_variants", response, started)
+        raw = response.choices[0].message.content
+    except Exception as e:
+        logger.error(f"Failed to generate display variants: {e}")
+        return DisplayVariants(ScaffoldedResult(text=arabic_text), rules.text)
+
+    if not raw:
+        logger.warning("Empty response from display variants LLM call, falling back to original text")
+        return DisplayVariants(ScaffoldedResult(text=arabic_text), rules.text)
+
+    scaffolded = _parse_scaffolding_json(raw, arabic_text)
+    try:
+        transliterated = (json.loads(raw).get("transliteration") or "").strip()
+    except (json.JSONDecodeError, AttributeError):
+        transliterated = ""
+    if len(transliterated.split()) != len(arabic_text.split()) or _ARABIC_SCRIPT.search(transliterated):
+        # Word-by-word sync needs matching word counts; keep the rule output
+        logger.warning("Combined transliteration doesn't line up with the Arabic, using rule output")
+        metrics_service.incr("display_variants.transliteration_rejected")
+        return DisplayVariants(scaffolded, rules.text)
+
+    display_cache.put(cache_key, "variants", {**scaffolded.to_dict(), "transliteration": transliterated})
+    return DisplayVariants(scaffolded, transliterated)
 
 
 def _extract_phase_result(response, fallback_text: str, parse_json: bool = False) -> PhaseResult:
@@ -272,6 +480,7 @@ def _extract_phase_result(response, fallback_text: str, parse_json: bool = False
         model=response.model,
         usage={
             "input_tokens": usage.prompt_tokens if usage else 0,
+            "cached_tokens": _cached_tokens(usage),
             "output_tokens": usage.completion_tokens if usage else 0,
             "total_tokens": usage.total_tokens if usage else 0,
         },
@@ -286,28 +495,15 @@ async def generate_scaffolded_text_with_metadata(
     user_message: str | None = None,
 ) -> PhaseResult:
     """Like generate_scaffolded_text but returns full PhaseResult with LLM metadata."""
-    if learned_words:
-        words_str = ", ".join(learned_words)
-        learned_words_instruction = LEARNED_WORDS_WITH_WORDS.format(words=words_str)
-    else:
-        learned_words_instruction = LEARNED_WORDS_EMPTY
-
-    if user_message:
-        user_context_instruction = USER_CONTEXT_WITH_MESSAGE.format(message=user_message)
-    else:
-        user_context_instruction = USER_CONTEXT_EMPTY
-
-    prompt = _load_scaffolding_prompt().format(
-        arabic_text=arabic_text,
-        learned_words_instruction=learned_words_instruction,
-        user_context_instruction=user_context_instruction,
-    )
+    instructions = _load_scaffolding_prompt()
+    request = _format_scaffolding_request(arabic_text, learned_words, user_message)
+    prompt = f"{instructions}\n\n{request}"
 
     try:
         client = _get_client()
         response = await client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
+            messages=_messages(instructions, request),
             temperature=0.3,
             max_tokens=500,
             response_format={"type": "json_object"},
@@ -322,12 +518,13 @@ async def generate_scaffolded_text_with_metadata(
 
 async def generate_transliterated_text_with_metadata(text: str) -> PhaseResult:
     """Like generate_transliterated_text but returns full PhaseResult with LLM metadata."""
-    prompt = _load_transliteration_prompt().format(text=text)
+    instructions = _load_transliteration_prompt()
+    prompt = f"{instructions}\n\n{text}"
     try:
         client = _get_client()
         response = await client.chat.completions.create(
             model="gpt-4o-mini",
-            messages=[{"role": "user", "content": prompt}],
+            messages=_messages(instructions, text),
             temperature=0.2,
             max_tokens=500,
         )
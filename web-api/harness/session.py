@@ -1,72 +1,151 @@
 """Supabase-backed session (conversation history) for OpenAI Agents SDK."""
 
+import asyncio
+import sys
 from typing import TYPE_CHECKING, Any, List, Optional, cast
 from agents.memory.session import SessionABC
 from agents.items import TResponseInputItem
-from supabase import Client
-from supabase_auth import User
+from supabase import AsyncClient, Client
+
+from services.session_owner_service import remember_session_owner
+from services.supabase_client import get_supabase_async_admin_client, get_supabase_async_user_client
+from services.token_service import InvalidTokenError, TokenUser, verify_token
 
 if TYPE_CHECKING:
     from services.transcript_service import TranscriptMessage, TranscriptMessageInput
 
+# Append-only item log (one row per conversation item, ordered by `seq`)
+ITEMS_TABLE = "agent_session_items"
+APPEND_ITEMS_RPC = "append_agent_session_items"
+POP_ITEM_RPC = "pop_agent_session_item"
+
+# Write-behind: appended items are flushed at most this long after being added,
+# or immediately once this many are pending.
+FLUSH_INTERVAL_SECONDS = 0.5
+FLUSH_MAX_PENDING = 50
+
+
+def _log(msg: str) -> None:
+    print(f"[AgentSession] {msg}", flush=True, file=sys.stderr)
+
 
 class AgentSession(SessionABC):
     """
     Agent Session implementation that stores conversation history in Supabase.
 
     This class implements the SessionABC interface from the OpenAI Agents SDK,
-    representing an "Agent Session". It persists session items in the
-    'agent_sessions' table in Supabase.
+    representing an "Agent Session". The session row lives in
+    'agent_sessions'; its items are kept in the append-only
+    'agent_session_items' log, one row per item.
 
     An AgentSession is created by a User (authenticated via a UserSession)
     and is associated with that user.
     """
 
-    def __init__(self, session_id: str, supabase_client: Client, user_access_token: Optional[str] = None):
+    def __init__(
+        self,
+        session_id: str,
+        supabase_client: Client,
+        user_access_token: Optional[str] = None,
+        *,
+        db: Optional[AsyncClient] = None,
+        cache_history: bool = True,
+    ):
         """
-        Initialize a Supabase-backed Agent Session.
+        Initialize a Supabase-backed Agent Session. Makes no round trip;
+        await `ensure_exists()` to check (and create) the `agent_sessions` row.
+
+        History is cached in memory after the first read. Appends update the
+        cache immediately and are written to Supabase in the background
+        (write-behind), so `Runner.run` never waits on a history round trip
+        after the first turn. Call `flush()` before dropping the session.
 
         Args:
             session_id: Unique identifier for this agent session
             supabase_client: Authenticated Supabase client (representing the UserSession)
             user_access_token: Optional user access token for getting user info
+            db: Async client for history reads/writes. Defaults to a pooled
+                client for `user_access_token`, or the admin client.
+            cache_history: Cache history and write appends behind. Pass False
+                when other workers may append to the same session: every read
+                then goes to Supabase and appends are written before returning.
         """
         self.session_id = session_id
         self.supabase = supabase_client
         self.user_access_token = user_access_token
-        self._ensure_session_exists()
+        self._db = db
+        self.cache_history = cache_history
+
+        # Full history once loaded (None until the first read)
+        self._items: Optional[List[dict[str, Any]]] = None
+        # Appended items not yet written; always the tail of `_items`
+        self._pending: List[dict[str, Any]] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+        # Rolling summary of the first `_summary_items` items (see harness.history);
+        # `_summary_items` is None until loaded
+        self._summary: Optional[str] = None
+        self._summary_items: Optional[int] = None
+
+    async def ensure_exists(self) -> None:
+        """
+        Ensure an agent session record exists in the database for the current user.
 
-    def _ensure_session_exists(self) -> None:
-        """Ensure an agent session record exists in the database for the current user."""
+        Raises:
+            ValueError: If the row doesn't exist and can't be created (no or
+                invalid user access token)
+        """
         # Check if agent session exists
-        response = self.supabase.table("agent_sessions").select("session_id, user_id").eq("session_id", self.session_id).execute()
+        response = await (
+            self.db.table("agent_sessions")
+            .select("session_id, user_id")
+            .eq("session_id", self.session_id)
+            .execute()
+        )
 
         if not response.data:
             # Session doesn't exist - need user_access_token to create it
             if not self.user_access_token:
                 raise ValueError("User access token required to create new session")
 
-            user_response = self.supabase.auth.get_user(self.user_access_token)
-            if user_response is None:
+            try:
+                self.user: TokenUser = await verify_token(self.user_access_token)
+            except InvalidTokenError:
                 raise ValueError("Invalid user access token provided.")
 
-            self.user: User = user_response.user
-
             # Create new agent session if it doesn't exist
-            self.supabase.table("agent_sessions").insert({
+            await self.db.table("agent_sessions").insert({
                 "user_id": self.user.id,
                 "session_id": self.session_id,
                 "items": []
             }).execute()
+            remember_session_owner(self.session_id, self.user.id)
         else:
+            remember_session_owner(self.session_id, cast(dict[str, Any], response.data[0])["user_id"])
             # Session exists - try to get user info if we have a token
             if self.user_access_token:
-                user_response = self.supabase.auth.get_user(self.user_access_token)
-                if user_response:
-                    self.user: User = user_response.user
+                try:
+                    self.user = await verify_token(self.user_access_token)
+                except InvalidTokenError:
+                    pass
             # If we don't have a token or it fails, we can still use the session
             # The user attribute just won't be set
 
+    @property
+    def db(self) -> AsyncClient:
+        """Async client used for every history read/write on the event loop."""
+        if self._db is None:
+            if self.user_access_token:
+                self._db = get_supabase_async_user_client(self.user_access_token)
+            else:
+                self._db = get_supabase_async_admin_client()
+        return self._db
+
+    @db.setter
+    def db(self, client: AsyncClient) -> None:
+        self._db = client
+
     def _serialize_item(self, item: TResponseInputItem) -> dict:
         """
         Serialize an item to a JSON-compatible dict.
@@ -95,6 +174,48 @@ class AgentSession(SessionABC):
         # and rely on the SDK's flexibility.
         return data  # type: ignore
 
+    async def _load_items(self, limit: Optional[int] = None) -> List[dict[str, Any]]:
+        """Load the full history once; later reads are served from memory."""
+        if self._items is not None and self.cache_history:
+            return self._items
+        # An in-flight flush has taken its batch off `_pending` but may not
+        # have stored it yet; reading then would lose (or double) those items
+        async with self._flush_lock:
+            return await self._read_items(limit)
+
+    async def _read_items(self, limit: Optional[int] = None) -> List[dict[str, Any]]:
+        """`_load_items` for callers already holding `_flush_lock`."""
+        if self._items is not None and self.cache_history:
+            return self._items
+        # Items appended before the first read are not in the DB yet
+        pending = list(self._pending)
+        if limit is not None and limit > 0:
+            # Only the tail is wanted: read just that, and don't cache a partial history
+            wanted = limit - len(pending)
+            if wanted <= 0:
+                return pending[-limit:]
+            response = await (
+                self.db.table(ITEMS_TABLE)
+                .select("item")
+                .eq("session_id", self.session_id)
+                .order("seq", desc=True)
+                .limit(wanted)
+                .execute()
+            )
+            stored = [cast(dict[str, Any], row)["item"] for row in reversed(response.data or [])]
+            return stored + pending
+
+        response = await (
+            self.db.table(ITEMS_TABLE)
+            .select("item")
+            .eq("session_id", self.session_id)
+            .order("seq")
+            .execute()
+        )
+        stored = [cast(dict[str, Any], row)["item"] for row in (response.data or [])]
+        self._items = stored + pending
+        return self._items
+
     async def get_items(self, limit: Optional[int] = None) -> List[TResponseInputItem]:
         """
         Retrieve conversation history for this session.
@@ -103,48 +224,38 @@ class AgentSession(SessionABC):
             limit: Optional maximum number of items to return (most recent)
 
         Returns:
-            List of conversation items
+            List of conversation items, oldest first
         """
-        response = self.supabase.table("agent_sessions").select("items").eq("session_id", self.session_id).execute()
-
-        if not response.data:
-            return []
-
-        # Type assertion for Supabase response data
-        record = cast(dict[str, Any], response.data[0])
-        items_data = cast(List[dict[str, Any]], record["items"])
-        items = [self._deserialize_item(item) for item in items_data]
+        items = await self._load_items(limit)
 
         if limit is not None and limit > 0:
             # Return the most recent items
-            return items[-limit:]
+            items = items[-limit:]
 
-        return items
+        return [self._deserialize_item(item) for item in items]
 
     async def add_items(self, items: List[TResponseInputItem]) -> None:
         """
         Store new items for this session.
 
+        The in-memory view is updated immediately; the append is written to
+        the `agent_session_items` log by a background flush.
+
         Args:
             items: List of conversation items to add
         """
-        # Get current items
-        response = self.supabase.table("agent_sessions").select("items").eq("session_id", self.session_id).execute()
+        if not items:
+            return
 
-        if not response.data:
-            current_items: List[dict[str, Any]] = []
-        else:
-            record = cast(dict[str, Any], response.data[0])
-            current_items = cast(List[dict[str, Any]], record["items"])
-
-        # Serialize and append new items
         serialized_items = [self._serialize_item(item) for item in items]
-        updated_items = current_items + serialized_items
+        if self._items is not None:
+            self._items.extend(serialized_items)
+        self._pending.extend(serialized_items)
 
-        # Update the session
-        self.supabase.table("agent_sessions").update({
-            "items": updated_items
-        }).eq("session_id", self.session_id).execute()
+        if len(self._pending) >= FLUSH_MAX_PENDING or not self.cache_history:
+            await self.flush()
+        else:
+            self._schedule_flush()
 
     async def pop_item(self) -> Optional[TResponseInputItem]:
         """
@@ -153,33 +264,109 @@ class AgentSession(SessionABC):
         Returns:
             The most recent item, or None if session is empty
         """
-        # Get current items
-        response = self.supabase.table("agent_sessions").select("items").eq("session_id", self.session_id).execute()
-
-        if not response.data:
-            return None
-
-        record = cast(dict[str, Any], response.data[0])
-        current_items = cast(List[dict[str, Any]], record["items"])
-
-        if not current_items:
-            return None
-
-        # Pop the last item
-        popped_item_data = current_items.pop()
-
-        # Update the session
-        self.supabase.table("agent_sessions").update({
-            "items": current_items
-        }).eq("session_id", self.session_id).execute()
+        # Wait out any in-flight flush so the tail is either pending or stored
+        async with self._flush_lock:
+            items = await self._read_items()
+            if not items:
+                return None
+
+            popped_item_data = items.pop()
+            if self._pending:
+                # Never written — dropping it locally is enough
+                self._pending.pop()
+            else:
+                await self.db.rpc(POP_ITEM_RPC, {"p_session_id": self.session_id}).execute()
 
         return self._deserialize_item(popped_item_data)
 
     async def clear_session(self) -> None:
         """Clear all items for this session."""
-        self.supabase.table("agent_sessions").update({
-            "items": []
-        }).eq("session_id", self.session_id).execute()
+        async with self._flush_lock:
+            self._pending = []
+            self._items = []
+            await self.db.table(ITEMS_TABLE).delete().eq("session_id", self.session_id).execute()
+        if self._summary_items != 0:
+            await self.set_history_summary(None, 0)
+
+    async def get_history_summary(self) -> tuple[Optional[str], int]:
+        """
+        Return the rolling history summary and how many leading items it covers.
+
+        Loaded from the `agent_sessions` row once, then served from memory.
+        """
+        if self._summary_items is None or not self.cache_history:
+            response = await (
+                self.db.table("agent_sessions")
+                .select("history_summary, history_summary_items")
+                .eq("session_id", self.session_id)
+                .execute()
+            )
+            row = cast(dict[str, Any], response.data[0]) if response.data else {}
+            self._summary = row.get("history_summary")
+            self._summary_items = row.get("history_summary_items") or 0
+        return self._summary, self._summary_items
+
+    async def set_history_summary(self, summary: Optional[str], covered_items: int) -> None:
+        """
+        Store the rolling history summary covering the first `covered_items` items.
+
+        Args:
+            summary: Summary text, or None to reset
+            covered_items: Number of leading history items the summary replaces
+        """
+        self._summary = summary
+        self._summary_items = covered_items
+        await (
+            self.db.table("agent_sessions")
+            .update({"history_summary": summary, "history_summary_items": covered_items})
+            .eq("session_id", self.session_id)
+            .execute()
+        )
+
+    def schedule_flush(self) -> None:
+        """Make sure pending items are written soon, even if nothing else is appended."""
+        if self._pending:
+            self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            await self.flush()
+        except Exception as e:
+            _log(f"Background flush failed for {self.session_id}: {e}")
+        finally:
+            # Pick up items appended mid-flush, or retry a failed batch
+            self._flush_task = None
+            if self._pending:
+                self._schedule_flush()
+
+    async def flush(self) -> None:
+        """Write all pending items to the item log. Safe to call at any time."""
+        async with self._flush_lock:
+            if not self._pending:
+                return
+            batch = self._pending
+            self._pending = []
+            try:
+                await self.db.rpc(APPEND_ITEMS_RPC, {
+                    "p_session_id": self.session_id,
+                    "p_items": batch,
+                }).execute()
+            except Exception:
+                # Keep ordering: failed batch goes back in front of newer appends
+                self._pending = batch + self._pending
+                raise
+
+    def discard_pending(self) -> None:
+        """Drop unflushed items and cancel the scheduled flush (session deleted)."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        self._pending = []
 
     async def add_message(self, message: "TranscriptMessageInput") -> "TranscriptMessage":
         """Persist a transcript message draft. Frontend picks it up via Realtime."""
@@ -1,12 +1,21 @@
 """Session lifecycle management — create, get, delete, list sessions."""
 
+import sys
 import uuid
 from typing import Dict, Optional
 
 from harness.session import AgentSession
-from harness.context import create_context, delete_context
-from services.supabase_client import get_supabase_user_client, get_supabase_admin_client
-from services import posthog_service, lesson_service
+from harness.context import create_context, delete_context, evict_context
+from services.supabase_client import (
+    get_supabase_admin_client,
+    get_supabase_async_admin_client,
+    get_supabase_async_user_client,
+    get_supabase_user_client,
+)
+from services import posthog_service, lesson_service, state_store
+from services.registry import BoundedRegistry
+from services.session_owner_service import forget_session_owner
+from services.token_service import InvalidTokenError, TokenUser, verify_token
 
 
 class AuthenticationError(Exception):
@@ -14,11 +23,30 @@ class AuthenticationError(Exception):
     pass
 
 
+# Sessions idle this long (no turn, no lookup) are dropped from memory; they
+# reload from Supabase on the next `get_session`. History lives in Supabase, so
+# any worker can serve any session; with a shared state store, sessions skip
+# the history cache so a turn on one worker sees appends made on another.
+SESSION_IDLE_TTL_SECONDS = 2 * 60 * 60
+MAX_SESSIONS = 2000
+
+
+def _on_session_evicted(session_id: str, session: AgentSession) -> None:
+    print(f"[SessionManager] Evicting idle session {session_id}", flush=True, file=sys.stderr)
+    session.schedule_flush()
+    evict_context(session_id)
+
+
 # In-memory session storage indexed by session_id
-_sessions: Dict[str, AgentSession] = {}
+_sessions: BoundedRegistry[str, AgentSession] = BoundedRegistry(
+    "sessions",
+    max_size=MAX_SESSIONS,
+    idle_ttl=SESSION_IDLE_TTL_SECONDS,
+    on_evict=_on_session_evicted,
+)
 
 
-def create_session(user_access_token: str, lesson_id: Optional[str] = None) -> str:
+async def create_session(user_access_token: str, lesson_id: Optional[str] = None) -> str:
     """
     Create a new agent session and store it.
     Also creates an associated context for the session.
@@ -39,23 +67,30 @@ def create_session(user_access_token: str, lesson_id: Optional[str] = None) -> s
     supabase_client = get_supabase_user_client(user_access_token)
 
     # Validate token before creating session
-    _validate_token(supabase_client, user_access_token)
+    user = await _validate_token(user_access_token)
 
-    session = AgentSession(session_id, supabase_client, user_access_token)
+    session = AgentSession(
+        session_id,
+        supabase_client,
+        user_access_token,
+        cache_history=not state_store.is_shared(),
+    )
+    try:
+        await session.ensure_exists()
+    except ValueError as e:
+        raise AuthenticationError(str(e))
 
     # Store session indexed by session_id
     _sessions[session_id] = session
 
     # Resolve actual user_id and profile data for context
+    actual_user_id = user.id
     try:
-        user_response = supabase_client.auth.get_user(user_access_token)
-        actual_user_id = user_response.user.id if user_response and user_response.user else session_id
-        profile = get_supabase_admin_client().table("profiles").select("name, motivation").eq("id", actual_user_id).maybe_single().execute()
+        profile = await get_supabase_async_admin_client().table("profiles").select("name, motivation").eq("id", actual_user_id).maybe_single().execute()
         profile_data = profile.data or {}
         profile_name = profile_data.get("name") or None
         profile_motivation = profile_data.get("motivation") or None
     except Exception:
-        actual_user_id = session_id
         profile_name = None
         profile_motivation = None
 
@@ -64,7 +99,7 @@ def create_session(user_access_token: str, lesson_id: Optional[str] = None) -> s
     lesson_objective = None
     if lesson_id:
         try:
-            lesson_data = lesson_service.get_lesson(lesson_id)
+            lesson_data = await lesson_service.get_lesson(lesson_id)
             if lesson_data:
                 lesson_title = lesson_data.get("title")
                 lesson_objective = lesson_data.get("objective")
@@ -83,9 +118,8 @@ def create_session(user_access_token: str, lesson_id: Optional[str] = None) -> s
     )
 
     # Track session creation
-    user = getattr(session, "user", None)
     posthog_service.capture(
-        distinct_id=user.id if user else session_id,
+        distinct_id=user.id,
         event="session_started",
         properties={"session_id": session_id},
     )
@@ -93,7 +127,7 @@ def create_session(user_access_token: str, lesson_id: Optional[str] = None) -> s
     return session_id
 
 
-def get_session(session_id: str, user_access_token: Optional[str] = None) -> Optional[AgentSession]:
+async def get_session(session_id: str, user_access_token: Optional[str] = None) -> Optional[AgentSession]:
     """
     Retrieve an agent session by its ID.
 
@@ -109,17 +143,26 @@ def get_session(session_id: str, user_access_token: Optional[str] = None) -> Opt
     if session_id in _sessions:
         if user_access_token:
             _sessions[session_id].supabase = get_supabase_user_client(user_access_token)
+            _sessions[session_id].db = get_supabase_async_user_client(user_access_token)
         return _sessions[session_id]
 
     # Otherwise, try to load from Supabase
     try:
         if user_access_token:
             supabase_client = get_supabase_user_client(user_access_token)
+            db = get_supabase_async_user_client(user_access_token)
         else:
             # Use admin client for service-to-service calls (webhooks, etc.)
             supabase_client = get_supabase_admin_client()
-
-        session = AgentSession(session_id, supabase_client)
+            db = get_supabase_async_admin_client()
+
+        session = AgentSession(
+            session_id,
+            supabase_client,
+            db=db,
+            cache_history=not state_store.is_shared(),
+        )
+        await session.ensure_exists()
         _sessions[session_id] = session
         return session
     except Exception:
@@ -136,6 +179,7 @@ def upgrade_session_to_admin(session_id: str) -> None:
     """
     if session_id in _sessions:
         _sessions[session_id].supabase = get_supabase_admin_client()
+        _sessions[session_id].db = get_supabase_async_admin_client()
 
 
 def delete_session(session_id: str, user_access_token: Optional[str] = None) -> bool:
@@ -151,9 +195,9 @@ def delete_session(session_id: str, user_access_token: Optional[str] = None) ->
     Returns:
         bool: True if session was deleted, False if not found
     """
-    # Remove from in-memory cache
+    # Remove from in-memory cache, dropping history that was never written
     if session_id in _sessions:
-        del _sessions[session_id]
+        _sessions.pop(session_id).discard_pending()
 
     # Delete from Supabase
     try:
@@ -169,9 +213,31 @@ def delete_session(session_id: str, user_access_token: Optional[str] = None) ->
 
     # Delete the associated context
     delete_context(session_id)
+    forget_session_owner(session_id)
     return True
 
 
+async def flush_session(session_id: str) -> None:
+    """
+    Write any pending (write-behind) history for a session to Supabase.
+
+    Called when a client disconnects so nothing is left only in memory.
+    """
+    session = _sessions.get(session_id)
+    if session is None:
+        return
+    try:
+        await session.flush()
+    except Exception as e:
+        print(f"[SessionManager] Failed to flush session {session_id}: {e}")
+
+
+async def flush_all_sessions() -> None:
+    """Flush pending history for every cached session. Call on shutdown."""
+    for session_id in list(_sessions):
+        await flush_session(session_id)
+
+
 def get_all_sessions() -> Dict[str, AgentSession]:
     """
     Retrieve all sessions.
@@ -179,21 +245,18 @@ def get_all_sessions() -> Dict[str, AgentSession]:
     Returns:
         Dict[str, AgentSession]: Dictionary of all session objects indexed by session_id
     """
-    return _sessions.copy()
+    return _sessions.values_snapshot()
 
 
-def _validate_token(supabase_client, user_access_token: str):
+async def _validate_token(user_access_token: str) -> TokenUser:
     """Validate user token and return user object. Raises AuthenticationError on failure."""
     try:
-        user_response = supabase_client.auth.get_user(user_access_token)
-    except Exception as e:
-        raise AuthenticationError(f"Invalid or expired token: {e}")
-    if not user_response or not user_response.user:
-        raise AuthenticationError("Invalid or expired token")
-    return user_response.user
+        return await verify_token(user_access_token)
+    except InvalidTokenError as e:
+        raise AuthenticationError(str(e))
 
 
-def list_user_sessions(user_access_token: str) -> list[dict]:
+async def list_user_sessions(user_access_token: str) -> list[dict]:
     """
     List all sessions for a specific user from the database.
 
@@ -206,12 +269,12 @@ def list_user_sessions(user_access_token: str) -> list[dict]:
     Raises:
         AuthenticationError: If the token is invalid or expired
     """
-    supabase_client = get_supabase_user_client(user_access_token)
-    user = _validate_token(supabase_client, user_access_token)
+    user = await _validate_token(user_access_token)
+    supabase_client = get_supabase_async_user_client(user_access_token)
     user_id = user.id
 
     # Query all sessions for this user
-    response = supabase_client.table("agent_sessions").select("session_id, created_at").eq("user_id", user_id).order("created_at", desc=True).execute()
+    response = await supabase_client.table("agent_sessions").select("session_id, created_at").eq("user_id", user_id).order("created_at", desc=True).execute()
 
     if not response.data:
         return []
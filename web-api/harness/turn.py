@@ -2,7 +2,21 @@
 
 `run_turn` invokes the agent, processes its structured `AgentResponse`, applies
 per-type transforms (scaffolding, highlights), and persists every message.  It
-returns a `TurnResult` listing the persisted rows.  It does no channel I/O.
+returns a `TurnResult` listing the persisted rows.  It does no channel I/O
+itself; channels pass an async `emit` callback to receive each row as soon
+as it is persisted.
+
+Text bubbles are scaffolded concurrently.  Rows are persisted and emitted in
+response order: with `emit`, each ready prefix of bubbles goes out as soon as
+it is ready, so the first bubble is not held back by later ones; without it,
+the turn is written in one batched insert.  `TurnResult.timings` breaks the
+turn down into LLM, scaffolding and persistence time, `first_bubble_ms` (turn
+start to the first emitted row), plus `bubble_<i>_scaffold_ms` for each text
+bubble (`i` is its index in the response).
+
+`run_turn_streamed` runs the agent on the streaming runner instead and hands
+each bubble to the channel as soon as it has been generated, scaffolded and
+persisted, plus live text deltas while a bubble is still being generated.
 
 The harness owns `transcript_messages`.  Every message in the agent's response
 lands here:
@@ -19,27 +33,41 @@ Tools never call `create_transcript_message` themselves (except `generate_flashc
 which predates this pattern and still writes its own component row directly).
 """
 
+import asyncio
 import json
 import sys
 import time
 from dataclasses import dataclass, field
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
-from agents import Agent, Runner, RunConfig
+from agents import Agent, Runner, RunConfig, RunResultStreaming
 
-from harness.context import get_context
+from harness.context import load_context
 from harness.highlights import compute_highlights
+from harness.history import WindowedSession
 from harness.response import (
     AgentResponse,
+    AgentResponseMessage,
     FlashcardSetMessage,
     ImageMessage,
     LessonSuggestionsMessage,
     TextMessage,
 )
-from harness.scaffolding import generate_scaffolded_text
+from harness.response_stream import AgentResponseStreamParser, CompletedMessage
+from harness.scaffolding import generate_display_variants
 from harness.session_manager import get_session
-from services import posthog_service
-from services.transcript_service import TranscriptMessage, create_transcript_message
+from services import metrics_service, posthog_service
+from services.vocab_service import select_learned_words_for_session
+from services.transcript_service import (
+    TranscriptMessage,
+    TranscriptMessageInput,
+    create_transcript_messages,
+)
+
+
+# Channel callbacks: a persisted row, or (bubble index, new text) while streaming
+MessageEmitter = Callable[[TranscriptMessage], Awaitable[None]]
+TextDeltaEmitter = Callable[[int, str], Awaitable[None]]
 
 
 def _log(msg: str) -> None:
@@ -53,6 +81,9 @@ class TurnConfig:
     scaffold: bool = False
     flow_tag: Optional[str] = None
     user_none_system_prompt: Optional[str] = None
+    # Approximate token budget for verbatim history; older turns are folded
+    # into a rolling summary (see harness.history). None sends everything.
+    history_token_budget: Optional[int] = None
 
 
 @dataclass
@@ -68,80 +99,113 @@ class TurnResult:
     timings: dict[str, float] = field(default_factory=dict)
 
 
-async def _run_agent(
-    agent: Agent,
+async def _agent_run_args(
     session_id: str,
     user_message: Optional[str],
-    user_none_system_prompt: Optional[str],
-):
-    """Invoke the agent for one turn. Returns the SDK RunResult."""
-    session = get_session(session_id)
+    config: TurnConfig,
+) -> dict:
+    """Keyword arguments for `Runner.run` / `Runner.run_streamed` for one turn."""
+    session = await get_session(session_id)
     if not session:
         raise ValueError(f"Session not found: {session_id}")
-    context = get_context(session_id)
+    if config.history_token_budget:
+        session = WindowedSession(session, config.history_token_budget)
+    context = await load_context(session_id)
 
     if user_message is not None:
-        return await Runner.run(
-            agent, user_message, session=session, context=context
-        )
+        return {"input": user_message, "session": session, "context": context}
 
-    system_prompt = user_none_system_prompt or "Continue the conversation appropriately."
+    system_prompt = config.user_none_system_prompt or "Continue the conversation appropriately."
     system_message = {"role": "system", "content": system_prompt}
 
     def session_input_callback(history, new_input):
         return history + new_input
 
-    run_config = RunConfig(session_input_callback=session_input_callback)
-    return await Runner.run(
-        agent,
-        [system_message],
-        session=session,
-        context=context,
-        run_config=run_config,
-    )
+    return {
+        "input": [system_message],
+        "session": session,
+        "context": context,
+        "run_config": RunConfig(session_input_callback=session_input_callback),
+    }
 
 
-async def _persist_text_message(
+async def _run_agent(
+    agent: Agent,
+    session_id: str,
+    user_message: Optional[str],
+    config: TurnConfig,
+):
+    """Invoke the agent for one turn. Returns the SDK RunResult."""
+    run_args = await _agent_run_args(session_id, user_message, config)
+    return await Runner.run(agent, **run_args)
+
+
+async def _run_agent_streamed(
+    agent: Agent,
+    session_id: str,
+    user_message: Optional[str],
+    config: TurnConfig,
+) -> RunResultStreaming:
+    """Start the agent for one turn in streaming mode. Returns the SDK RunResultStreaming."""
+    run_args = await _agent_run_args(session_id, user_message, config)
+    return Runner.run_streamed(agent, **run_args)
+
+
+async def _prepare_text_message(
     session_id: str,
     msg: TextMessage,
     config: TurnConfig,
     user_message: Optional[str],
-) -> tuple[Optional[TranscriptMessage], str, str]:
-    """Scaffold, highlight, and persist one text message. Returns (row, canonical, display)."""
+) -> tuple[Optional[TranscriptMessageInput], str, str, float]:
+    """Scaffold and highlight one text message. Returns (draft, canonical, display, scaffold_ms)."""
     canonical = msg.content.text.strip()
     if not canonical:
-        return None, "", ""
+        return None, "", "", 0.0
 
+    t_start = time.monotonic()
+    transliterated = None
     if config.scaffold:
-        scaffolded = await generate_scaffolded_text(canonical, user_message=user_message)
-        display = scaffolded.text
-        highlights = scaffolded.highlights
+        learned_words = await select_learned_words_for_session(session_id, canonical)
+        context = await load_context(session_id)
+        variants = await generate_display_variants(
+            canonical, learned_words=learned_words, user_message=user_message,
+            dialect=context.agent.language if context else None,
+        )
+        display = variants.scaffolded.text
+        highlights = variants.scaffolded.highlights
+        transliterated = variants.transliterated
     else:
         display = canonical
         highlights = compute_highlights(display, config.flow_tag)
+    scaffold_ms = round((time.monotonic() - t_start) * 1000, 1)
+
+    draft = TranscriptMessageInput(
+        message_source="tutor",
+        message_kind="text",
+        message_text=display,
+        message_text_canonical=canonical if config.scaffold else None,
+        message_text_scaffolded=display if config.scaffold else None,
+        message_text_transliterated=transliterated,
+        highlights=highlights,
+        flow=config.flow_tag,
+    )
+    return draft, canonical, display, scaffold_ms
 
-    try:
-        row = await create_transcript_message(
-            session_id=session_id,
-            message_source="tutor",
-            message_kind="text",
-            message_text=display,
-            message_text_canonical=canonical if config.scaffold else None,
-            highlights=highlights,
-            flow=config.flow_tag,
-        )
-    except Exception as e:
-        _log(f"Failed to persist text message: {e}")
-        return None, canonical, display
-    return row, canonical, display
 
+def _component_draft(component_name: str, props: dict, config: TurnConfig) -> TranscriptMessageInput:
+    return TranscriptMessageInput(
+        message_source="tutor",
+        message_kind="component",
+        message_text=json.dumps({"component_name": component_name, "props": props}),
+        flow=config.flow_tag,
+    )
 
-async def _persist_lesson_suggestions_message(
-    session_id: str,
+
+def _lesson_suggestions_draft(
     msg: LessonSuggestionsMessage,
     config: TurnConfig,
-) -> Optional[TranscriptMessage]:
-    """Persist a lesson-suggestions message as a component row."""
+) -> TranscriptMessageInput:
+    """Draft a lesson-suggestions message as a component row."""
     content = msg.content
     if content.proposal_group_id:
         # Tutor proposal flow — frontend subscribes via realtime using the group ID.
@@ -149,82 +213,211 @@ async def _persist_lesson_suggestions_message(
             "proposal_group_id": content.proposal_group_id,
             "lessons": [l.model_dump(exclude_none=True) for l in content.lessons],
         }
-        component_name = "LessonProposalTiles"
-    else:
-        # Onboarding lesson flow — rendered inline.
-        props = {
-            "lessons": [
-                {"title": l.title, "objective": l.objective}
-                for l in content.lessons
-            ],
-        }
-        component_name = "LessonTiles"
+        return _component_draft("LessonProposalTiles", props, config)
 
-    try:
-        return await create_transcript_message(
-            session_id=session_id,
-            message_source="tutor",
-            message_kind="component",
-            message_text=json.dumps({"component_name": component_name, "props": props}),
-            flow=config.flow_tag,
-        )
-    except Exception as e:
-        _log(f"Failed to persist lesson-suggestions message: {e}")
-        return None
+    # Onboarding lesson flow — rendered inline.
+    props = {
+        "lessons": [
+            {"title": l.title, "objective": l.objective}
+            for l in content.lessons
+        ],
+    }
+    return _component_draft("LessonTiles", props, config)
 
 
-async def _persist_image_message(
-    session_id: str,
-    msg: ImageMessage,
-    config: TurnConfig,
-) -> Optional[TranscriptMessage]:
-    """Persist an image message as a component row."""
+def _image_draft(msg: ImageMessage, config: TurnConfig) -> TranscriptMessageInput:
+    """Draft an image message as a component row."""
     props = {
         "url": msg.content.url,
         "alt_text": msg.content.alt_text,
         "language": msg.content.language,
     }
-    try:
-        return await create_transcript_message(
-            session_id=session_id,
-            message_source="tutor",
-            message_kind="component",
-            message_text=json.dumps({"component_name": "Image", "props": props}),
-            flow=config.flow_tag,
-        )
-    except Exception as e:
-        _log(f"Failed to persist image message: {e}")
-        return None
+    return _component_draft("Image", props, config)
 
 
-async def _persist_flashcard_set_message(
+def _flashcard_set_draft(msg: FlashcardSetMessage, config: TurnConfig) -> TranscriptMessageInput:
+    """Draft a flashcard-set message as a flash_cards row (frontend expects this kind)."""
+    return TranscriptMessageInput(
+        message_source="tutor",
+        message_kind="flash_cards",
+        message_text=json.dumps({"set_id": msg.content.set_id, "title": msg.content.title}),
+        flow=config.flow_tag,
+    )
+
+
+async def _persist_drafts(
     session_id: str,
-    msg: FlashcardSetMessage,
-    config: TurnConfig,
-) -> Optional[TranscriptMessage]:
-    """Persist a flashcard-set message as a flash_cards row (frontend expects this kind)."""
+    drafts: list[TranscriptMessageInput],
+) -> list[TranscriptMessage]:
+    """
+    Persist a turn's rows in one write-behind batch.
+
+    Insert failures are handled (and counted) by the transcript writer; this
+    only fails before anything is queued, e.g. when the session has no owner.
+    """
     try:
-        return await create_transcript_message(
-            session_id=session_id,
-            message_source="tutor",
-            message_kind="flash_cards",
-            message_text=json.dumps({"set_id": msg.content.set_id, "title": msg.content.title}),
-            flow=config.flow_tag,
-        )
+        return await create_transcript_messages(session_id, drafts)
     except Exception as e:
-        _log(f"Failed to persist flashcard-set message: {e}")
-        return None
+        _log(f"Failed to persist {len(drafts)} messages: {e}")
+        return []
+
+
+class _BubblePipeline:
+    """Prepare bubbles as they arrive; persist and emit them strictly in order.
+
+    Each added message starts preparing (scaffolding) immediately. A single
+    flusher walks the indices in order: once the next bubble is ready it takes
+    every consecutive bubble that is also ready, persists them in one insert
+    and hands the rows to `emit`. A slow bubble holds back only the ones
+    after it. Without `emit` nobody is waiting on early rows, so the whole
+    turn is persisted in one insert at the end.
+    """
+
+    def __init__(
+        self,
+        session_id: str,
+        config: TurnConfig,
+        user_message: Optional[str],
+        emit: Optional[MessageEmitter] = None,
+    ):
+        self._session_id = session_id
+        self._config = config
+        self._user_message = user_message
+        self._emit = emit
+        self._tasks: dict[int, asyncio.Task] = {}
+        self._added = asyncio.Event()
+        self._closed = False
+        self._flusher = asyncio.create_task(
+            self._flush_in_order() if emit is not None else self._flush_at_end()
+        )
+        # Monotonic time the first row was emitted
+        self.first_emitted_at: Optional[float] = None
 
+        self.persisted: list[TranscriptMessage] = []
+        self.canonical_parts: list[str] = []
+        self.display_parts: list[str] = []
+        self.timings: dict[str, float] = {}
 
-def _record_analytics(
+    def __contains__(self, index: int) -> bool:
+        return index in self._tasks
+
+    def add(self, index: int, msg: AgentResponseMessage) -> None:
+        """Start preparing `messages[index]`."""
+        self._tasks[index] = asyncio.create_task(self._prepare(msg))
+        self._added.set()
+
+    async def _prepare(
+        self, msg: AgentResponseMessage
+    ) -> tuple[Optional[TranscriptMessageInput], str, str, Optional[float]]:
+        if isinstance(msg, TextMessage):
+            return await _prepare_text_message(self._session_id, msg, self._config, self._user_message)
+        if isinstance(msg, LessonSuggestionsMessage):
+            return _lesson_suggestions_draft(msg, self._config), "", "", None
+        if isinstance(msg, ImageMessage):
+            return _image_draft(msg, self._config), "", "", None
+        if isinstance(msg, FlashcardSetMessage):
+            return _flashcard_set_draft(msg, self._config), "", "", None
+        return None, "", "", None
+
+    async def _next_task(self, index: int) -> Optional[tuple[int, asyncio.Task]]:
+        """Wait for the task at `index`; after close, skip to the next one that exists."""
+        while index not in self._tasks:
+            if self._closed:
+                later = [i for i in self._tasks if i > index]
+                if not later:
+                    return None
+                index = min(later)
+                break
+            self._added.clear()
+            await self._added.wait()
+        return index, self._tasks[index]
+
+    async def _flush_at_end(self) -> None:
+        while not self._closed:
+            self._added.clear()
+            await self._added.wait()
+        if self._tasks:
+            await asyncio.wait(list(self._tasks.values()))
+            await self._flush(sorted(self._tasks))
+
+    async def _flush_in_order(self) -> None:
+        index = 0
+        while True:
+            found = await self._next_task(index)
+            if found is None:
+                return
+            index, task = found
+            await asyncio.wait([task])
+            batch = [index]
+            while (index := index + 1) in self._tasks and self._tasks[index].done():
+                batch.append(index)
+            await self._flush(batch)
+
+    async def _flush(self, batch: list[int]) -> None:
+        drafts: list[TranscriptMessageInput] = []
+        for index in batch:
+            draft, canonical, display, scaffold_ms = self._tasks[index].result()
+            if scaffold_ms is not None:
+                self.timings[f"bubble_{index}_scaffold_ms"] = scaffold_ms
+            if draft is not None:
+                drafts.append(draft)
+            if canonical:
+                self.canonical_parts.append(canonical)
+            if display:
+                self.display_parts.append(display)
+        if not drafts:
+            return
+
+        t_persist = time.monotonic()
+        rows = await _persist_drafts(self._session_id, drafts)
+        persist_ms = (time.monotonic() - t_persist) * 1000
+        self.timings["persist_ms"] = round(self.timings.get("persist_ms", 0.0) + persist_ms, 1)
+        self.persisted.extend(rows)
+        if self._emit is None:
+            return
+        for row in rows:
+            if self.first_emitted_at is None:
+                self.first_emitted_at = time.monotonic()
+            try:
+                await self._emit(row)
+            except Exception as e:
+                _log(f"Emitting {row.message_id} failed: {e}")
+
+    async def finish(self) -> None:
+        """Wait until every added bubble is persisted and emitted."""
+        self._closed = True
+        self._added.set()
+        await self._flusher
+
+    def cancel(self) -> None:
+        """Abandon the turn (the run failed)."""
+        for task in [*self._tasks.values(), self._flusher]:
+            task.cancel()
+
+
+def _record_model_usage(run_result, config: TurnConfig, llm_ms: float) -> None:
+    """Publish the turn's prompt and provider-cached token counts under `llm.<flow>.*`."""
+    usage = getattr(getattr(run_result, "context_wrapper", None), "usage", None)
+    if usage is None or not isinstance(usage.input_tokens, int) or not usage.requests:
+        return
+    metrics_service.record_model_usage(
+        config.flow_tag or "agent",
+        usage.input_tokens,
+        usage.input_tokens_details.cached_tokens or 0,
+        llm_ms,
+        requests=usage.requests,
+    )
+
+
+async def _record_analytics(
     session_id: str,
     timings: dict[str, float],
     config: TurnConfig,
 ) -> None:
     try:
-        session = get_session(session_id)
+        session = await get_session(session_id)
         user = getattr(session, "user", None) if session else None
-        context = get_context(session_id)
+        context = await load_context(session_id)
         posthog_service.capture(
             distinct_id=user.id if user else session_id,
             event="agent_response_completed",
@@ -235,6 +428,7 @@ def _record_analytics(
                 "total_ms": timings.get("total_ms"),
                 "llm_ms": timings.get("llm_ms"),
                 "scaffolding_ms": timings.get("scaffolding_ms"),
+                "first_bubble_ms": timings.get("first_bubble_ms"),
                 "tts_ms": None,
                 "language": context.agent.language if context else "ar-AR",
             },
@@ -249,60 +443,127 @@ async def run_turn(
     *,
     agent: Agent,
     config: TurnConfig,
+    emit: Optional[MessageEmitter] = None,
 ) -> TurnResult:
-    """Run one agent turn end-to-end and return the result."""
+    """
+    Run one agent turn end-to-end and return the result.
+
+    Args:
+        emit: Called with each persisted row, in response order, as soon as
+            it exists — the first bubble reaches the channel while later ones
+            are still being scaffolded. Without it the turn is persisted in
+            one insert and the rows are only returned.
+    """
     t_start = time.monotonic()
 
-    run_result = await _run_agent(
-        agent, session_id, user_message, config.user_none_system_prompt
-    )
+    run_result = await _run_agent(agent, session_id, user_message, config)
     t_after_llm = time.monotonic()
 
     response: AgentResponse = run_result.final_output
 
-    persisted: list[TranscriptMessage] = []
-    canonical_parts: list[str] = []
-    display_parts: list[str] = []
-
-    for msg in response.messages:
-        if isinstance(msg, TextMessage):
-            row, canonical, display = await _persist_text_message(
-                session_id, msg, config, user_message
-            )
-            if row is not None:
-                persisted.append(row)
-            if canonical:
-                canonical_parts.append(canonical)
-            if display:
-                display_parts.append(display)
-
-        elif isinstance(msg, LessonSuggestionsMessage):
-            row = await _persist_lesson_suggestions_message(session_id, msg, config)
-            if row is not None:
-                persisted.append(row)
-
-        elif isinstance(msg, ImageMessage):
-            row = await _persist_image_message(session_id, msg, config)
-            if row is not None:
-                persisted.append(row)
+    # Every bubble is scaffolded concurrently; rows come out in response order
+    pipeline = _BubblePipeline(session_id, config, user_message, emit)
+    try:
+        for index, msg in enumerate(response.messages):
+            pipeline.add(index, msg)
+        await pipeline.finish()
+    except BaseException:
+        pipeline.cancel()
+        raise
+    t_end = time.monotonic()
+
+    timings = _turn_timings(t_start, t_after_llm, t_end, pipeline)
+    _record_model_usage(run_result, config, timings["llm_ms"])
+    await _record_analytics(session_id, timings, config)
 
-        elif isinstance(msg, FlashcardSetMessage):
-            row = await _persist_flashcard_set_message(session_id, msg, config)
-            if row is not None:
-                persisted.append(row)
+    return TurnResult(
+        canonical_text=" ".join(pipeline.canonical_parts),
+        display_text=" ".join(pipeline.display_parts),
+        persisted_messages=pipeline.persisted,
+        timings=timings,
+    )
 
-    t_after_scaffold = time.monotonic()
 
+def _turn_timings(
+    t_start: float,
+    t_after_llm: float,
+    t_end: float,
+    pipeline: _BubblePipeline,
+) -> dict[str, float]:
     timings = {
-        "total_ms": round((t_after_scaffold - t_start) * 1000, 1),
+        "total_ms": round((t_end - t_start) * 1000, 1),
         "llm_ms": round((t_after_llm - t_start) * 1000, 1),
-        "scaffolding_ms": round((t_after_scaffold - t_after_llm) * 1000, 1),
+        "scaffolding_ms": round((t_end - t_after_llm) * 1000, 1),
+        **pipeline.timings,
     }
-    _record_analytics(session_id, timings, config)
+    if pipeline.first_emitted_at is not None:
+        timings["first_bubble_ms"] = round((pipeline.first_emitted_at - t_start) * 1000, 1)
+    return timings
+
+
+async def run_turn_streamed(
+    session_id: str,
+    user_message: Optional[str] = None,
+    *,
+    agent: Agent,
+    config: TurnConfig,
+    emit: MessageEmitter,
+    emit_text_delta: Optional[TextDeltaEmitter] = None,
+) -> TurnResult:
+    """
+    Run one agent turn on the streaming runner, delivering bubbles as they are generated.
+
+    The `AgentResponse` JSON is parsed incrementally (see harness.response_stream).
+    Each bubble is scaffolded as soon as its JSON object closes, and persisted
+    rows are passed to `emit` in response order. Text generated so far is passed
+    to `emit_text_delta(index, delta)` before its bubble completes, for live typing.
+
+    Returns:
+        TurnResult: Same shape as `run_turn`; its rows have already been emitted
+    """
+    t_start = time.monotonic()
+    streamed = await _run_agent_streamed(agent, session_id, user_message, config)
+    parser = AgentResponseStreamParser()
+    pipeline = _BubblePipeline(session_id, config, user_message, emit)
+
+    try:
+        async for event in streamed.stream_events():
+            if event.type != "raw_response_event":
+                continue
+            if event.data.type == "response.created":
+                # A new model response (e.g. after a tool call) starts its own JSON
+                parser.reset()
+                continue
+            if event.data.type != "response.output_text.delta":
+                continue
+            for parsed in parser.feed(event.data.delta):
+                if isinstance(parsed, CompletedMessage):
+                    pipeline.add(parsed.index, parsed.message)
+                elif emit_text_delta is not None:
+                    try:
+                        await emit_text_delta(parsed.index, parsed.delta)
+                    except Exception as e:
+                        _log(f"Emitting text delta failed: {e}")
+        t_after_llm = time.monotonic()
+
+        # Anything the incremental parser missed comes from the validated output
+        response: AgentResponse = streamed.final_output
+        for index, msg in enumerate(response.messages):
+            if index not in pipeline:
+                pipeline.add(index, msg)
+        await pipeline.finish()
+    except BaseException:
+        pipeline.cancel()
+        raise
+    t_end = time.monotonic()
+
+    timings = _turn_timings(t_start, t_after_llm, t_end, pipeline)
+    _record_model_usage(streamed, config, timings["llm_ms"])
+    await _record_analytics(session_id, timings, config)
 
     return TurnResult(
-        canonical_text=" ".join(canonical_parts),
-        display_text=" ".join(display_parts),
-        persisted_messages=persisted,
+        canonical_text=" ".join(pipeline.canonical_parts),
+        display_text=" ".join(pipeline.display_parts),
+        persisted_messages=pipeline.persisted,
         timings=timings,
     )
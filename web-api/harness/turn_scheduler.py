@@ -0,0 +1,146 @@
+"""Per-session turn scheduling — one agent turn at a time per session.
+
+Turns can be started from several places at once: the chat receive loop, its
+idle-followup timer, and the Soniox webhook. Run concurrently they race on
+the session's history and pay for duplicate LLM calls. Every turn goes
+through `schedule_turn`, which:
+
+- serializes turns per session (first come, first served);
+- drops idle followups that are still waiting (or cancels one that is
+  running) once a real user message arrives — they are stale by then;
+- with `barge_in=True`, cancels the in-flight user turn so the newer
+  message is answered instead (chat barge-in).
+
+Openers are never dropped or cancelled. Queue depth, wait time and
+drop/cancel counts are published to `metrics_service` under `turns.*`.
+"""
+
+import asyncio
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from services import metrics_service
+
+T = TypeVar("T")
+
+# Turn kinds
+USER = "user"
+FOLLOWUP = "followup"
+OPENER = "opener"
+
+
+def _log(msg: str) -> None:
+    print(f"[TurnScheduler] {msg}", flush=True, file=sys.stderr)
+
+
+@dataclass
+class _Turn:
+    kind: str
+    enqueued_at: float = field(default_factory=time.monotonic)
+    task: Optional[asyncio.Task] = None
+    # Set when a newer turn made this one pointless
+    superseded: bool = False
+
+
+@dataclass
+class _SessionTurns:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    waiting: list[_Turn] = field(default_factory=list)
+    running: Optional[_Turn] = None
+
+
+_sessions: dict[str, _SessionTurns] = {}
+
+metrics_service.register_gauge(
+    "turns.queue_depth", lambda: sum(len(s.waiting) for s in _sessions.values())
+)
+metrics_service.register_gauge(
+    "turns.running", lambda: sum(1 for s in _sessions.values() if s.running is not None)
+)
+
+
+def _supersede(state: _SessionTurns, barge_in: bool) -> None:
+    """A user message arrived: drop stale followups, and barge in if asked."""
+    for turn in state.waiting:
+        if turn.kind == FOLLOWUP and not turn.superseded:
+            turn.superseded = True
+            metrics_service.incr("turns.followups_dropped")
+
+    running = state.running
+    if running is None or running.task is None or running.superseded:
+        return
+    if running.kind == FOLLOWUP or (barge_in and running.kind == USER):
+        running.superseded = True
+        running.task.cancel()
+        metrics_service.incr(f"turns.cancelled.{running.kind}")
+
+
+def interrupt(session_id: str) -> None:
+    """
+    Barge in ahead of a user turn that has not been scheduled yet.
+
+    Channels that queue incoming messages before dispatching them call this
+    the moment a message arrives, so the turn answering the previous message
+    stops without waiting for the new one to reach `schedule_turn`.
+    """
+    state = _sessions.get(session_id)
+    if state is not None:
+        _supersede(state, barge_in=True)
+
+
+async def schedule_turn(
+    session_id: str,
+    run: Callable[[], Awaitable[T]],
+    *,
+    kind: str = USER,
+    barge_in: bool = False,
+) -> Optional[T]:
+    """
+    Run `run()` as the session's next turn.
+
+    Args:
+        session_id: The session the turn belongs to
+        run: Starts the turn (e.g. `lambda: dispatch(...)`)
+        kind: USER, FOLLOWUP or OPENER
+        barge_in: For USER turns, cancel the user turn currently running
+
+    Returns:
+        The turn's result, or None if it was dropped or cancelled in favour
+        of a newer user message
+    """
+    state = _sessions.setdefault(session_id, _SessionTurns())
+    if kind == USER:
+        _supersede(state, barge_in)
+
+    turn = _Turn(kind)
+    state.waiting.append(turn)
+    try:
+        async with state.lock:
+            state.waiting.remove(turn)
+            metrics_service.observe("turns.wait_ms", (time.monotonic() - turn.enqueued_at) * 1000)
+            if turn.superseded:
+                return None
+
+            turn.task = asyncio.create_task(run())
+            state.running = turn
+            try:
+                # `wait` does not raise if the turn itself is cancelled
+                await asyncio.wait([turn.task])
+            except asyncio.CancelledError:
+                # The caller went away (e.g. socket closed) — stop the turn too
+                turn.task.cancel()
+                raise
+            finally:
+                state.running = None
+
+            if turn.task.cancelled():
+                _log(f"{kind} turn on {session_id} was cancelled by a newer message")
+                return None
+            return turn.task.result()
+    finally:
+        if turn in state.waiting:
+            state.waiting.remove(turn)
+        if not state.waiting and state.running is None and not state.lock.locked():
+            _sessions.pop(session_id, None)
@@ -0,0 +1,282 @@
+"""Lazy display variants — render the active mode now, the others later.
+
+Tutor messages keep their canonical Arabic. Only the learner's current
+`response_mode` is rendered while they wait (`render_for_mode`). The other
+variants are generated in a background queue only when the learner switches
+mode (`backfill_session`, from `PATCH /sessions/{id}/context`), for the whole
+session at high priority — most learners never switch, so rendering every
+variant of every message up front would mostly be wasted model calls.
+
+A finished variant is written to its row and handed to the listeners
+registered with `on_variant_ready` (the chat channel pushes it to the
+session's socket). Jobs are best-effort: when the queue is full or a worker
+restarts they are dropped, and the next mode switch picks the rows up again.
+
+Queue depth and outcomes are published to `metrics_service` under
+`variant_backfill.*`.
+"""
+
+import asyncio
+import itertools
+import sys
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from harness import arabizi
+from harness.scaffolding import generate_display_variants, generate_transliterated_text
+from services import metrics_service, transcript_service, vocab_service
+
+# Display mode -> transcript column holding that variant ("canonical" needs none)
+MODE_COLUMNS = {
+    "scaffolded": "message_text_scaffolded",
+    "transliterated": "message_text_transliterated",
+}
+
+HIGH = 0
+LOW = 1
+MAX_QUEUED_JOBS = 500
+BACKFILL_CONCURRENCY = 2
+
+VariantListener = Callable[[str, str, dict], Awaitable[None]]
+
+
+def _log(msg: str) -> None:
+    print(f"[VariantBackfill] {msg}", flush=True, file=sys.stderr)
+
+
+class RenderedDisplay:
+    """What the learner sees now, plus the variant columns already known."""
+
+    def __init__(self, text: str, columns: dict, missing: list[str]):
+        self.text = text
+        # Transcript columns to store with the row (variants and highlights)
+        self.columns = columns
+        # Display modes left for the backfill queue
+        self.missing = missing
+
+    @property
+    def highlights(self) -> list[dict]:
+        return self.columns.get("highlights", [])
+
+
+async def render_for_mode(
+    canonical: str,
+    response_mode: str,
+    user_message: Optional[str] = None,
+    learned_words: Optional[list[str]] = None,
+    dialect: Optional[str] = None,
+) -> RenderedDisplay:
+    """
+    Render a tutor message for the learner's active display mode.
+
+    Variants that cost nothing extra come along: scaffolding returns the
+    transliteration from the same call, and vowelled text is transliterated
+    by rules without a model call.
+
+    Args:
+        canonical: The full Arabic text with harakaat
+        response_mode: "scaffolded", "transliterated" or "canonical"
+        user_message: The learner's last message, for scaffolding context
+        learned_words: Learned words to keep as Arabizi when scaffolding
+        dialect: The session's language tag (e.g. "ar-EG"), for transliteration
+
+    Returns:
+        RenderedDisplay with the display text and known columns
+    """
+    columns: dict = {}
+    if response_mode == "scaffolded":
+        variants = await generate_display_variants(
+            canonical, learned_words=learned_words, user_message=user_message, dialect=dialect
+        )
+        columns["message_text_scaffolded"] = variants.scaffolded.text
+        columns["highlights"] = variants.scaffolded.highlights
+        columns["message_text_transliterated"] = variants.transliterated
+        text = variants.scaffolded.text
+    elif response_mode == "transliterated":
+        text = await generate_transliterated_text(canonical, dialect=dialect)
+        columns["message_text_transliterated"] = text
+    else:
+        text = canonical
+        rules = arabizi.transliterate(canonical, dialect=dialect)
+        if rules.confident:
+            columns["message_text_transliterated"] = rules.text
+
+    missing = [mode for mode, column in MODE_COLUMNS.items() if column not in columns]
+    return RenderedDisplay(text, columns, missing)
+
+
+async def render_variant(
+    canonical: str,
+    mode: str,
+    user_message: Optional[str] = None,
+    learned_words: Optional[list[str]] = None,
+    dialect: Optional[str] = None,
+) -> dict:
+    """Transcript column values for one display variant of a message."""
+    if mode == "scaffolded":
+        # The same call (and cache entry) as `render_for_mode`, so a backfilled
+        # row matches one rendered while the learner waited
+        variants = await generate_display_variants(
+            canonical, learned_words=learned_words, user_message=user_message, dialect=dialect
+        )
+        scaffolded = variants.scaffolded
+        return {"message_text_scaffolded": scaffolded.text, "highlights": scaffolded.highlights}
+    if mode == "transliterated":
+        return {"message_text_transliterated": await generate_transliterated_text(canonical, dialect=dialect)}
+    raise ValueError(f"Unknown display mode: {mode}")
+
+
+@dataclass(order=True)
+class _Job:
+    priority: int
+    seq: int
+    session_id: str = field(compare=False)
+    message_id: str = field(compare=False)
+    canonical: str = field(compare=False)
+    mode: str = field(compare=False)
+    user_message: Optional[str] = field(compare=False, default=None)
+    learned_words: Optional[list[str]] = field(compare=False, default=None)
+    dialect: Optional[str] = field(compare=False, default=None)
+
+
+class _Backfiller:
+    """Priority queue of variant jobs drained by a few background workers."""
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._workers: list[asyncio.Task] = []
+        self._seq = itertools.count()
+        # (message_id, mode) queued or in progress, so a job isn't queued twice
+        self._queued: set[tuple[str, str]] = set()
+        self._listeners: list[VariantListener] = []
+
+    def pending(self) -> int:
+        return len(self._queued)
+
+    def free_slots(self) -> int:
+        """Jobs that can still be queued before `submit` starts dropping them."""
+        queue = self._ensure_started()
+        return queue.maxsize - queue.qsize()
+
+    def _ensure_started(self) -> asyncio.PriorityQueue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            # First use, or a new event loop (tests)
+            self._queue = asyncio.PriorityQueue(maxsize=MAX_QUEUED_JOBS)
+            self._loop = loop
+            self._workers = []
+            self._queued.clear()
+        self._workers = [w for w in self._workers if not w.done()]
+        while len(self._workers) < BACKFILL_CONCURRENCY:
+            self._workers.append(asyncio.create_task(self._run()))
+        return self._queue
+
+    def add_listener(self, listener: VariantListener) -> None:
+        self._listeners.append(listener)
+
+    def submit(self, priority: int, session_id: str, message_id: str, canonical: str, mode: str,
+               user_message: Optional[str], learned_words: Optional[list[str]],
+               dialect: Optional[str] = None) -> bool:
+        queue = self._ensure_started()
+        job = _Job(priority, next(self._seq), session_id, message_id, canonical, mode,
+                   user_message, learned_words, dialect)
+        key = (message_id, mode)
+        if key in self._queued:
+            return False
+        try:
+            queue.put_nowait(job)
+        except asyncio.QueueFull:
+            metrics_service.incr("variant_backfill.dropped")
+            return False
+        self._queued.add(key)
+        return True
+
+    async def join(self) -> None:
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            await self._queue.join()
+
+    async def _run(self) -> None:
+        queue = self._queue
+        while True:
+            job = await queue.get()
+            try:
+                await self._process(job)
+            finally:
+                self._queued.discard((job.message_id, job.mode))
+                queue.task_done()
+
+    async def _process(self, job: _Job) -> None:
+        try:
+            learned_words = job.learned_words
+            if learned_words is None and job.mode == "scaffolded":
+                learned_words = await vocab_service.select_learned_words_for_session(job.session_id, job.canonical)
+            columns = await render_variant(job.canonical, job.mode, job.user_message, learned_words, job.dialect)
+            await transcript_service.update_transcript_variants(job.session_id, job.message_id, columns)
+        except Exception as e:
+            metrics_service.incr("variant_backfill.failed")
+            _log(f"{job.mode} for {job.message_id} failed: {e}")
+            return
+        metrics_service.incr(f"variant_backfill.done.{job.mode}")
+
+        for listener in self._listeners:
+            try:
+                await listener(job.session_id, job.message_id, columns)
+            except Exception as e:
+                _log(f"Listener failed for {job.message_id}: {e}")
+
+
+_backfiller = _Backfiller()
+metrics_service.register_gauge("variant_backfill.pending", _backfiller.pending)
+
+
+def on_variant_ready(listener: VariantListener) -> None:
+    """Register `listener(session_id, message_id, columns)` for finished variants."""
+    _backfiller.add_listener(listener)
+
+
+def schedule(
+    session_id: str,
+    message_id: str,
+    canonical: str,
+    modes: list[str],
+    user_message: Optional[str] = None,
+    priority: int = LOW,
+    learned_words: Optional[list[str]] = None,
+    dialect: Optional[str] = None,
+) -> None:
+    """
+    Queue the given display modes of one message for background rendering.
+
+    Learned words are looked up for the session's owner when not given.
+    """
+    for mode in modes:
+        _backfiller.submit(priority, session_id, message_id, canonical, mode, user_message, learned_words, dialect)
+
+
+async def backfill_session(session_id: str, mode: str, dialect: Optional[str] = None) -> int:
+    """
+    Queue every message in a session that lacks `mode`, at high priority.
+
+    Newest messages first — the ones the learner is looking at — and no more
+    than the queue has room for; older ones wait for the next mode switch.
+
+    Returns:
+        Number of messages queued
+    """
+    column = MODE_COLUMNS.get(mode)
+    if column is None:
+        return 0
+    free = _backfiller.free_slots()
+    if free <= 0:
+        metrics_service.incr("variant_backfill.dropped")
+        return 0
+    rows = await transcript_service.get_messages_missing_variant(session_id, column, limit=free)
+    for row in rows:
+        schedule(session_id, row["message_id"], row["message_text_canonical"], [mode], priority=HIGH, dialect=dialect)
+    return len(rows)
+
+
+async def drain() -> None:
+    """Wait until every queued variant job has finished."""
+    await _backfiller.join()
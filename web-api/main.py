@@ -4,6 +4,7 @@ FastAPI application for mishmish.ai backend.
 This server provides API endpoints for session management, content delivery, and webhooks.
 """
 
+import asyncio
 import os
 import traceback
 from pathlib import Path
@@ -33,7 +34,8 @@ env_path = Path(__file__).parent / ".env"
 load_dotenv(dotenv_path=env_path, override=True)
 
 
-from services import posthog_service  # noqa: E402 — must import after dotenv
+from services import posthog_service, registry, state_store, supabase_client, transcript_service  # noqa: E402 — must import after dotenv
+from harness import context, session_manager  # noqa: E402
 
 
 app = FastAPI(
@@ -52,6 +54,8 @@ app.add_middleware(
     allow_credentials=False,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Pagination cursors (see GET /admin/agent-sessions/{id}/messages)
+    expose_headers=["X-Next-Cursor", "X-Latest-Cursor"],
 )
 
 # Catch-all exception handler to ensure unhandled errors still return proper
@@ -81,12 +85,64 @@ app.include_router(lessons_router)
 app.include_router(billing_router)
 
 
+_registry_sweeper: asyncio.Task | None = None
+
+
+@app.on_event("startup")
+async def start_registry_sweeper():
+    """Periodically evict idle sessions, contexts and jobs from memory."""
+    global _registry_sweeper
+    _registry_sweeper = asyncio.create_task(registry.run_sweeper())
+
+
+@app.on_event("shutdown")
+async def stop_registry_sweeper():
+    if _registry_sweeper is not None:
+        _registry_sweeper.cancel()
+
+
+@app.on_event("startup")
+async def start_state_store():
+    """Connect the session/context state store and listen for other workers' updates."""
+    await state_store.get_state_store().start()
+
+
 @app.on_event("shutdown")
 def shutdown_posthog():
     """Flush pending PostHog events on shutdown."""
     posthog_service.shutdown()
 
 
+@app.on_event("shutdown")
+async def flush_agent_sessions():
+    """Write any write-behind session history before the process exits."""
+    await session_manager.flush_all_sessions()
+
+
+@app.on_event("shutdown")
+async def flush_transcripts():
+    """Write every queued transcript row before the process exits."""
+    await transcript_service.flush_transcript_writes()
+
+
+@app.on_event("shutdown")
+async def snapshot_contexts():
+    """Snapshot every live context so the next deploy resumes sessions where they were."""
+    await context.snapshot_all_contexts()
+
+
+@app.on_event("shutdown")
+async def close_supabase_pool():
+    """Close the pooled HTTP clients shared by every Supabase client."""
+    await supabase_client.close_clients()
+
+
+@app.on_event("shutdown")
+async def close_state_store():
+    """Close the state store connection after sessions have flushed."""
+    await state_store.close_state_store()
+
+
 @app.get("/")
 async def root():
     """Root endpoint."""
@@ -4,25 +4,29 @@ import uuid
 from pathlib import Path
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from pydantic import BaseModel
 
 from dependencies.admin_auth import get_admin_user
+from harness import prompts
 from harness.session import AgentSession
-from harness.context import create_context, get_context, delete_context
+from harness.context import create_context, load_context, delete_context, evict_context
 from harness.scaffolding import generate_scaffolded_text_with_metadata, generate_transliterated_text_with_metadata
 from services.supabase_client import get_supabase_admin_client
-from services import transcript_service
+from services import metrics_service, transcript_service
+from services.registry import BoundedRegistry
+from services.session_owner_service import forget_session_owner, remember_session_owner
 from agent.tutor.tutor_agent import agent
 from agent.tutor.tutor_instructions import _load_instructions
 from agents import Runner
 
 ALLOWED_FLOWS = {"tutor", "onboarding"}
 
-AGENT_DIR = Path(__file__).parent.parent.parent.parent / "agent"
-LANGUAGES_DIR = AGENT_DIR / "tutor" / "languages"
-PROMPTS_DIR = AGENT_DIR / "tutor" / "prompts"
-ONBOARDING_PROMPT_PATH = AGENT_DIR / "onboarding" / "system.md"
+# Prompt names (paths under agent/, see harness.prompts)
+LANGUAGES_DIR = "tutor/languages"
+SCAFFOLDING_PROMPT = "tutor/prompts/scaffolding.md"
+TRANSLITERATION_PROMPT = "tutor/prompts/transliteration.md"
+ONBOARDING_PROMPT = "onboarding/system.md"
 
 router = APIRouter(prefix="/admin", tags=["Admin"])
 
@@ -67,22 +71,34 @@ class ContextResponse(BaseModel):
 
 
 # ── Prompt file endpoints ─────────────────────────────────────────────────────
+# Reads and writes go through harness.prompts, so a saved prompt is live on
+# every worker from its next turn.
+
+def _read_prompt(name: str, not_found: str) -> PromptContent:
+    try:
+        return PromptContent(content=prompts.get(name).text)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail=not_found)
+
+
+async def _save_prompt(name: str, body: PromptContent, not_found: str) -> PromptContent:
+    try:
+        await prompts.save(name, body.content)
+    except (FileNotFoundError, ValueError):
+        raise HTTPException(status_code=404, detail=not_found)
+    return PromptContent(content=body.content)
+
 
 @router.get("/prompts/languages")
 async def list_languages(_: str = Depends(get_admin_user)) -> list[str]:
     """List available language codes."""
-    if not LANGUAGES_DIR.exists():
-        return []
-    return [p.stem for p in sorted(LANGUAGES_DIR.glob("*.md"))]
+    return [Path(name).stem for name in prompts.names(LANGUAGES_DIR)]
 
 
 @router.get("/prompts/base/{language}")
 async def get_base_prompt(language: str, _: str = Depends(get_admin_user)) -> PromptContent:
     """Return the markdown content of a language base prompt file."""
-    path = LANGUAGES_DIR / f"{language}.md"
-    if not path.exists():
-        raise HTTPException(status_code=404, detail=f"Prompt file not found: {language}")
-    return PromptContent(content=path.read_text(encoding="utf-8"))
+    return _read_prompt(f"{LANGUAGES_DIR}/{language}.md", f"Prompt file not found: {language}")
 
 
 @router.put("/prompts/base/{language}")
@@ -92,20 +108,13 @@ async def update_base_prompt(
     _: str = Depends(get_admin_user),
 ) -> PromptContent:
     """Overwrite a language base prompt file."""
-    path = LANGUAGES_DIR / f"{language}.md"
-    if not path.exists():
-        raise HTTPException(status_code=404, detail=f"Prompt file not found: {language}")
-    path.write_text(body.content, encoding="utf-8")
-    return PromptContent(content=body.content)
+    return await _save_prompt(f"{LANGUAGES_DIR}/{language}.md", body, f"Prompt file not found: {language}")
 
 
 @router.get("/prompts/scaffolding")
 async def get_scaffolding_prompt(_: str = Depends(get_admin_user)) -> PromptContent:
     """Return the scaffolding prompt content."""
-    path = PROMPTS_DIR / "scaffolding.md"
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Scaffolding prompt file not found")
-    return PromptContent(content=path.read_text(encoding="utf-8"))
+    return _read_prompt(SCAFFOLDING_PROMPT, "Scaffolding prompt file not found")
 
 
 @router.put("/prompts/scaffolding")
@@ -114,20 +123,13 @@ async def update_scaffolding_prompt(
     _: str = Depends(get_admin_user),
 ) -> PromptContent:
     """Overwrite the scaffolding prompt file."""
-    path = PROMPTS_DIR / "scaffolding.md"
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Scaffolding prompt file not found")
-    path.write_text(body.content, encoding="utf-8")
-    return PromptContent(content=body.content)
+    return await _save_prompt(SCAFFOLDING_PROMPT, body, "Scaffolding prompt file not found")
 
 
 @router.get("/prompts/transliteration")
 async def get_transliteration_prompt(_: str = Depends(get_admin_user)) -> PromptContent:
     """Return the transliteration prompt content."""
-    path = PROMPTS_DIR / "transliteration.md"
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Transliteration prompt file not found")
-    return PromptContent(content=path.read_text(encoding="utf-8"))
+    return _read_prompt(TRANSLITERATION_PROMPT, "Transliteration prompt file not found")
 
 
 @router.put("/prompts/transliteration")
@@ -136,11 +138,7 @@ async def update_transliteration_prompt(
     _: str = Depends(get_admin_user),
 ) -> PromptContent:
     """Overwrite the transliteration prompt file."""
-    path = PROMPTS_DIR / "transliteration.md"
-    if not path.exists():
-        raise HTTPException(status_code=404, detail="Transliteration prompt file not found")
-    path.write_text(body.content, encoding="utf-8")
-    return PromptContent(content=body.content)
+    return await _save_prompt(TRANSLITERATION_PROMPT, body, "Transliteration prompt file not found")
 
 
 # ── Onboarding prompt ─────────────────────────────────────────────────────────
@@ -148,9 +146,7 @@ async def update_transliteration_prompt(
 @router.get("/prompts/onboarding")
 async def get_onboarding_prompt(_: str = Depends(get_admin_user)) -> PromptContent:
     """Return the onboarding agent system prompt."""
-    if not ONBOARDING_PROMPT_PATH.exists():
-        raise HTTPException(status_code=404, detail="Onboarding prompt file not found")
-    return PromptContent(content=ONBOARDING_PROMPT_PATH.read_text(encoding="utf-8"))
+    return _read_prompt(ONBOARDING_PROMPT, "Onboarding prompt file not found")
 
 
 @router.put("/prompts/onboarding")
@@ -159,10 +155,7 @@ async def update_onboarding_prompt(
     _: str = Depends(get_admin_user),
 ) -> PromptContent:
     """Overwrite the onboarding agent system prompt."""
-    if not ONBOARDING_PROMPT_PATH.exists():
-        raise HTTPException(status_code=404, detail="Onboarding prompt file not found")
-    ONBOARDING_PROMPT_PATH.write_text(body.content, encoding="utf-8")
-    return PromptContent(content=body.content)
+    return await _save_prompt(ONBOARDING_PROMPT, body, "Onboarding prompt file not found")
 
 
 # ── Agent session browsing ────────────────────────────────────────────────────
@@ -180,20 +173,22 @@ class AgentSessionSummary(BaseModel):
 
 
 class TranscriptMessageOut(BaseModel):
+    # Only message_id and created_at are always present; the rest can be
+    # left out with `fields`
     message_id: str
-    session_id: str
-    user_id: str
-    message_source: str
-    message_kind: str
-    message_text: str
+    session_id: str | None = None
+    user_id: str | None = None
+    message_source: str | None = None
+    message_kind: str | None = None
+    message_text: str | None = None
     message_text_canonical: str | None = None
     message_text_scaffolded: str | None = None
     message_text_transliterated: str | None = None
-    highlights: list[dict] = []
+    highlights: list[dict] | None = None
     flow: str | None = None
     node: str | None = None
     created_at: str
-    updated_at: str
+    updated_at: str | None = None
 
 
 @router.get("/agent-sessions", response_model=list[AgentSessionSummary])
@@ -254,38 +249,63 @@ async def list_agent_sessions(
 @router.get(
     "/agent-sessions/{session_id}/messages",
     response_model=list[TranscriptMessageOut],
+    response_model_exclude_unset=True,
 )
 async def get_agent_session_messages(
     session_id: str,
+    response: Response,
+    limit: int = Query(transcript_service.DEFAULT_PAGE_SIZE, ge=1, le=transcript_service.MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+    since: str | None = Query(None, description="X-Latest-Cursor from an earlier read; returns only newer messages"),
+    fields: str | None = Query(None, description="Comma-separated columns to return"),
     _: str = Depends(get_admin_user),
 ) -> list[TranscriptMessageOut]:
-    """Return all transcript messages for a session in chronological order."""
-    messages = await transcript_service.get_session_messages(session_id)
-    return [
-        TranscriptMessageOut(
-            message_id=m.message_id,
-            session_id=m.session_id,
-            user_id=m.user_id,
-            message_source=m.message_source,
-            message_kind=m.message_kind,
-            message_text=m.message_text,
-            message_text_canonical=m.message_text_canonical,
-            message_text_scaffolded=m.message_text_scaffolded,
-            message_text_transliterated=m.message_text_transliterated,
-            highlights=m.highlights,
-            flow=m.flow,
-            node=m.node,
-            created_at=m.created_at.isoformat(),
-            updated_at=m.updated_at.isoformat(),
+    """
+    Return a page of a session's transcript messages in chronological order.
+
+    Response headers:
+        X-Next-Cursor: Present when more messages follow; pass as `cursor`
+        X-Latest-Cursor: Position after the newest message returned; pass as
+            `since` later to fetch only what was added
+    """
+    if cursor and since:
+        raise HTTPException(status_code=400, detail="Pass either cursor or since, not both")
+    columns = None
+    if fields:
+        requested = [f.strip() for f in fields.split(",") if f.strip()]
+        columns = list(dict.fromkeys(["message_id", "created_at", *requested]))
+    try:
+        page = await transcript_service.get_session_messages_page(
+            session_id, after=cursor or since, limit=limit, columns=columns
         )
-        for m in messages
-    ]
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page.cursor:
+        response.headers["X-Latest-Cursor"] = page.cursor
+        if page.has_more:
+            response.headers["X-Next-Cursor"] = page.cursor
+    return [TranscriptMessageOut(**row) for row in page.rows]
 
 
 # ── Admin chat sessions ───────────────────────────────────────────────────────
 
+ADMIN_SESSION_IDLE_TTL_SECONDS = 60 * 60
+MAX_ADMIN_SESSIONS = 100
+
+
+def _on_admin_session_evicted(session_id: str, session: AgentSession) -> None:
+    session.schedule_flush()
+    evict_context(session_id)
+
+
 # In-memory store for admin sessions (separate from user sessions)
-_admin_sessions: dict[str, AgentSession] = {}
+_admin_sessions: BoundedRegistry[str, AgentSession] = BoundedRegistry(
+    "admin_sessions",
+    max_size=MAX_ADMIN_SESSIONS,
+    idle_ttl=ADMIN_SESSION_IDLE_TTL_SECONDS,
+    on_evict=_on_admin_session_evicted,
+)
 
 
 @router.post("/sessions", response_model=CreateSessionResponse)
@@ -300,11 +320,9 @@ async def create_admin_session(admin_user_id: str = Depends(get_admin_user)) ->
         "user_id": admin_user_id,
         "items": [],
     }).execute()
+    remember_session_owner(session_id, admin_user_id)
 
-    session = AgentSession.__new__(AgentSession)
-    session.session_id = session_id
-    session.supabase = admin_client
-    session.user_access_token = None
+    session = AgentSession(session_id, admin_client)
     _admin_sessions[session_id] = session
 
     create_context(session_id=session_id, user_id="admin", user_name="Admin")
@@ -322,7 +340,7 @@ async def admin_chat(
     if not session:
         raise HTTPException(status_code=404, detail=f"Admin session not found: {session_id}")
 
-    context = get_context(session_id)
+    context = await load_context(session_id)
     result = await Runner.run(agent, request.message, session=session, context=context)
 
     # Resolve the system prompt that was used for this request
@@ -403,8 +421,11 @@ async def admin_chat(
 @router.delete("/sessions/{session_id}")
 async def delete_admin_session(session_id: str, _: str = Depends(get_admin_user)) -> dict:
     """Clean up an admin chat session."""
-    _admin_sessions.pop(session_id, None)
+    session = _admin_sessions.pop(session_id, None)
+    if session:
+        session.discard_pending()
     delete_context(session_id)
+    forget_session_owner(session_id)
     try:
         get_supabase_admin_client().table("agent_sessions").delete().eq("session_id", session_id).execute()
     except Exception:
@@ -417,7 +438,7 @@ async def get_admin_context(session_id: str, _: str = Depends(get_admin_user)) -
     """Get context for an admin session."""
     if session_id not in _admin_sessions:
         raise HTTPException(status_code=404, detail=f"Admin session not found: {session_id}")
-    ctx = get_context(session_id)
+    ctx = await load_context(session_id)
     if not ctx:
         raise HTTPException(status_code=404, detail="Context not found")
     return ContextResponse(
@@ -438,7 +459,7 @@ async def update_admin_context(
     """Update context for an admin session."""
     if session_id not in _admin_sessions:
         raise HTTPException(status_code=404, detail=f"Admin session not found: {session_id}")
-    ctx = get_context(session_id)
+    ctx = await load_context(session_id)
     if not ctx:
         raise HTTPException(status_code=404, detail="Context not found")
     if request.audio_enabled is not None:
@@ -456,6 +477,14 @@ async def update_admin_context(
     )
 
 
+# ── Metrics ───────────────────────────────────────────────────────────────────
+
+@router.get("/metrics")
+async def get_metrics(_: str = Depends(get_admin_user)) -> dict[str, dict]:
+    """Snapshot of this worker's operational counters and gauges."""
+    return metrics_service.snapshot()
+
+
 # ── Helpers ───────────────────────────────────────────────────────────────────
 
 def _safe_serialize(obj: Any) -> Any:
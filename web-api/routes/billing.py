@@ -44,8 +44,8 @@ class PlanStatusResponse(BaseModel):
 
 @router.get("/me", response_model=PlanStatusResponse)
 async def get_me(user=Depends(get_current_user)):
-    state = plan_service.get_plan_state(user.id)
-    usage = plan_service.get_usage(user.id)
+    state = await plan_service.get_plan_state(user.id)
+    usage = await plan_service.get_usage(user.id)
     return PlanStatusResponse(
         plan=state.plan,
         subscription_status=state.subscription_status,
@@ -73,7 +73,7 @@ async def create_checkout(req: CheckoutRequest, user=Depends(get_current_user)):
     if req.interval not in {"month", "year"}:
         raise HTTPException(status_code=400, detail="interval must be 'month' or 'year'")
 
-    state = plan_service.get_plan_state(user.id)
+    state = await plan_service.get_plan_state(user.id)
     try:
         url = stripe_service.create_checkout_session(
             user_id=user.id,
@@ -91,7 +91,7 @@ async def create_checkout(req: CheckoutRequest, user=Depends(get_current_user)):
 
 @router.post("/portal", response_model=PortalResponse)
 async def create_portal(req: PortalRequest, user=Depends(get_current_user)):
-    state = plan_service.get_plan_state(user.id)
+    state = await plan_service.get_plan_state(user.id)
     if not state.stripe_customer_id:
         raise HTTPException(status_code=400, detail="No Stripe customer on file.")
     try:
@@ -132,7 +132,7 @@ async def stripe_webhook(request: Request):
                 sub = stripe.Subscription.retrieve(subscription_id)
                 status = sub.get("status")
                 period_end = sub.get("current_period_end")
-            plan_service.set_plan_from_stripe(
+            await plan_service.set_plan_from_stripe(
                 user_id=user_id,
                 stripe_customer_id=customer_id,
                 stripe_subscription_id=subscription_id,
@@ -142,7 +142,7 @@ async def stripe_webhook(request: Request):
 
         elif event_type in {"customer.subscription.updated", "customer.subscription.created"}:
             user_id = (obj.get("metadata") or {}).get("user_id")
-            plan_service.set_plan_from_stripe(
+            await plan_service.set_plan_from_stripe(
                 user_id=user_id,
                 stripe_customer_id=obj.get("customer"),
                 stripe_subscription_id=obj.get("id"),
@@ -152,7 +152,7 @@ async def stripe_webhook(request: Request):
 
         elif event_type == "customer.subscription.deleted":
             user_id = (obj.get("metadata") or {}).get("user_id")
-            plan_service.set_plan_from_stripe(
+            await plan_service.set_plan_from_stripe(
                 user_id=user_id,
                 stripe_customer_id=obj.get("customer"),
                 stripe_subscription_id=obj.get("id"),
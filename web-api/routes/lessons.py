@@ -34,7 +34,7 @@ async def create_lesson(
 ):
     """Create a lesson row from a suggestion (e.g. onboarding tile pick)."""
     try:
-        row = lesson_service.insert_suggestion_lesson(
+        row = await lesson_service.insert_suggestion_lesson(
             user_id=user.id,
             title=request.title,
             objective=request.objective,
@@ -58,7 +58,7 @@ async def get_lesson(
     user=Depends(get_current_user),
 ):
     """Fetch a lesson by ID (must belong to the authenticated user)."""
-    lesson = lesson_service.get_lesson(lesson_id)
+    lesson = await lesson_service.get_lesson(lesson_id)
     if not lesson:
         raise HTTPException(status_code=404, detail="Lesson not found")
     if lesson["created_by"] != user.id:
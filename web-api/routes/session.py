@@ -8,9 +8,9 @@ from pydantic import BaseModel, Field
 
 from agent.tutor import tutor_agent as tutor_module
 from channels.chat import connection_manager as websocket_service
-from harness import session_manager as session_service, runner as agent_service, context as context_service, scaffolding as scaffolding_service
+from harness import session_manager as session_service, runner as agent_service, context as context_service, scaffolding as scaffolding_service, variant_backfill
 from harness.turn import run_turn
-from services import posthog_service, soniox_service, transcript_service, plan_service
+from services import posthog_service, soniox_service, transcript_service, plan_service, vocab_service
 from dependencies.auth import get_current_user, get_current_user_token
 
 logger = logging.getLogger(__name__)
@@ -96,7 +96,7 @@ async def create_session(lesson_id: str | None = None, access_token: str = Depen
         HTTPException: 401 if authentication fails, 500 if session creation fails
     """
     try:
-        session_id = session_service.create_session(access_token, lesson_id=lesson_id)
+        session_id = await session_service.create_session(access_token, lesson_id=lesson_id)
     except session_service.AuthenticationError as e:
         raise HTTPException(status_code=401, detail=str(e))
     except Exception as e:
@@ -121,7 +121,7 @@ async def list_user_sessions(access_token: str = Depends(get_current_user_token)
         HTTPException: 401 if authentication fails
     """
     try:
-        sessions = session_service.list_user_sessions(access_token)
+        sessions = await session_service.list_user_sessions(access_token)
     except session_service.AuthenticationError as e:
         raise HTTPException(status_code=401, detail=str(e))
     return SessionListResponse(sessions=sessions)
@@ -133,7 +133,7 @@ async def fire_opener(
     access_token: str = Depends(get_current_user_token),
 ):
     """Generate the agent's opening message for a session without user input."""
-    session = session_service.get_session(session_id, user_access_token=access_token)
+    session = await session_service.get_session(session_id, user_access_token=access_token)
     if not session:
         raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
 
@@ -162,16 +162,16 @@ async def send_chat_message(
 ):
     """Send a text message to the chat for a specific session."""
     try:
-        plan_service.check_chat_quota(user.id)
+        await plan_service.check_chat_quota(user.id)
     except plan_service.QuotaExceeded as exc:
         raise HTTPException(
             status_code=402,
             detail={"kind": exc.kind, "plan": exc.plan, "message": exc.detail},
         )
-    plan_service.record_usage(user.id, "chat_message", 1)
+    await plan_service.record_usage(user.id, "chat_message", 1)
 
     # Verify the session exists
-    session = session_service.get_session(session_id, user_access_token=access_token)
+    session = await session_service.get_session(session_id, user_access_token=access_token)
     if not session:
         raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
 
@@ -192,24 +192,20 @@ async def send_chat_message(
     canonical_response = await agent_service.generate_agent_response(session_id, request.message, access_token)
     t_after_llm = time.monotonic()
 
-    # Step 2: Generate display text based on user's response_mode setting
-    context = context_service.get_context(session_id)
+    # Step 2: Render display text for the user's response_mode; the other
+    # variants are backfilled only if they switch modes (PATCH .../context)
+    context = await context_service.load_context(session_id)
     response_mode = context.agent.response_mode if context else "scaffolded"
-    # Always generate both display variants so the user can switch modes
-    scaffolded = await scaffolding_service.generate_scaffolded_text(canonical_response, user_message=request.message)
-    transliterated = await scaffolding_service.generate_transliterated_text(canonical_response)
+    learned_words = await vocab_service.select_learned_words(user.id, canonical_response)
+    display = await variant_backfill.render_for_mode(
+        canonical_response, response_mode, user_message=request.message, learned_words=learned_words,
+        dialect=context.agent.language if context else None,
+    )
     t_after_scaffolding = time.monotonic()
-    highlights = scaffolded.highlights
-
-    # Pick the display text based on current response_mode
-    if response_mode == "canonical":
-        display_response = canonical_response
-    elif response_mode == "transliterated":
-        display_response = transliterated
-    else:
-        display_response = scaffolded.text
+    display_response = display.text
+    highlights = display.highlights
 
-    # Save the agent's response to the database with all display variants
+    # Save the agent's response with the variants rendered so far
     try:
         await transcript_service.create_transcript_message(
             session_id=session_id,
@@ -217,8 +213,8 @@ async def send_chat_message(
             message_kind="text",
             message_text=display_response,
             message_text_canonical=canonical_response,
-            message_text_scaffolded=scaffolded.text,
-            message_text_transliterated=transliterated,
+            message_text_scaffolded=display.columns.get("message_text_scaffolded"),
+            message_text_transliterated=display.columns.get("message_text_transliterated"),
             highlights=highlights or None,
         )
     except Exception as e:
@@ -255,7 +251,9 @@ async def send_chat_message(
 
                 # Generate display variants for the audio label
                 audio_canonical = context.agent.audio_text
-                audio_transliterated = await scaffolding_service.generate_transliterated_text(audio_canonical)
+                audio_transliterated = await scaffolding_service.generate_transliterated_text(
+                    audio_canonical, dialect=context.agent.language
+                )
 
                 # Create audio transcript message (appears as a separate bubble)
                 await transcript_service.create_transcript_message(
@@ -309,7 +307,7 @@ async def send_test_event(session_id: str, access_token: str = Depends(get_curre
         HTTPException: 404 if session or WebSocket connection not found, 401 if authentication fails
     """
     # Retrieve the session
-    session = session_service.get_session(session_id, user_access_token=access_token)
+    session = await session_service.get_session(session_id, user_access_token=access_token)
     if not session:
         raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
 
@@ -336,7 +334,7 @@ async def update_context(
 ):
     if request.language is not None:
         try:
-            plan_service.check_dialect_allowed(user.id, request.language)
+            await plan_service.check_dialect_allowed(user.id, request.language)
         except plan_service.QuotaExceeded as exc:
             raise HTTPException(
                 status_code=402,
@@ -357,12 +355,13 @@ async def update_context(
         HTTPException: 404 if session or context not found, 401 if authentication fails
     """
     # Verify the session exists
-    session = session_service.get_session(session_id, user_access_token=access_token)
+    session = await session_service.get_session(session_id, user_access_token=access_token)
     if not session:
         raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
 
-    # Get the context, recreating it with defaults if lost (e.g. after server restart)
-    context = context_service.get_context(session_id)
+    # Get the context (restored from its snapshot after a restart), or start
+    # from defaults if the session never had one
+    context = await context_service.load_context(session_id)
     if not context:
         context = context_service.create_context(session_id=session_id)
 
@@ -374,9 +373,18 @@ async def update_context(
     if request.language is not None:
         context.set_language(request.language)
 
-    # Update response_mode if provided
+    # Update response_mode if provided, and fill in that variant for
+    # earlier messages that were rendered in another mode
     if request.response_mode is not None:
+        previous_mode = context.agent.response_mode
         context.set_response_mode(request.response_mode)
+        if request.response_mode != previous_mode:
+            try:
+                await variant_backfill.backfill_session(
+                    session_id, request.response_mode, dialect=context.agent.language
+                )
+            except Exception as e:
+                logger.error(f"[Session] Failed to queue {request.response_mode} backfill: {e}")
 
     # Return updated context
     return ContextResponse(
@@ -404,12 +412,13 @@ async def get_context(session_id: str, access_token: str = Depends(get_current_u
         HTTPException: 404 if session or context not found, 401 if authentication fails
     """
     # Verify the session exists
-    session = session_service.get_session(session_id, user_access_token=access_token)
+    session = await session_service.get_session(session_id, user_access_token=access_token)
     if not session:
         raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
 
-    # Get the context, recreating it with defaults if lost (e.g. after server restart)
-    context = context_service.get_context(session_id)
+    # Get the context (restored from its snapshot after a restart), or start
+    # from defaults if the session never had one
+    context = await context_service.load_context(session_id)
     if not context:
         context = context_service.create_context(session_id=session_id)
 
@@ -448,7 +457,7 @@ async def upload_audio(session_id: str, file: UploadFile = File(...), access_tok
         HTTPException: 404 if session not found, 401 if authentication fails, 500 if upload/transcription fails
     """
     # Verify the session exists
-    session = session_service.get_session(session_id, user_access_token=access_token)
+    session = await session_service.get_session(session_id, user_access_token=access_token)
     if not session:
         raise HTTPException(status_code=404, detail=f"Session '{session_id}' not found")
 
@@ -460,7 +469,7 @@ async def upload_audio(session_id: str, file: UploadFile = File(...), access_tok
         file_id = await soniox_service.upload_audio_file(audio_bytes, file.filename or "recording.webm")
 
         # Get the target language from session context
-        context = context_service.get_context(session_id)
+        context = await context_service.load_context(session_id)
         target_language = "ar"  # Default to Arabic
         if context and context.agent.language:
             # Extract language code from locale (e.g., "ar-AR" -> "ar", "es-MX" -> "es")
@@ -44,7 +44,7 @@ async def soniox_webhook(payload: SonioxWebhookPayload):
     status = payload.status
 
     # Look up the session ID
-    session_id = soniox_service.get_session_id(transcription_id)
+    session_id = await soniox_service.get_session_id(transcription_id)
     if not session_id:
         raise HTTPException(
             status_code=404,
@@ -102,6 +102,7 @@ async def soniox_webhook(payload: SonioxWebhookPayload):
                 agent=tutor_module.agent,
                 config=opts.turn_config(),
                 synthesize_audio=True,
+                barge_in=True,
             )
 
         elif status == "error":
@@ -124,7 +125,7 @@ async def soniox_webhook(payload: SonioxWebhookPayload):
                 print(f"[Webhook] Failed to save error message: {e}")
 
         # Clean up the transcription job mapping
-        soniox_service.remove_transcription_job(transcription_id)
+        await soniox_service.remove_transcription_job(transcription_id)
 
         return {"message": "Webhook processed successfully"}
 
@@ -148,7 +149,7 @@ async def soniox_webhook(payload: SonioxWebhookPayload):
             print(f"[Webhook] Failed to save error message: {save_error}")
 
         # Clean up even on error
-        soniox_service.remove_transcription_job(transcription_id)
+        await soniox_service.remove_transcription_job(transcription_id)
 
         raise HTTPException(
             status_code=500,
@@ -0,0 +1,111 @@
+"""
+Microbenchmark highlight computation: the compiled VocabMatcher in
+harness/highlights.py against the previous per-word approach (one regex and
+one finditer per vocab word, then an O(n²) overlap check). Compile time is
+reported separately; production matchers are compiled once per vocabulary.
+
+Texts and vocabularies are synthetic but shaped like production: scaffolded
+English bubbles with a sprinkling of Arabizi, and vocabularies the size of a
+flow vocab, a learner's learned words, and a large course glossary.
+
+Run from the web-api directory:
+
+    uv run python scripts/bench_highlights.py
+    uv run python scripts/bench_highlights.py --repeat 50
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+WEB_API_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(WEB_API_DIR))
+
+from harness.highlights import VocabMatcher  # noqa: E402 — needs the sys.path entry
+
+ENGLISH = (
+    "the a to and you I it is that for of in on my your this we can what "
+    "how today good very like want go say learn word try again nice with"
+).split()
+SYLLABLES = ["ma", "ra", "ha", "ba", "sha", "ka", "ta", "la", "na", "da", "3a", "7a", "5a", "2a", "wa", "fi", "mu", "si"]
+
+VOCAB_SIZES = {"flow vocab": 10, "learned words": 200, "glossary": 2000}
+TEXT_WORDS = {"bubble": 40, "long reply": 250, "lesson page": 2000}
+
+
+def _arabizi_word(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+
+
+def _vocab(rng: random.Random, size: int) -> list[str]:
+    words: set[str] = set()
+    while len(words) < size:
+        words.add(_arabizi_word(rng))
+    return sorted(words)
+
+
+def _text(rng: random.Random, vocab: list[str], n_words: int) -> str:
+    # About one word in eight is Arabizi, mostly from the vocabulary
+    words = []
+    for _ in range(n_words):
+        if rng.random() < 0.125:
+            word = rng.choice(vocab) if rng.random() < 0.8 else _arabizi_word(rng)
+            words.append(word.capitalize() if rng.random() < 0.1 else word)
+        else:
+            words.append(rng.choice(ENGLISH))
+    return " ".join(words) + "."
+
+
+def per_word_highlights(text: str, vocab: list[str]) -> list[tuple[int, int]]:
+    """The previous implementation, kept here as the baseline."""
+    claimed: list[tuple[int, int]] = []
+    for word in sorted(vocab, key=len, reverse=True):
+        pattern = rf"\b{re.escape(word)}\b"
+        for m in re.finditer(pattern, text, re.IGNORECASE):
+            start, end = m.start(), m.end()
+            if any(s < end and start < e for s, e in claimed):
+                continue
+            claimed.append((start, end))
+    return sorted(claimed)
+
+
+def _time_ms(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per measurement")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f"{'vocab':<22}{'text':<20}{'per-word ms':>12}{'matcher ms':>12}{'compile ms':>12}{'speedup':>9}")
+    for vocab_name, vocab_size in VOCAB_SIZES.items():
+        vocab = _vocab(rng, vocab_size)
+        compile_ms = _time_ms(lambda: VocabMatcher(vocab), max(1, args.repeat // 4))
+        matcher = VocabMatcher(vocab)
+        for text_name, n_words in TEXT_WORDS.items():
+            text = _text(rng, vocab, n_words)
+            baseline = per_word_highlights(text, vocab)
+            matched = sorted((start, end) for start, end, _ in matcher.finditer(text))
+            if matched != baseline:
+                # Expected now and then: the matcher folds digit spellings
+                # together ("3a7a" and "aha"), the baseline matches them literally
+                print(f"  note: {len(baseline)} per-word vs {len(matched)} matcher matches for {vocab_name}/{text_name}")
+            old_ms = _time_ms(lambda: per_word_highlights(text, vocab), args.repeat)
+            new_ms = _time_ms(lambda: list(matcher.finditer(text)), args.repeat)
+            print(
+                f"{f'{vocab_name} ({vocab_size})':<22}{f'{text_name} ({n_words}w)':<20}"
+                f"{old_ms:>12.3f}{new_ms:>12.3f}{compile_ms:>12.3f}{old_ms / new_ms:>8.0f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
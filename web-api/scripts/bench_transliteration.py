@@ -0,0 +1,117 @@
+"""
+Benchmark the rule-based Arabizi transliterator (harness/arabizi.py) against
+the hand-written golden set in scripts/data/transliteration_golden.json.
+
+Reports per-sentence latency, exact and loose agreement with the golden
+Arabizi, and how many words the rules flag for the model. With --llm the
+same sentences are also sent to the transliteration model for comparison
+(needs OPENAI_API_KEY).
+
+Run from the web-api directory:
+
+    uv run python scripts/bench_transliteration.py
+    uv run python scripts/bench_transliteration.py --llm --show-misses
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+WEB_API_DIR = Path(__file__).resolve().parent.parent
+GOLDEN_PATH = WEB_API_DIR / "scripts" / "data" / "transliteration_golden.json"
+
+sys.path.insert(0, str(WEB_API_DIR))
+load_dotenv(dotenv_path=WEB_API_DIR / ".env", override=True)
+
+from harness import arabizi  # noqa: E402 — must import after dotenv
+
+
+def loose(text: str) -> str:
+    """Fold spelling variants that read the same (case, hyphens, long vowels, doubling)."""
+    text = text.lower().replace("-", "")
+    text = re.sub(r"[^\w\s]", "", text)
+    text = text.replace("ee", "i").replace("oo", "u").replace("aa", "a")
+    return re.sub(r"(.)\1+", r"\1", text)
+
+
+def score(name: str, outputs: list[str], golden: list[dict], timings_ms: list[float], show_misses: bool) -> None:
+    exact = sum(out == g["arabizi"] for out, g in zip(outputs, golden))
+    close = sum(loose(out) == loose(g["arabizi"]) for out, g in zip(outputs, golden))
+    n = len(golden)
+    print(f"\n{name}")
+    print(f"  exact agreement:  {exact}/{n} ({exact / n:.0%})")
+    print(f"  loose agreement:  {close}/{n} ({close / n:.0%})")
+    print(
+        f"  latency ms:       p50={statistics.median(timings_ms):.3f} "
+        f"max={max(timings_ms):.3f} total={sum(timings_ms):.1f}"
+    )
+    if show_misses:
+        for out, g in zip(outputs, golden):
+            if out != g["arabizi"]:
+                print(f"    {g['arabic']}  ->  {out!r}  (expected {g['arabizi']!r})")
+
+
+def bench_rules(golden: list[dict], repeat: int) -> tuple[list[str], list[float], int]:
+    outputs: list[str] = []
+    timings_ms: list[float] = []
+    flagged = 0
+    for entry in golden:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            result = arabizi.transliterate(entry["arabic"])
+        timings_ms.append((time.perf_counter() - start) * 1000 / repeat)
+        outputs.append(result.text)
+        flagged += len(result.low_confidence)
+    return outputs, timings_ms, flagged
+
+
+async def bench_llm(golden: list[dict]) -> tuple[list[str], list[float]]:
+    from harness import scaffolding
+
+    client = scaffolding._get_client()
+    template, _ = scaffolding._load_prompt("transliteration.md")
+    outputs: list[str] = []
+    timings_ms: list[float] = []
+    for entry in golden:
+        start = time.perf_counter()
+        response = await client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=scaffolding._messages(template, entry["arabic"]),
+            temperature=0.2,
+            max_tokens=500,
+        )
+        timings_ms.append((time.perf_counter() - start) * 1000)
+        outputs.append((response.choices[0].message.content or "").strip())
+    return outputs, timings_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--golden", type=Path, default=GOLDEN_PATH, help="Golden set JSON")
+    parser.add_argument("--repeat", type=int, default=200, help="Rule-engine runs per sentence for timing")
+    parser.add_argument("--llm", action="store_true", help="Also run the transliteration model")
+    parser.add_argument("--show-misses", action="store_true", help="Print sentences that differ from golden")
+    args = parser.parse_args()
+
+    golden = json.loads(args.golden.read_text(encoding="utf-8"))
+    words = sum(len(g["arabic"].split()) for g in golden)
+    print(f"{len(golden)} sentences, {words} words from {args.golden.name}")
+
+    outputs, timings_ms, flagged = bench_rules(golden, args.repeat)
+    score("rules (harness/arabizi.py)", outputs, golden, timings_ms, args.show_misses)
+    print(f"  low-confidence:   {flagged}/{words} words would go to the model")
+
+    if args.llm:
+        outputs, timings_ms = asyncio.run(bench_llm(golden))
+        score("model (transliteration.md)", outputs, golden, timings_ms, args.show_misses)
+
+
+if __name__ == "__main__":
+    main()
@@ -6,5 +6,6 @@ from harness.context import (  # noqa: F401
     UserInfo,
     create_context,
     get_context,
+    load_context,
     delete_context,
 )
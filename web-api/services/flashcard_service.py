@@ -8,6 +8,7 @@ from PIL import Image
 from google import genai
 from google.genai import types
 
+from services import vocab_service
 from services.supabase_client import get_supabase_admin_client
 from services.tts_service import get_tts_service
 from services.wimmelbilder_service import _get_genai_client
@@ -184,7 +185,9 @@ async def _generate_and_upload_cover(client: genai.Client, set_id: str, title: s
         # Non-fatal — the deck still works without a cover
 
 
-async def _process_flashcard_set(set_id: str, title: str, cards: list[dict], language: str) -> None:
+async def _process_flashcard_set(
+    set_id: str, title: str, cards: list[dict], language: str, user_id: str
+) -> None:
     """Background task: generate images and audio for all cards in a set."""
     try:
         client = _get_genai_client()
@@ -216,6 +219,18 @@ async def _process_flashcard_set(set_id: str, title: str, cards: list[dict], lan
         else:
             await asyncio.to_thread(_update_set_status, set_id, "complete")
 
+        # Completed cards join the learner's vocabulary
+        failed_ids = {row["id"] for row in result.data or []}
+        vocab_service.record_words(
+            user_id,
+            [
+                {"canonical": c["arabic_text"], "arabizi": c["transliteration"], "meaning": c["english"]}
+                for c in cards
+                if c["id"] not in failed_ids
+            ],
+            flashcard=True,
+        )
+
     except Exception as e:
         traceback.print_exc()
         await asyncio.to_thread(_update_set_status, set_id, "failed", error=str(e))
@@ -275,7 +290,7 @@ async def create_flashcard_set(
         })
 
     # Fire and forget
-    asyncio.create_task(_process_flashcard_set(set_id, title, cards_with_ids, language))
+    asyncio.create_task(_process_flashcard_set(set_id, title, cards_with_ids, language, user_id))
 
     return set_id
 
@@ -3,10 +3,10 @@
 import uuid
 from typing import Any, Optional
 
-from .supabase_client import get_supabase_admin_client
+from .supabase_client import get_supabase_async_admin_client
 
 
-def insert_lesson_proposals(
+async def insert_lesson_proposals(
     proposal_group_id: str,
     user_id: str,
     session_id: Optional[str],
@@ -27,11 +27,11 @@ def insert_lesson_proposals(
         }
         for p in proposals
     ]
-    result = get_supabase_admin_client().table("lessons").insert(rows).execute()
+    result = await get_supabase_async_admin_client().table("lessons").insert(rows).execute()
     return result.data or []
 
 
-def insert_suggestion_lesson(
+async def insert_suggestion_lesson(
     user_id: str,
     title: str,
     objective: str,
@@ -48,13 +48,13 @@ def insert_suggestion_lesson(
         "objective": objective,
         "status": "proposed",
     }
-    result = get_supabase_admin_client().table("lessons").insert(row).execute()
+    result = await get_supabase_async_admin_client().table("lessons").insert(row).execute()
     return result.data[0]
 
 
-def get_lesson(lesson_id: str) -> Optional[dict[str, Any]]:
-    result = (
-        get_supabase_admin_client()
+async def get_lesson(lesson_id: str) -> Optional[dict[str, Any]]:
+    result = await (
+        get_supabase_async_admin_client()
         .table("lessons")
         .select("*")
         .eq("id", lesson_id)
@@ -64,16 +64,16 @@ def get_lesson(lesson_id: str) -> Optional[dict[str, Any]]:
     return result.data
 
 
-def update_lesson(lesson_id: str, **fields: Any) -> None:
+async def update_lesson(lesson_id: str, **fields: Any) -> None:
     if not fields:
         return
-    get_supabase_admin_client().table("lessons").update(fields).eq("id", lesson_id).execute()
+    await get_supabase_async_admin_client().table("lessons").update(fields).eq("id", lesson_id).execute()
 
 
-def dismiss_sibling_proposals(proposal_group_id: str, except_id: str) -> None:
+async def dismiss_sibling_proposals(proposal_group_id: str, except_id: str) -> None:
     """Mark every still-`proposed` row in the group as `dismissed`, except the chosen one."""
-    (
-        get_supabase_admin_client()
+    await (
+        get_supabase_async_admin_client()
         .table("lessons")
         .update({"status": "dismissed"})
         .eq("proposal_group_id", proposal_group_id)
@@ -0,0 +1,65 @@
+"""In-process operational metrics (counters, gauges and timing summaries).
+
+Per-worker numbers for capacity and cache tuning — not product analytics,
+which go to PostHog. Read with `snapshot()`; exposed at `GET /admin/metrics`.
+"""
+
+from typing import Callable, Union
+
+_counters: dict[str, int] = {}
+_gauges: dict[str, Union[float, Callable[[], float]]] = {}
+# name -> {"count", "sum", "max"}
+_summaries: dict[str, dict[str, float]] = {}
+
+
+def incr(name: str, value: int = 1) -> None:
+    """Add `value` to a monotonically increasing counter."""
+    _counters[name] = _counters.get(name, 0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Record the current value of a gauge."""
+    _gauges[name] = value
+
+
+def register_gauge(name: str, read: Callable[[], float]) -> None:
+    """Register a gauge that is computed when a snapshot is taken."""
+    _gauges[name] = read
+
+
+def observe(name: str, value: float) -> None:
+    """Record one sample (e.g. a latency) in a count/sum/max summary."""
+    summary = _summaries.setdefault(name, {"count": 0, "sum": 0.0, "max": 0.0})
+    summary["count"] += 1
+    summary["sum"] += value
+    summary["max"] = max(summary["max"], value)
+
+
+def record_model_usage(
+    call: str,
+    input_tokens: int,
+    cached_tokens: int,
+    latency_ms: float,
+    requests: int = 1,
+) -> None:
+    """
+    Record the prompt tokens of a model call under `llm.<call>.*`: how many
+    were sent, how many the provider served from its prefix cache, and the
+    latency split by whether the cache was hit.
+    """
+    incr(f"llm.{call}.requests", requests)
+    incr(f"llm.{call}.input_tokens", input_tokens)
+    incr(f"llm.{call}.cached_tokens", cached_tokens)
+    observe(f"llm.{call}.latency_ms.{'cached' if cached_tokens else 'uncached'}", latency_ms)
+
+
+def snapshot() -> dict[str, dict]:
+    """Current value of every counter, gauge and summary."""
+    gauges: dict[str, float] = {}
+    for name, value in _gauges.items():
+        try:
+            gauges[name] = value() if callable(value) else value
+        except Exception:
+            continue
+    summaries = {name: dict(summary) for name, summary in _summaries.items()}
+    return {"counters": dict(_counters), "gauges": gauges, "summaries": summaries}
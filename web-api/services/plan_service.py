@@ -6,13 +6,16 @@ Single source of truth for:
 - recording usage events
 
 All writes use the admin client; all reads are scoped to the caller's user_id.
+Every call goes through the pooled async client so quota checks never block
+the event loop.
 """
 
+import asyncio
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import Literal, Optional
 
-from services.supabase_client import get_supabase_admin_client
+from services.supabase_client import get_supabase_async_admin_client
 
 
 # Quota constants
@@ -50,11 +53,11 @@ class UsageSnapshot:
     chat_messages_today: int
 
 
-def get_plan_state(user_id: str) -> PlanState:
+async def get_plan_state(user_id: str) -> PlanState:
     """Read plan/subscription state for a user. Creates a free-default view
     if the profiles row is missing columns (pre-migration rows default via DDL)."""
-    client = get_supabase_admin_client()
-    resp = (
+    client = get_supabase_async_admin_client()
+    resp = await (
         client.table("profiles")
         .select("id, plan, subscription_status, current_period_end, stripe_customer_id")
         .eq("id", user_id)
@@ -71,9 +74,9 @@ def get_plan_state(user_id: str) -> PlanState:
     )
 
 
-def _sum_since(user_id: str, kind: str, since: datetime) -> int:
-    client = get_supabase_admin_client()
-    resp = (
+async def _sum_since(user_id: str, kind: str, since: datetime) -> int:
+    client = get_supabase_async_admin_client()
+    resp = await (
         client.table("usage_events")
         .select("amount")
         .eq("user_id", user_id)
@@ -84,29 +87,32 @@ def _sum_since(user_id: str, kind: str, since: datetime) -> int:
     return sum(int(r["amount"]) for r in (resp.data or []))
 
 
-def get_usage(user_id: str) -> UsageSnapshot:
+async def get_usage(user_id: str) -> UsageSnapshot:
     now = datetime.now(timezone.utc)
     month_start = now - timedelta(days=30)
     day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    voice_seconds, chat_messages = await asyncio.gather(
+        _sum_since(user_id, "voice_seconds", month_start),
+        _sum_since(user_id, "chat_message", day_start),
+    )
     return UsageSnapshot(
-        voice_seconds_this_month=_sum_since(user_id, "voice_seconds", month_start),
-        chat_messages_today=_sum_since(user_id, "chat_message", day_start),
+        voice_seconds_this_month=voice_seconds,
+        chat_messages_today=chat_messages,
     )
 
 
-def record_usage(user_id: str, kind: str, amount: int) -> None:
+async def record_usage(user_id: str, kind: str, amount: int) -> None:
     if amount <= 0:
         return
-    client = get_supabase_admin_client()
-    client.table("usage_events").insert(
+    client = get_supabase_async_admin_client()
+    await client.table("usage_events").insert(
         {"user_id": user_id, "kind": kind, "amount": amount}
     ).execute()
 
 
-def check_voice_quota(user_id: str) -> tuple[PlanState, UsageSnapshot]:
+async def check_voice_quota(user_id: str) -> tuple[PlanState, UsageSnapshot]:
     """Raises QuotaExceeded if the user has no remaining voice budget."""
-    state = get_plan_state(user_id)
-    usage = get_usage(user_id)
+    state, usage = await asyncio.gather(get_plan_state(user_id), get_usage(user_id))
     if state.plan == "free":
         if usage.voice_seconds_this_month >= FREE_VOICE_MONTHLY_SECONDS:
             raise QuotaExceeded(
@@ -118,7 +124,7 @@ def check_voice_quota(user_id: str) -> tuple[PlanState, UsageSnapshot]:
         # Pro: daily soft cap
         now = datetime.now(timezone.utc)
         day_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
-        today = _sum_since(user_id, "voice_seconds", day_start)
+        today = await _sum_since(user_id, "voice_seconds", day_start)
         if today >= PRO_VOICE_DAILY_SECONDS:
             raise QuotaExceeded(
                 kind="voice",
@@ -128,11 +134,11 @@ def check_voice_quota(user_id: str) -> tuple[PlanState, UsageSnapshot]:
     return state, usage
 
 
-def check_chat_quota(user_id: str) -> None:
-    state = get_plan_state(user_id)
+async def check_chat_quota(user_id: str) -> None:
+    state = await get_plan_state(user_id)
     if state.plan != "free":
         return
-    usage = get_usage(user_id)
+    usage = await get_usage(user_id)
     if usage.chat_messages_today >= FREE_CHAT_DAILY:
         raise QuotaExceeded(
             kind="chat",
@@ -141,8 +147,8 @@ def check_chat_quota(user_id: str) -> None:
         )
 
 
-def check_dialect_allowed(user_id: str, language_code: str) -> None:
-    state = get_plan_state(user_id)
+async def check_dialect_allowed(user_id: str, language_code: str) -> None:
+    state = await get_plan_state(user_id)
     if state.plan == "pro":
         return
     if language_code not in FREE_DIALECTS:
@@ -153,7 +159,7 @@ def check_dialect_allowed(user_id: str, language_code: str) -> None:
         )
 
 
-def set_plan_from_stripe(
+async def set_plan_from_stripe(
     *,
     stripe_customer_id: str,
     stripe_subscription_id: Optional[str],
@@ -164,7 +170,7 @@ def set_plan_from_stripe(
 ) -> None:
     """Upsert plan state from a Stripe webhook. Looks up by user_id if provided,
     else by stripe_customer_id."""
-    client = get_supabase_admin_client()
+    client = get_supabase_async_admin_client()
 
     if plan is None:
         plan = "pro" if subscription_status in {"active", "trialing"} else "free"
@@ -182,8 +188,8 @@ def set_plan_from_stripe(
     }
 
     if user_id:
-        client.table("profiles").update(payload).eq("id", user_id).execute()
+        await client.table("profiles").update(payload).eq("id", user_id).execute()
     else:
-        client.table("profiles").update(payload).eq(
+        await client.table("profiles").update(payload).eq(
             "stripe_customer_id", stripe_customer_id
         ).execute()
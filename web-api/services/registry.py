@@ -0,0 +1,142 @@
+"""Bounded in-memory registries with idle-TTL and LRU eviction.
+
+Per-worker lookups (sessions, contexts, admin sessions, transcription jobs)
+used to live in plain dicts that were only emptied by explicit deletes, so
+anything abandoned without a delete stayed for the life of the worker.
+
+`BoundedRegistry` is a dict-like mapping that evicts entries idle for longer
+than `idle_ttl` seconds and, past `max_size`, the least recently used ones.
+Reads refresh an entry. An `on_evict` callback gets the evicted key and value
+so owners can flush state first. Size and eviction counts are published to
+`metrics_service` as `registry.<name>.size` and `registry.<name>.evictions.<reason>`.
+
+Expired entries are dropped lazily on access and by `sweep_all()`, which
+the app runs periodically.
+"""
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Iterator, MutableMapping
+from typing import Callable, Generic, Optional, TypeVar
+
+from services import metrics_service
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+# How often the app sweeps every registry for idle entries
+SWEEP_INTERVAL_SECONDS = 60
+
+_registries: list["BoundedRegistry"] = []
+
+
+def _log(msg: str) -> None:
+    print(f"[Registry] {msg}", flush=True, file=sys.stderr)
+
+
+class BoundedRegistry(MutableMapping[K, V], Generic[K, V]):
+    """Dict-like registry with idle-TTL and max-size (LRU) eviction."""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        max_size: Optional[int] = None,
+        idle_ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[K, V], None]] = None,
+    ):
+        """
+        Args:
+            name: Metric name prefix (`registry.<name>.*`)
+            max_size: Evict least recently used entries beyond this many
+            idle_ttl: Evict entries not read or written for this many seconds
+            on_evict: Called with (key, value) for every evicted entry — not
+                for explicit deletes
+        """
+        self.name = name
+        self.max_size = max_size
+        self.idle_ttl = idle_ttl
+        self._on_evict = on_evict
+        # Least recently used first; value is (last_used, item)
+        self._entries: "OrderedDict[K, tuple[float, V]]" = OrderedDict()
+
+        metrics_service.register_gauge(f"registry.{name}.size", lambda: len(self._entries))
+        _registries.append(self)
+
+    def _expired(self, last_used: float, now: float) -> bool:
+        return self.idle_ttl is not None and now - last_used > self.idle_ttl
+
+    def _evict(self, key: K, reason: str) -> None:
+        _, value = self._entries.pop(key)
+        metrics_service.incr(f"registry.{self.name}.evictions.{reason}")
+        if self._on_evict is not None:
+            try:
+                self._on_evict(key, value)
+            except Exception as e:
+                _log(f"{self.name}: eviction callback failed for {key}: {e}")
+
+    def __getitem__(self, key: K) -> V:
+        last_used, value = self._entries[key]
+        now = time.monotonic()
+        if self._expired(last_used, now):
+            self._evict(key, "idle")
+            raise KeyError(key)
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        return value
+
+    def __setitem__(self, key: K, value: V) -> None:
+        self._entries[key] = (time.monotonic(), value)
+        self._entries.move_to_end(key)
+        self.sweep()
+
+    def __delitem__(self, key: K) -> None:
+        del self._entries[key]
+
+    def __contains__(self, key: object) -> bool:
+        entry = self._entries.get(key)  # type: ignore[arg-type]
+        if entry is None:
+            return False
+        if self._expired(entry[0], time.monotonic()):
+            self._evict(key, "idle")  # type: ignore[arg-type]
+            return False
+        return True
+
+    def __iter__(self) -> Iterator[K]:
+        return iter(list(self._entries))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def values_snapshot(self) -> dict[K, V]:
+        """Plain-dict copy of the current entries, without refreshing them."""
+        return {key: value for key, (_, value) in self._entries.items()}
+
+    def sweep(self) -> None:
+        """Evict idle entries, then the least recently used beyond `max_size`."""
+        now = time.monotonic()
+        while self._entries:
+            key, (last_used, _) = next(iter(self._entries.items()))
+            if not self._expired(last_used, now):
+                break
+            self._evict(key, "idle")
+        while self.max_size is not None and len(self._entries) > self.max_size:
+            self._evict(next(iter(self._entries)), "size")
+
+
+def sweep_all() -> None:
+    """Sweep every registry created in this process."""
+    for registry in _registries:
+        registry.sweep()
+
+
+async def run_sweeper() -> None:
+    """Sweep every registry every `SWEEP_INTERVAL_SECONDS`. Run as a background task."""
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+        try:
+            sweep_all()
+        except Exception as e:
+            _log(f"Sweep failed: {e}")
@@ -1,8 +1,10 @@
 """Backward-compat shim — canonical location is harness.scaffolding."""
 
 from harness.scaffolding import (  # noqa: F401
+    DisplayVariants,
     ScaffoldedResult,
     PhaseResult,
+    generate_display_variants,
     generate_scaffolded_text,
     generate_transliterated_text,
     generate_scaffolded_text_with_metadata,
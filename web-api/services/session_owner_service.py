@@ -0,0 +1,68 @@
+"""Resolved session owners — which user an agent session belongs to.
+
+Every transcript insert, flashcard set and lesson proposal is written with
+the session's `user_id`, and each writer used to look it up with its own
+`SELECT user_id FROM agent_sessions` first. A session's owner never changes,
+so it is recorded here once — when the session row is created or loaded, or
+on the first lookup — and served from memory after that.
+
+Hits and misses are published to `metrics_service` as
+`session_owner.hits` / `session_owner.misses`.
+"""
+
+from typing import Optional
+
+from services import metrics_service
+from services.registry import BoundedRegistry
+from services.supabase_client import get_supabase_async_admin_client
+
+# Owners of sessions idle longer than this are looked up again on next use
+OWNER_IDLE_TTL_SECONDS = 6 * 60 * 60
+MAX_OWNERS = 20000
+
+_owners: BoundedRegistry[str, str] = BoundedRegistry(
+    "session_owners",
+    max_size=MAX_OWNERS,
+    idle_ttl=OWNER_IDLE_TTL_SECONDS,
+)
+
+
+def remember_session_owner(session_id: str, user_id: str) -> None:
+    """Record the owner of a session whose `agent_sessions` row is known."""
+    _owners[session_id] = user_id
+
+
+def forget_session_owner(session_id: str) -> None:
+    """Drop a deleted session's owner."""
+    _owners.pop(session_id, None)
+
+
+async def get_session_owner(session_id: str) -> Optional[str]:
+    """
+    Return the `user_id` that owns a session.
+
+    Args:
+        session_id: The agent session ID
+
+    Returns:
+        The owner's user ID, or None if the session does not exist
+    """
+    user_id = _owners.get(session_id)
+    if user_id is not None:
+        metrics_service.incr("session_owner.hits")
+        return user_id
+
+    metrics_service.incr("session_owner.misses")
+    supabase = get_supabase_async_admin_client()
+    response = await (
+        supabase.table("agent_sessions")
+        .select("user_id")
+        .eq("session_id", session_id)
+        .execute()
+    )
+    if not response.data:
+        return None
+
+    user_id = response.data[0]["user_id"]
+    _owners[session_id] = user_id
+    return user_id
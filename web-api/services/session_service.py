@@ -6,6 +6,8 @@ from harness.session_manager import (  # noqa: F401
     get_session,
     upgrade_session_to_admin,
     delete_session,
+    flush_session,
+    flush_all_sessions,
     get_all_sessions,
     list_user_sessions,
 )
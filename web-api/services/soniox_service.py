@@ -8,14 +8,26 @@ Handles:
 """
 
 import os
-from typing import Dict, Optional
+from typing import Optional
 import httpx
 from dotenv import load_dotenv
 
+from services import state_store
+from services.registry import BoundedRegistry
+
 load_dotenv()
 
-# In-memory storage for mapping transcription IDs to session IDs
-_transcription_jobs: Dict[str, str] = {}
+# Jobs whose webhook never arrives are dropped after a day
+TRANSCRIPTION_JOB_TTL_SECONDS = 24 * 60 * 60
+TRANSCRIPTION_JOB_KEY_PREFIX = "soniox_job:"
+
+# Mapping of transcription IDs to session IDs. Kept in the shared state store
+# when there is one, since the webhook may reach a different worker.
+_transcription_jobs: BoundedRegistry[str, str] = BoundedRegistry(
+    "transcription_jobs",
+    max_size=10_000,
+    idle_ttl=TRANSCRIPTION_JOB_TTL_SECONDS,
+)
 
 # Soniox API configuration
 SONIOX_API_KEY = os.getenv("SONIOX_API_KEY")
@@ -96,7 +108,14 @@ async def create_transcription(file_id: str, session_id: str, target_language: s
         transcription_id = data["id"]
 
         # Store mapping for webhook callback
-        _transcription_jobs[transcription_id] = session_id
+        if state_store.is_shared():
+            await state_store.get_state_store().set(
+                TRANSCRIPTION_JOB_KEY_PREFIX + transcription_id,
+                session_id,
+                ttl=TRANSCRIPTION_JOB_TTL_SECONDS,
+            )
+        else:
+            _transcription_jobs[transcription_id] = session_id
 
         return transcription_id
 
@@ -131,7 +150,7 @@ async def get_transcript(transcription_id: str) -> str:
         return data.get("text", "")
 
 
-def get_session_id(transcription_id: str) -> Optional[str]:
+async def get_session_id(transcription_id: str) -> Optional[str]:
     """
     Look up the session ID associated with a transcription.
 
@@ -141,14 +160,19 @@ def get_session_id(transcription_id: str) -> Optional[str]:
     Returns:
         session_id: Application session ID, or None if not found
     """
+    if state_store.is_shared():
+        return await state_store.get_state_store().get(TRANSCRIPTION_JOB_KEY_PREFIX + transcription_id)
     return _transcription_jobs.get(transcription_id)
 
 
-def remove_transcription_job(transcription_id: str) -> None:
+async def remove_transcription_job(transcription_id: str) -> None:
     """
     Clean up transcription job mapping after processing.
 
     Args:
         transcription_id: Soniox transcription job identifier
     """
-    _transcription_jobs.pop(transcription_id, None)
+    if state_store.is_shared():
+        await state_store.get_state_store().delete(TRANSCRIPTION_JOB_KEY_PREFIX + transcription_id)
+    else:
+        _transcription_jobs.pop(transcription_id, None)
@@ -0,0 +1,240 @@
+"""Pluggable key-value store for state shared between API workers.
+
+Sessions, contexts, WebSocket ownership and transcription jobs used to live
+only in process memory, which pinned every learner to the one worker that
+created their session. This module puts that state behind a small async
+interface so the API can run several workers (and hosts) without sticky
+sessions:
+
+- `MemoryStateStore` — in-process dict. The default; single worker only.
+- `RedisStateStore` — Redis (`STATE_BACKEND=redis`, `REDIS_URL`). Needs the
+  `redis` package, which is only installed where that backend is used.
+
+`MemoryStateStore(shared=True)` behaves like a networked store (values stored
+as strings, pub/sub delivered to every subscriber) and stands in for Redis in
+tests.
+
+Values are strings (callers serialize). Pub/sub is best-effort and used for
+cache invalidation and relaying messages to the worker that owns a socket.
+Every worker has a `WORKER_ID` so it can ignore its own publications.
+"""
+
+import asyncio
+import inspect
+import os
+import sys
+import time
+import uuid
+from abc import ABC, abstractmethod
+from typing import Awaitable, Callable, Optional, Union
+
+from services import metrics_service
+
+# Identifies this process in published messages
+WORKER_ID = uuid.uuid4().hex[:12]
+
+# Channel -> handlers; registered at import time by the modules that own the state
+Handler = Callable[[str], Union[None, Awaitable[None]]]
+_handlers: dict[str, list[Handler]] = {}
+
+_store: Optional["StateStore"] = None
+# Strong references to in-flight background writes (see `spawn`)
+_background: set[asyncio.Task] = set()
+
+
+def _log(msg: str) -> None:
+    print(f"[StateStore] {msg}", flush=True, file=sys.stderr)
+
+
+def subscribe(channel: str, handler: Handler) -> None:
+    """Call `handler(message)` for every message published on `channel`, by any worker."""
+    _handlers.setdefault(channel, []).append(handler)
+
+
+async def dispatch(channel: str, message: str) -> None:
+    """Deliver a published message to this worker's handlers."""
+    for handler in list(_handlers.get(channel, [])):
+        try:
+            result = handler(message)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            _log(f"Handler for {channel} failed: {e}")
+
+
+class StateStore(ABC):
+    """Async key-value store with TTLs and pub/sub."""
+
+    # True when other workers can see this store; callers skip the round trip
+    # (and keep process-local caches authoritative) when it is False.
+    shared: bool = False
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[str]:
+        """Return the value stored at `key`, or None."""
+
+    @abstractmethod
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        """Store `value` at `key`, expiring after `ttl` seconds if given."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Remove `key` if present."""
+
+    @abstractmethod
+    async def publish(self, channel: str, message: str) -> None:
+        """Send `message` to every worker subscribed to `channel`."""
+
+    async def start(self) -> None:
+        """Start delivering published messages to subscribed handlers."""
+
+    async def close(self) -> None:
+        """Release connections and stop listening."""
+
+
+class MemoryStateStore(StateStore):
+    """In-process store. With `shared=True` it doubles as a stand-in for Redis."""
+
+    def __init__(self, *, shared: bool = False):
+        self.shared = shared
+        # key -> (expires_at or None, value)
+        self._data: dict[str, tuple[Optional[float], str]] = {}
+
+    def _purge(self, now: float) -> None:
+        expired = [k for k, (exp, _) in self._data.items() if exp is not None and exp <= now]
+        for key in expired:
+            del self._data[key]
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        now = time.monotonic()
+        self._data[key] = (now + ttl if ttl is not None else None, value)
+        if len(self._data) % 256 == 0:
+            self._purge(now)
+
+    async def delete(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    async def publish(self, channel: str, message: str) -> None:
+        if self.shared:
+            await dispatch(channel, message)
+
+
+class RedisStateStore(StateStore):
+    """Redis-backed store; one connection pool and one pub/sub listener per worker."""
+
+    shared = True
+
+    def __init__(self, url: str):
+        try:
+            import redis.asyncio as redis
+        except ImportError as e:
+            raise RuntimeError(
+                "STATE_BACKEND=redis requires the 'redis' package (uv add redis)"
+            ) from e
+        self._redis = redis.from_url(url, decode_responses=True)
+        self._listener: Optional[asyncio.Task] = None
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self._redis.get(key)
+
+    async def set(self, key: str, value: str, ttl: Optional[float] = None) -> None:
+        await self._redis.set(key, value, px=int(ttl * 1000) if ttl is not None else None)
+
+    async def delete(self, key: str) -> None:
+        await self._redis.delete(key)
+
+    async def publish(self, channel: str, message: str) -> None:
+        await self._redis.publish(channel, message)
+
+    async def start(self) -> None:
+        if self._listener is None and _handlers:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(*_handlers)
+                async for event in pubsub.listen():
+                    if event.get("type") == "message":
+                        metrics_service.incr("state_store.pubsub.received")
+                        await dispatch(event["channel"], event["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _log(f"Pub/sub listener failed, reconnecting: {e}")
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            self._listener = None
+        await self._redis.aclose()
+
+
+def get_state_store() -> StateStore:
+    """Return the process-wide store, selected by `STATE_BACKEND` (default "memory")."""
+    global _store
+    if _store is None:
+        backend = os.getenv("STATE_BACKEND", "memory").lower()
+        if backend == "redis":
+            url = os.getenv("REDIS_URL")
+            if not url:
+                raise ValueError("REDIS_URL environment variable must be set when STATE_BACKEND=redis")
+            _store = RedisStateStore(url)
+        elif backend == "memory":
+            _store = MemoryStateStore()
+        else:
+            raise ValueError(f"Unknown STATE_BACKEND: {backend}")
+        _log(f"Using {type(_store).__name__} (worker {WORKER_ID})")
+    return _store
+
+
+def set_state_store(store: Optional[StateStore]) -> None:
+    """Replace the process-wide store (tests); None re-reads the environment."""
+    global _store
+    _store = store
+
+
+def is_shared() -> bool:
+    """True when state is shared with other workers."""
+    return get_state_store().shared
+
+
+def spawn(coro: Awaitable[None], what: str) -> None:
+    """Run a store write in the background; sync callers cannot await it."""
+    async def _run() -> None:
+        try:
+            await coro
+        except Exception as e:
+            _log(f"{what} failed: {e}")
+
+    try:
+        task = asyncio.get_running_loop().create_task(_run())
+    except RuntimeError:
+        # No loop (sync test or script) — nothing else can observe the store anyway
+        if inspect.iscoroutine(coro):
+            coro.close()
+        return
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+async def close_state_store() -> None:
+    """Close the process-wide store. Call on shutdown."""
+    global _store
+    if _store is not None:
+        await _store.close()
+        _store = None
@@ -1,10 +1,46 @@
-"""Supabase client initialization."""
+"""Supabase client initialization.
+
+Clients are pooled process-wide instead of being built per call:
+
+- one long-lived admin client per flavour (sync and async), and
+- per-token user clients — lightweight views that carry only their own
+  Authorization header — cached LRU so a user's requests reuse one view.
+
+Every sync client shares one keep-alive `httpx.Client` and every async client
+shares one `httpx.AsyncClient`, so a turn's several Supabase calls reuse warm
+connections instead of paying a TCP + TLS handshake each. Sync clients are for
+code that already runs off the event loop; async code uses the async clients.
+Pool and cache numbers are published as gauges in `metrics_service`.
+"""
 
 import os
-from supabase import create_client, Client, ClientOptions
+from collections import OrderedDict
+from typing import Callable, Optional, TypeVar, Union
 
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, Client, ClientOptions, create_client
 
-def get_supabase_admin_client() -> Client:
+from services import metrics_service
+
+# Shared connection pools (one per flavour)
+HTTP_POOL_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+# Per-token user views kept per flavour. Tokens rotate hourly, so this only
+# needs to cover the users active within roughly one token lifetime.
+USER_CLIENT_CACHE_SIZE = 256
+
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_admin_client: Optional[Client] = None
+_async_admin_client: Optional[AsyncClient] = None
+_user_clients: "OrderedDict[str, Client]" = OrderedDict()
+_async_user_clients: "OrderedDict[str, AsyncClient]" = OrderedDict()
+
+T = TypeVar("T", Client, AsyncClient)
+
+
+def _admin_credentials() -> tuple[str, str]:
     url = os.getenv("SUPABASE_URL")
     secret_key = os.getenv("SUPABASE_SECRET_KEY")
 
@@ -14,33 +50,159 @@ def get_supabase_admin_client() -> Client:
     if not secret_key:
         raise ValueError("SUPABASE_SECRET_KEY environment variable is not set")
 
-    client = create_client(
-        url,
-        secret_key,
-    )
-
-    return client
+    return url, secret_key
 
 
-# Function to get a Supabase client for a specific user with access token
-def get_supabase_user_client(access_token: str) -> Client:
+def _user_credentials() -> tuple[str, str]:
     url = os.getenv("SUPABASE_URL")
     publishable_key = os.getenv("SUPABASE_PUBLISHABLE_KEY")
 
     if not url:
         raise ValueError("SUPABASE_URL environment variable is not set")
-    
+
     if not publishable_key:
         raise ValueError("SUPABASE_PUBLISHABLE_KEY environment variable is not set")
-    
-    client = create_client(
-        url,
-        publishable_key,
-        options=ClientOptions(
-            headers={
-                "Authorization": f"Bearer {access_token}"
-            }
+
+    return url, publishable_key
+
+
+def _get_http_client() -> httpx.Client:
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.Client(limits=HTTP_POOL_LIMITS, timeout=HTTP_TIMEOUT)
+    return _http_client
+
+
+def _get_async_http_client() -> httpx.AsyncClient:
+    global _async_http_client
+    if _async_http_client is None or _async_http_client.is_closed:
+        _async_http_client = httpx.AsyncClient(limits=HTTP_POOL_LIMITS, timeout=HTTP_TIMEOUT)
+    return _async_http_client
+
+
+def _user_view(cache: "OrderedDict[str, T]", access_token: str, build: Callable[[], T]) -> T:
+    client = cache.get(access_token)
+    if client is not None:
+        cache.move_to_end(access_token)
+        metrics_service.incr("supabase.user_clients.hits")
+        return client
+
+    metrics_service.incr("supabase.user_clients.misses")
+    client = build()
+    cache[access_token] = client
+    if len(cache) > USER_CLIENT_CACHE_SIZE:
+        cache.popitem(last=False)
+    return client
+
+
+def _auth_headers(access_token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+def get_supabase_admin_client() -> Client:
+    """Shared admin client. Created once; safe to call per request."""
+    global _admin_client
+    if _admin_client is None:
+        url, secret_key = _admin_credentials()
+        _admin_client = create_client(
+            url,
+            secret_key,
+            options=ClientOptions(httpx_client=_get_http_client()),
+        )
+        metrics_service.incr("supabase.clients.created")
+
+    return _admin_client
+
+
+# Function to get a Supabase client for a specific user with access token
+def get_supabase_user_client(access_token: str) -> Client:
+    def build() -> Client:
+        url, publishable_key = _user_credentials()
+        metrics_service.incr("supabase.clients.created")
+        return create_client(
+            url,
+            publishable_key,
+            options=ClientOptions(
+                headers=_auth_headers(access_token),
+                httpx_client=_get_http_client(),
+            ),
+        )
+
+    return _user_view(_user_clients, access_token, build)
+
+
+def get_supabase_async_admin_client() -> AsyncClient:
+    """Shared async admin client. Created once; safe to call per request."""
+    global _async_admin_client
+    if _async_admin_client is None:
+        url, secret_key = _admin_credentials()
+        _async_admin_client = AsyncClient(
+            url,
+            secret_key,
+            options=AsyncClientOptions(httpx_client=_get_async_http_client()),
         )
+        metrics_service.incr("supabase.clients.created")
+
+    return _async_admin_client
+
+
+def get_supabase_async_user_client(access_token: str) -> AsyncClient:
+    """Async client scoped to a user's access token, on the shared pool."""
+    def build() -> AsyncClient:
+        url, publishable_key = _user_credentials()
+        metrics_service.incr("supabase.clients.created")
+        return AsyncClient(
+            url,
+            publishable_key,
+            options=AsyncClientOptions(
+                headers=_auth_headers(access_token),
+                httpx_client=_get_async_http_client(),
+            ),
+        )
+
+    return _user_view(_async_user_clients, access_token, build)
+
+
+def _pool_connections(http_client: Union[httpx.Client, httpx.AsyncClient, None], idle: bool) -> float:
+    if http_client is None or http_client.is_closed:
+        return 0
+    # httpcore's pool sits behind the default transport
+    pool = getattr(getattr(http_client, "_transport", None), "_pool", None)
+    connections = getattr(pool, "connections", [])
+    if idle:
+        return sum(1 for c in connections if c.is_idle())
+    return len(connections)
+
+
+def pool_stats() -> dict[str, float]:
+    """Connection-pool and client-cache numbers for both flavours."""
+    return {
+        "sync.connections": _pool_connections(_http_client, idle=False),
+        "sync.idle_connections": _pool_connections(_http_client, idle=True),
+        "async.connections": _pool_connections(_async_http_client, idle=False),
+        "async.idle_connections": _pool_connections(_async_http_client, idle=True),
+        "sync.user_clients": len(_user_clients),
+        "async.user_clients": len(_async_user_clients),
+        "max_connections": HTTP_POOL_LIMITS.max_connections or 0,
+    }
+
+
+for _stat in pool_stats():
+    metrics_service.register_gauge(
+        f"supabase.pool.{_stat}", lambda stat=_stat: pool_stats()[stat]
     )
 
-    return client
+
+async def close_clients() -> None:
+    """Close both connection pools and drop every pooled client. Call on shutdown."""
+    global _http_client, _async_http_client, _admin_client, _async_admin_client
+    _admin_client = None
+    _async_admin_client = None
+    _user_clients.clear()
+    _async_user_clients.clear()
+    if _async_http_client is not None:
+        await _async_http_client.aclose()
+        _async_http_client = None
+    if _http_client is not None:
+        _http_client.close()
+        _http_client = None
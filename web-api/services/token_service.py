@@ -0,0 +1,205 @@
+"""Supabase access-token verification without a network round trip.
+
+Supabase access tokens are JWTs, so their signature and expiry can be checked
+locally — with the project's JWT secret (HS256 projects) or the project's
+published signing keys (asymmetric projects, JWKS fetched once and cached).
+Decoded users are cached briefly by token hash, so a request that resolves
+the same token in several places verifies it once.
+
+Verification never blocks the event loop: the JWKS fetch runs in a worker
+thread and the Supabase Auth fallback uses the async admin client.
+
+Local verification cannot see sign-outs or deleted users before the token
+expires. Revocation-sensitive callers (admin access) pass
+`check_revocation=True` to always ask Supabase Auth.
+"""
+
+import asyncio
+import hashlib
+import os
+import sys
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import jwt
+
+from services import metrics_service
+
+# Claims are trusted from cache for at most this long (never past `exp`)
+TOKEN_CACHE_TTL_SECONDS = 60
+TOKEN_CACHE_MAX_ENTRIES = 4096
+
+# Supabase issues user tokens for this audience (anonymous users included)
+TOKEN_AUDIENCE = "authenticated"
+
+# Tolerated clock skew between us and Supabase Auth
+LEEWAY_SECONDS = 10
+
+_cache: "OrderedDict[str, tuple[float, TokenUser]]" = OrderedDict()
+_jwks_client: Optional[jwt.PyJWKClient] = None
+
+
+class InvalidTokenError(Exception):
+    """Raised when an access token is malformed, expired, or not signed by Supabase."""
+    pass
+
+
+@dataclass(frozen=True)
+class TokenUser:
+    """The subset of Supabase's `User` the API relies on, read from token claims."""
+
+    id: str
+    email: Optional[str]
+    is_anonymous: bool
+    role: Optional[str]
+    expires_at: Optional[float]
+
+
+def _log(msg: str) -> None:
+    print(f"[TokenService] {msg}", flush=True, file=sys.stderr)
+
+
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _get_jwks_client() -> jwt.PyJWKClient:
+    global _jwks_client
+    if _jwks_client is None:
+        url = os.getenv("SUPABASE_URL")
+        if not url:
+            raise ValueError("SUPABASE_URL environment variable is not set")
+        _jwks_client = jwt.PyJWKClient(
+            f"{url.rstrip('/')}/auth/v1/.well-known/jwks.json",
+            cache_keys=True,
+            lifespan=600,
+        )
+    return _jwks_client
+
+
+def _user_from_claims(claims: dict[str, Any]) -> TokenUser:
+    return TokenUser(
+        id=claims["sub"],
+        email=claims.get("email") or None,
+        is_anonymous=bool(claims.get("is_anonymous", False)),
+        role=claims.get("role"),
+        expires_at=claims.get("exp"),
+    )
+
+
+async def _decode_locally(token: str) -> Optional[TokenUser]:
+    """Verify signature and expiry. Returns None when no local key applies."""
+    try:
+        algorithm = jwt.get_unverified_header(token).get("alg")
+    except jwt.PyJWTError as e:
+        raise InvalidTokenError(f"Malformed token: {e}")
+
+    if algorithm == "HS256":
+        secret = os.getenv("SUPABASE_JWT_SECRET")
+        if not secret:
+            return None
+        key: Any = secret
+    elif algorithm in ("RS256", "ES256"):
+        try:
+            # Served from the client's key cache; fetches the JWKS on a miss
+            signing_key = await asyncio.to_thread(_get_jwks_client().get_signing_key_from_jwt, token)
+            key = signing_key.key
+        except jwt.PyJWKClientError as e:
+            _log(f"JWKS lookup failed, falling back to Supabase Auth: {e}")
+            return None
+    else:
+        raise InvalidTokenError(f"Unsupported token algorithm: {algorithm}")
+
+    try:
+        claims = jwt.decode(
+            token,
+            key,
+            algorithms=[algorithm],
+            audience=TOKEN_AUDIENCE,
+            leeway=LEEWAY_SECONDS,
+            options={"require": ["exp", "sub"]},
+        )
+    except jwt.PyJWTError as e:
+        raise InvalidTokenError(f"Invalid or expired token: {e}")
+    return _user_from_claims(claims)
+
+
+async def _fetch_from_auth(token: str) -> TokenUser:
+    """Ask Supabase Auth — sees revocations, costs a round trip."""
+    from services.supabase_client import get_supabase_async_admin_client
+
+    try:
+        response = await get_supabase_async_admin_client().auth.get_user(token)
+    except Exception as e:
+        raise InvalidTokenError(f"Invalid or expired token: {e}")
+    if not response or not response.user:
+        raise InvalidTokenError("Invalid or expired token")
+
+    user = response.user
+    try:
+        expires_at = jwt.decode(token, options={"verify_signature": False}).get("exp")
+    except jwt.PyJWTError:
+        expires_at = None
+    return TokenUser(
+        id=user.id,
+        email=user.email,
+        is_anonymous=bool(getattr(user, "is_anonymous", False)),
+        role=user.role,
+        expires_at=expires_at,
+    )
+
+
+async def verify_token(token: str, *, check_revocation: bool = False) -> TokenUser:
+    """
+    Verify a Supabase access token and return its user.
+
+    Args:
+        token: The Bearer access token
+        check_revocation: Always confirm with Supabase Auth (skips the cache)
+
+    Returns:
+        TokenUser: The authenticated user
+
+    Raises:
+        InvalidTokenError: If the token is invalid, expired, or revoked
+    """
+    if not token:
+        raise InvalidTokenError("Missing token")
+
+    if check_revocation:
+        metrics_service.incr("auth.verify.network")
+        return await _fetch_from_auth(token)
+
+    key = _token_key(token)
+    now = time.time()
+    cached = _cache.get(key)
+    if cached is not None:
+        cached_until, user = cached
+        if now < cached_until:
+            _cache.move_to_end(key)
+            metrics_service.incr("auth.token_cache.hits")
+            return user
+        del _cache[key]
+    metrics_service.incr("auth.token_cache.misses")
+
+    user = await _decode_locally(token)
+    if user is not None:
+        metrics_service.incr("auth.verify.local")
+    else:
+        metrics_service.incr("auth.verify.network")
+        user = await _fetch_from_auth(token)
+
+    cached_until = now + TOKEN_CACHE_TTL_SECONDS
+    if user.expires_at is not None:
+        cached_until = min(cached_until, user.expires_at)
+    _cache[key] = (cached_until, user)
+    if len(_cache) > TOKEN_CACHE_MAX_ENTRIES:
+        _cache.popitem(last=False)
+    return user
+
+
+def clear_cache() -> None:
+    """Forget every cached verification."""
+    _cache.clear()
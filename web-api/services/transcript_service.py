@@ -1,10 +1,65 @@
-"""Transcript message service for managing transcript message persistence."""
+"""Transcript message service for managing transcript message persistence.
 
+Rows are written behind: `create_transcript_message(s)` builds the row and
+returns it at once, and a background writer inserts queued rows in
+multi-row batches (up to `WRITE_BATCH_SIZE` rows, or whatever arrived within
+`WRITE_FLUSH_INTERVAL_SECONDS`). One writer drains one FIFO queue, so rows
+land in the order they were created. When the database falls behind and
+`MAX_PENDING_WRITES` rows are waiting, callers wait for room (backpressure).
+`flush_transcript_writes()` drains the queue; the app calls it on shutdown.
+Reads of a session with unwritten rows wait for that session's rows only
+(`_TranscriptWriter.flush_session`), not for every other session's.
+
+Rows that still fail after a retry are dropped, logged and counted in
+`transcripts.write_failed`; callers have already been handed the rows.
+"""
+
+import asyncio
+import base64
+import sys
+import time
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import Optional
 from pydantic import BaseModel
-from .supabase_client import get_supabase_admin_client
+from . import metrics_service
+from . import vocab_service
+from .session_owner_service import get_session_owner
+from .supabase_client import get_supabase_async_admin_client
+
+WRITE_BATCH_SIZE = 100
+WRITE_FLUSH_INTERVAL_SECONDS = 0.05
+MAX_PENDING_WRITES = 1000
+# A failed batch is retried once after this delay, then row by row
+WRITE_RETRY_DELAY_SECONDS = 0.5
+
+
+# Page size for keyset reads (`get_session_messages_page`)
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+# Columns a page read can project; the cursor columns are always read
+TRANSCRIPT_COLUMNS = (
+    "message_id",
+    "session_id",
+    "user_id",
+    "message_source",
+    "message_kind",
+    "message_text",
+    "message_text_canonical",
+    "message_text_scaffolded",
+    "message_text_transliterated",
+    "highlights",
+    "flow",
+    "node",
+    "created_at",
+    "updated_at",
+)
+_CURSOR_COLUMNS = ("created_at", "message_id")
+
+
+def _log(msg: str) -> None:
+    print(f"[TranscriptService] {msg}", flush=True, file=sys.stderr)
 
 
 class TranscriptMessageInput(BaseModel):
@@ -66,24 +121,7 @@ async def create_transcript_message(
     Raises:
         ValueError: If session not found or user_id cannot be determined
     """
-    # Get the user_id from the agent_sessions table
-    supabase = get_supabase_admin_client()
-    session_response = supabase.table("agent_sessions").select("user_id").eq("session_id", session_id).execute()
-
-    if not session_response.data:
-        raise ValueError(f"Session not found: {session_id}")
-
-    user_id = session_response.data[0]["user_id"]
-
-    # Generate a new message ID
-    message_id = str(uuid.uuid4())
-    now = datetime.now()
-
-    # Create the message object
-    message = TranscriptMessage(
-        message_id=message_id,
-        session_id=session_id,
-        user_id=user_id,
+    draft = TranscriptMessageInput(
         message_source=message_source,
         message_kind=message_kind,
         message_text=message_text,
@@ -93,11 +131,183 @@ async def create_transcript_message(
         highlights=highlights or [],
         flow=flow,
         node=node,
-        created_at=now,
-        updated_at=now,
     )
+    (message,) = await create_transcript_messages(session_id, [draft])
+    return message
+
+
+async def create_transcript_messages(
+    session_id: str,
+    drafts: list[TranscriptMessageInput],
+) -> list[TranscriptMessage]:
+    """
+    Queue several transcript messages for one session, inserted together.
+
+    Rows get strictly increasing `created_at` values in list order, so reads
+    ordered by `created_at` return them in the order given. Returns as soon
+    as the rows are queued; the insert happens in the background writer.
+
+    Args:
+        session_id: The session ID the messages belong to
+        drafts: Message contents, in display order
+
+    Returns:
+        list[TranscriptMessage]: The created messages, in the same order
+
+    Raises:
+        ValueError: If session not found or user_id cannot be determined
+    """
+    if not drafts:
+        return []
+
+    # Usually already known from when the session was created or loaded
+    user_id = await get_session_owner(session_id)
+    if user_id is None:
+        raise ValueError(f"Session not found: {session_id}")
+
+    now = datetime.now()
+    messages = [
+        TranscriptMessage(
+            message_id=str(uuid.uuid4()),
+            session_id=session_id,
+            user_id=user_id,
+            created_at=now + timedelta(microseconds=i),
+            updated_at=now + timedelta(microseconds=i),
+            **draft.model_dump(),
+        )
+        for i, draft in enumerate(drafts)
+    ]
+
+    await _writer.enqueue(session_id, [_insert_data(m) for m in messages])
+
+    # Highlighted words are the learner's vocabulary (see vocab_service)
+    for message in messages:
+        if message.message_source == "tutor" and message.highlights:
+            vocab_service.record_highlights(user_id, message.highlights)
+    return messages
+
+
+class _TranscriptWriter:
+    """Single background task that inserts queued rows in batches."""
+
+    def __init__(self) -> None:
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # session_id -> rows queued but not yet written
+        self._pending: dict[str, int] = {}
+        # session_id -> set once that session has no unwritten rows
+        self._drained: dict[str, asyncio.Event] = {}
+
+    def pending(self) -> int:
+        return sum(self._pending.values())
+
+    def _ensure_started(self) -> asyncio.Queue:
+        loop = asyncio.get_running_loop()
+        if self._queue is None or self._loop is not loop:
+            # First use, or a new event loop (tests); rows queued on a closed
+            # loop cannot be written any more
+            self._queue = asyncio.Queue(maxsize=MAX_PENDING_WRITES)
+            self._loop = loop
+            self._task = None
+            self._pending.clear()
+            for event in self._drained.values():
+                event.set()
+            self._drained.clear()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return self._queue
+
+    async def enqueue(self, session_id: str, rows: list[dict]) -> None:
+        queue = self._ensure_started()
+        for row in rows:
+            # Waits while MAX_PENDING_WRITES rows are queued
+            await queue.put(row)
+            self._pending[session_id] = self._pending.get(session_id, 0) + 1
+            if session_id not in self._drained:
+                self._drained[session_id] = asyncio.Event()
+
+    async def flush(self) -> None:
+        if self._queue is not None and self._loop is asyncio.get_running_loop():
+            self._ensure_started()
+            await self._queue.join()
+
+    async def flush_session(self, session_id: str) -> None:
+        """Wait until this session's queued rows are written (other sessions' may remain)."""
+        event = self._drained.get(session_id)
+        if event is not None and self._loop is asyncio.get_running_loop():
+            self._ensure_started()
+            await event.wait()
+
+    def _row_done(self, session_id: str) -> None:
+        self._pending[session_id] -= 1
+        if self._pending[session_id] <= 0:
+            del self._pending[session_id]
+            event = self._drained.pop(session_id, None)
+            if event is not None:
+                event.set()
+
+    async def _run(self) -> None:
+        queue = self._queue
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + WRITE_FLUSH_INTERVAL_SECONDS
+            while len(batch) < WRITE_BATCH_SIZE:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write(batch)
+            finally:
+                for row in batch:
+                    self._row_done(row["session_id"])
+                    queue.task_done()
+
+    async def _write(self, batch: list[dict]) -> None:
+        started = time.monotonic()
+        try:
+            await self._insert(batch)
+        except Exception as e:
+            _log(f"Batch of {len(batch)} rows failed ({e}); retrying")
+            await asyncio.sleep(WRITE_RETRY_DELAY_SECONDS)
+            try:
+                await self._insert(batch)
+            except Exception:
+                # Keep every row that can be written; drop only the bad ones
+                for row in batch:
+                    try:
+                        await self._insert([row])
+                    except Exception as e:
+                        metrics_service.incr("transcripts.write_failed")
+                        _log(f"Dropping transcript row {row['message_id']}: {e}")
+        metrics_service.observe("transcripts.flush_ms", (time.monotonic() - started) * 1000)
+
+    async def _insert(self, rows: list[dict]) -> None:
+        supabase = get_supabase_async_admin_client()
+        await supabase.table("transcript_messages").insert(rows).execute()
+        metrics_service.incr("transcripts.batches")
+        metrics_service.incr("transcripts.rows_written", len(rows))
+
 
-    # Build insert data
+_writer = _TranscriptWriter()
+metrics_service.register_gauge("transcripts.pending", _writer.pending)
+
+
+async def flush_transcript_writes() -> None:
+    """Wait until every queued transcript row has been written."""
+    await _writer.flush()
+
+
+def _insert_data(message: TranscriptMessage) -> dict:
+    """Build the insert row for a message, omitting unset optional columns."""
     insert_data = {
         "message_id": message.message_id,
         "session_id": message.session_id,
@@ -120,11 +330,108 @@ async def create_transcript_message(
         insert_data["flow"] = message.flow
     if message.node is not None:
         insert_data["node"] = message.node
+    return insert_data
 
-    # Insert into database
-    supabase.table("transcript_messages").insert(insert_data).execute()
 
-    return message
+class TranscriptPage(BaseModel):
+    """One keyset page of a session's transcript, oldest first."""
+    rows: list[dict]
+    # Position after the last row returned (or the cursor passed in, if the
+    # page is empty) — pass back as `after` for the next page or a refresh
+    cursor: Optional[str] = None
+    has_more: bool = False
+
+
+def encode_cursor(created_at: str, message_id: str) -> str:
+    """Opaque cursor for the position just after a row."""
+    raw = f"{created_at}|{message_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[str, str]:
+    """
+    Split a cursor from `encode_cursor` back into (created_at, message_id).
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, message_id = raw.split("|")
+        datetime.fromisoformat(created_at.replace("Z", "+00:00"))
+        uuid.UUID(message_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+    return created_at, message_id
+
+
+async def get_session_messages_page(
+    session_id: str,
+    *,
+    after: Optional[str] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    columns: Optional[list[str]] = None,
+) -> TranscriptPage:
+    """
+    Read one page of a session's transcript, keyed on (created_at, message_id).
+
+    Reads only the rows after `after`, so the cost is one index range scan of
+    `limit` rows however long the session is (see the
+    `idx_transcript_messages_session_keyset` index). The same cursor serves
+    paging through history and polling for rows added since the last read.
+
+    Args:
+        session_id: The session ID to read
+        after: Cursor from a previous page; None starts at the beginning
+        limit: Maximum rows to return (capped at MAX_PAGE_SIZE)
+        columns: Columns to return (subset of TRANSCRIPT_COLUMNS); all if None
+
+    Returns:
+        TranscriptPage with the rows as plain dicts
+
+    Raises:
+        ValueError: If the cursor is malformed or a column is unknown
+    """
+    if columns is None:
+        columns = list(TRANSCRIPT_COLUMNS)
+    unknown = set(columns) - set(TRANSCRIPT_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown transcript columns: {', '.join(sorted(unknown))}")
+    selected = list(dict.fromkeys([*columns, *_CURSOR_COLUMNS]))
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    await _writer.flush_session(session_id)
+
+    supabase = get_supabase_async_admin_client()
+    query = (
+        supabase.table("transcript_messages")
+        .select(",".join(selected))
+        .eq("session_id", session_id)
+    )
+    if after:
+        created_at, message_id = decode_cursor(after)
+        query = query.or_(
+            f'created_at.gt."{created_at}",'
+            f'and(created_at.eq."{created_at}",message_id.gt.{message_id})'
+        )
+    # One extra row tells us whether another page follows
+    response = await (
+        query.order("created_at").order("message_id").limit(limit + 1).execute()
+    )
+
+    rows = response.data or []
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["message_id"]) if rows else after
+    projected = [{c: row.get(c) for c in columns} for row in rows]
+    if "highlights" in columns:
+        for row in projected:
+            row["highlights"] = row["highlights"] or []
+    return TranscriptPage(
+        rows=projected,
+        cursor=cursor,
+        has_more=has_more,
+    )
 
 
 async def get_session_messages(
@@ -141,14 +448,17 @@ async def get_session_messages(
     Returns:
         List of TranscriptMessage objects for the session
     """
-    supabase = get_supabase_admin_client()
+    # Read our own writes
+    await _writer.flush_session(session_id)
+
+    supabase = get_supabase_async_admin_client()
 
     query = supabase.table("transcript_messages").select("*").eq("session_id", session_id).order("created_at", desc=False)
 
     if limit:
         query = query.limit(limit)
 
-    response = query.execute()
+    response = await query.execute()
 
     if not response.data:
         return []
@@ -172,3 +482,56 @@ async def get_session_messages(
         )
         for msg in response.data
     ]
+
+
+async def update_transcript_variants(session_id: str, message_id: str, variants: dict) -> None:
+    """
+    Fill in display-variant columns of an existing message.
+
+    Args:
+        session_id: The session the message belongs to
+        message_id: The message to update
+        variants: Column values, e.g. `message_text_transliterated`
+    """
+    # The row may still be waiting in the write-behind queue
+    await _writer.flush_session(session_id)
+
+    supabase = get_supabase_async_admin_client()
+    await (
+        supabase.table("transcript_messages")
+        .update({**variants, "updated_at": datetime.now().isoformat()})
+        .eq("message_id", message_id)
+        .execute()
+    )
+
+
+async def get_messages_missing_variant(
+    session_id: str, column: str, limit: Optional[int] = None
+) -> list[dict]:
+    """
+    List a session's tutor messages that have canonical text but no `column`.
+
+    Args:
+        session_id: The session ID
+        column: A display-variant column, e.g. `message_text_scaffolded`
+        limit: At most this many rows (the most recent)
+
+    Returns:
+        Rows with `message_id` and `message_text_canonical`, newest first
+    """
+    await _writer.flush_session(session_id)
+
+    supabase = get_supabase_async_admin_client()
+    query = (
+        supabase.table("transcript_messages")
+        .select("message_id, message_text_canonical")
+        .eq("session_id", session_id)
+        .eq("message_source", "tutor")
+        .is_(column, "null")
+        .not_.is_("message_text_canonical", "null")
+        .order("created_at", desc=True)
+    )
+    if limit is not None:
+        query = query.limit(limit)
+    response = await query.execute()
+    return response.data or []
@@ -0,0 +1,277 @@
+"""Per-user learned vocabulary, indexed by Arabic stem.
+
+Words a learner has met are recorded as they happen: the highlighted
+Arabizi words of tutor transcript messages (those with their canonical
+Arabic) and the cards of completed flashcard sets. Each word is keyed by a
+light stem of its Arabic (`stem`), so سيارة, السيارات and سيارتي are one
+entry, and counted in the `learned_vocabulary` table.
+
+Scaffolding doesn't get the whole list. `select_learned_words` stems the
+canonical text being scaffolded and returns only the learner's words whose
+stems occur in it, best known first, capped at `MAX_PROMPT_WORDS` — so the
+prompt stays the same size however many words a learner knows.
+
+Each worker keeps a learner's index in memory (`BoundedRegistry`) after the
+first lookup and updates it on every recorded word; table writes happen in
+the background.
+"""
+
+import asyncio
+import re
+import sys
+import time
+import unicodedata
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from services import metrics_service
+from services.registry import BoundedRegistry
+from services.session_owner_service import get_session_owner
+from services.supabase_client import get_supabase_async_admin_client
+
+TABLE = "learned_vocabulary"
+RECORD_RPC = "record_learned_vocabulary"
+
+# Learned words offered to one scaffolding call
+MAX_PROMPT_WORDS = 12
+# Entries loaded per learner (most-seen first)
+MAX_INDEXED_WORDS = 5000
+MAX_INDEXED_USERS = 2000
+INDEX_IDLE_TTL_SECONDS = 60 * 60
+# A flashcard counts as this many sightings when ranking
+FLASHCARD_WEIGHT = 5
+
+_HARAKAT = re.compile(r"[ً-ٰٟـ]")
+_ARABIC_WORD = re.compile(r"[ء-يً-ٰٟـ]+")
+_LETTER_FOLDS = str.maketrans({"أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا", "ى": "ي", "ة": "ه", "ؤ": "ء", "ئ": "ء"})
+# Affixes in the style of the Light10 stemmer, longest first. Single-letter
+# prepositions (ب ل ك) and the future س are left alone: they collide with
+# too many root letters without a dictionary.
+_CONJUNCTIONS = ("و", "ف")
+_PREFIXES = ("وال", "فال", "بال", "كال", "لل", "ال")
+_PRONOUN_SUFFIXES = ("كما", "هما", "ها", "هم", "هن", "كم", "كن", "نا", "ني", "ه", "ي", "ك")
+_SUFFIXES = ("ات", "ان", "ون", "ين", "يه", "ه", "ي")
+# Never strip below this many letters
+MIN_STEM = 3
+
+
+def _log(msg: str) -> None:
+    print(f"[VocabService] {msg}", flush=True, file=sys.stderr)
+
+
+def stem(word: str) -> str:
+    """
+    Light stem of an Arabic word: harakaat removed, letter variants folded,
+    then the article (with a leading conjunction or preposition), one
+    possessive pronoun and one plural/feminine ending stripped while at
+    least `MIN_STEM` letters remain.
+    """
+    word = _HARAKAT.sub("", unicodedata.normalize("NFC", word)).translate(_LETTER_FOLDS)
+    for prefix in _PREFIXES:
+        if word.startswith(prefix) and len(word) - len(prefix) >= MIN_STEM:
+            word = word[len(prefix):]
+            break
+    else:
+        # و/ف before a possessed noun: وسيارتي
+        if word[:1] in _CONJUNCTIONS and len(word) > MIN_STEM + 1 and word.endswith(_PRONOUN_SUFFIXES):
+            word = word[1:]
+    for suffix in _PRONOUN_SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            word = word[: -len(suffix)]
+            # Taa marbuta is written ت before a pronoun: سيارتي
+            if word.endswith("ت") and len(word) > MIN_STEM + 1:
+                word = word[:-1]
+            break
+    for suffix in _SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            word = word[: -len(suffix)]
+            break
+    return word
+
+
+def stems_of(text: str) -> set[str]:
+    """Stems of every Arabic word in a text."""
+    return {stem(w) for w in _ARABIC_WORD.findall(text)}
+
+
+@dataclass
+class VocabEntry:
+    """One learned word, as known to this worker."""
+
+    stem: str
+    canonical: str
+    arabizi: Optional[str] = None
+    meaning: Optional[str] = None
+    seen_count: int = 0
+    flashcard: bool = False
+    # Unix time of the latest sighting
+    last_seen: float = 0.0
+
+    def rank(self) -> tuple[int, float]:
+        return (self.seen_count + (FLASHCARD_WEIGHT if self.flashcard else 0), self.last_seen)
+
+    def prompt_form(self) -> str:
+        # Same shape as the prompt's own example: "sayaara" (سيارة)
+        return f'"{self.arabizi}" ({self.canonical})' if self.arabizi else self.canonical
+
+
+_indexes: BoundedRegistry[str, dict[str, VocabEntry]] = BoundedRegistry(
+    "learned_vocab",
+    max_size=MAX_INDEXED_USERS,
+    idle_ttl=INDEX_IDLE_TTL_SECONDS,
+)
+_background: set[asyncio.Task] = set()
+
+
+def _spawn(coro) -> None:
+    try:
+        task = asyncio.get_running_loop().create_task(coro)
+    except RuntimeError:
+        coro.close()
+        return
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+
+def _timestamp(value: Optional[str]) -> float:
+    """Unix time of a Supabase timestamp column; 0 when absent or unparseable."""
+    if not value:
+        return 0.0
+    try:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return 0.0
+
+
+async def _load_index(user_id: str) -> dict[str, VocabEntry]:
+    index = _indexes.get(user_id)
+    if index is not None:
+        return index
+
+    metrics_service.incr("learned_vocab.loads")
+    response = await (
+        get_supabase_async_admin_client()
+        .table(TABLE)
+        .select("stem, canonical, arabizi, meaning, seen_count, flashcard, last_seen_at")
+        .eq("user_id", user_id)
+        .order("seen_count", desc=True)
+        .limit(MAX_INDEXED_WORDS)
+        .execute()
+    )
+    index = {
+        row["stem"]: VocabEntry(
+            stem=row["stem"],
+            canonical=row["canonical"],
+            arabizi=row.get("arabizi"),
+            meaning=row.get("meaning"),
+            seen_count=row.get("seen_count") or 0,
+            flashcard=bool(row.get("flashcard")),
+            last_seen=_timestamp(row.get("last_seen_at")),
+        )
+        for row in response.data or []
+    }
+    _indexes[user_id] = index
+    return index
+
+
+def record_words(user_id: str, words: list[dict], flashcard: bool = False) -> None:
+    """
+    Record sightings of words for a learner, in memory now and in the table
+    in the background.
+
+    Args:
+        user_id: The learner
+        words: Dicts with `canonical` (Arabic) and optionally `arabizi`, `meaning`
+        flashcard: The words come from a completed flashcard set
+    """
+    batch: dict[str, dict] = {}
+    for word in words:
+        canonical = (word.get("canonical") or "").strip()
+        key = stem(canonical) if canonical else ""
+        if not key:
+            continue
+        entry = batch.setdefault(key, {
+            "stem": key,
+            "canonical": canonical,
+            "arabizi": word.get("arabizi"),
+            "meaning": word.get("meaning"),
+            "count": 0,
+            "flashcard": flashcard,
+        })
+        entry["count"] += 1
+    if not batch:
+        return
+
+    index = _indexes.get(user_id)
+    if index is not None:
+        now = time.time()
+        for key, word in batch.items():
+            entry = index.get(key)
+            if entry is None:
+                entry = index[key] = VocabEntry(stem=key, canonical=word["canonical"])
+            entry.arabizi = word["arabizi"] or entry.arabizi
+            entry.meaning = word["meaning"] or entry.meaning
+            entry.seen_count += word["count"]
+            entry.flashcard = entry.flashcard or flashcard
+            entry.last_seen = now
+    metrics_service.incr("learned_vocab.recorded", len(batch))
+    _spawn(_write(user_id, list(batch.values())))
+
+
+async def _write(user_id: str, words: list[dict]) -> None:
+    try:
+        await get_supabase_async_admin_client().rpc(
+            RECORD_RPC, {"p_user_id": user_id, "p_words": words}
+        ).execute()
+    except Exception as e:
+        _log(f"Failed to record {len(words)} words for {user_id}: {e}")
+
+
+def record_highlights(user_id: str, highlights: list[dict]) -> None:
+    """Record the highlighted words of a tutor message (those with canonical Arabic)."""
+    record_words(
+        user_id,
+        [
+            {"canonical": h.get("canonical"), "arabizi": h.get("word"), "meaning": h.get("meaning")}
+            for h in highlights
+            if h.get("canonical")
+        ],
+    )
+
+
+async def select_learned_words(user_id: str, text: str, limit: int = MAX_PROMPT_WORDS) -> list[str]:
+    """
+    The learner's words whose stems occur in `text`, best known first.
+
+    Args:
+        user_id: The learner
+        text: Canonical Arabic about to be scaffolded
+        limit: Maximum number of words returned
+
+    Returns:
+        Words formatted for the scaffolding prompt; empty on any failure
+    """
+    stems = stems_of(text)
+    if not stems:
+        return []
+    try:
+        index = await _load_index(user_id)
+    except Exception as e:
+        _log(f"Failed to load vocabulary for {user_id}: {e}")
+        return []
+    matches = sorted((index[s] for s in stems if s in index), key=VocabEntry.rank, reverse=True)
+    metrics_service.observe("learned_vocab.selected", min(len(matches), limit))
+    return [entry.prompt_form() for entry in matches[:limit]]
+
+
+async def select_learned_words_for_session(session_id: str, text: str) -> list[str]:
+    """`select_learned_words` for the owner of an agent session."""
+    try:
+        user_id = await get_session_owner(session_id)
+    except Exception as e:
+        _log(f"Failed to resolve owner of {session_id}: {e}")
+        return []
+    if user_id is None:
+        return []
+    return await select_learned_words(user_id, text)
@@ -0,0 +1,103 @@
+"""Unit tests for the chat session loop's concurrent receive side."""
+
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.websockets import WebSocketDisconnect
+
+from channels.chat import session_loop
+from channels.chat.session_loop import start_session_loop
+
+TURN_SECONDS = 0.2
+
+
+class FakeWebSocket:
+    """Feeds queued frames to `receive_text`; `None` disconnects."""
+
+    def __init__(self) -> None:
+        self.frames: asyncio.Queue = asyncio.Queue()
+
+    async def receive_text(self) -> str:
+        frame = await self.frames.get()
+        if frame is None:
+            raise WebSocketDisconnect()
+        return frame
+
+
+@pytest.fixture
+def loop_io():
+    dispatched: list[str] = []
+
+    async def slow_turn(session_id, user_message=None, **kwargs):
+        dispatched.append(user_message)
+        await asyncio.sleep(TURN_SECONDS)
+
+    with patch.object(session_loop, "dispatch_turn", side_effect=slow_turn), \
+            patch.object(session_loop, "create_transcript_message", AsyncMock()), \
+            patch.object(session_loop, "send_message", AsyncMock()) as send:
+        yield dispatched, send
+
+
+def _options() -> SimpleNamespace:
+    return SimpleNamespace(
+        idle_followups=False,
+        user_message_kind="text",
+        flow_tag=None,
+        turn_config=lambda: None,
+    )
+
+
+async def test_ping_is_answered_while_a_turn_runs(loop_io):
+    dispatched, send = loop_io
+    ws = FakeWebSocket()
+    loop = asyncio.create_task(
+        start_session_loop(ws, "loop-1", agent=None, options=_options())
+    )
+
+    ws.frames.put_nowait("hello")
+    await asyncio.sleep(0.02)
+    ws.frames.put_nowait('{"kind": "ping"}')
+    await asyncio.sleep(0.02)
+
+    assert dispatched == ["hello"]
+    (call,) = send.await_args_list
+    assert call.args[1].kind == "pong"
+
+    ws.frames.put_nowait(None)
+    await loop
+
+
+async def test_messages_sent_during_a_turn_are_answered_together(loop_io):
+    dispatched, _ = loop_io
+    ws = FakeWebSocket()
+    loop = asyncio.create_task(
+        start_session_loop(ws, "loop-2", agent=None, options=_options())
+    )
+
+    ws.frames.put_nowait("one")
+    await asyncio.sleep(0.02)
+    ws.frames.put_nowait("two")
+    ws.frames.put_nowait("three")
+    await asyncio.sleep(TURN_SECONDS * 2)
+
+    assert dispatched == ["one", "two\n\nthree"]
+
+    ws.frames.put_nowait(None)
+    await loop
+
+
+async def test_disconnect_stops_the_running_turn(loop_io):
+    dispatched, _ = loop_io
+    ws = FakeWebSocket()
+    loop = asyncio.create_task(
+        start_session_loop(ws, "loop-3", agent=None, options=_options())
+    )
+
+    ws.frames.put_nowait("hello")
+    await asyncio.sleep(0.02)
+    ws.frames.put_nowait(None)
+
+    await asyncio.wait_for(loop, timeout=TURN_SECONDS / 2)
+    assert dispatched == ["hello"]
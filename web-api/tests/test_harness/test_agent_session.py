@@ -0,0 +1,190 @@
+"""Unit tests for the Supabase-backed AgentSession item log and its write-behind cache."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from harness import session as session_module
+from harness.session import AgentSession
+
+
+def _client() -> MagicMock:
+    """Async Supabase client stand-in; `execute()` is awaited on every query."""
+    client = MagicMock()
+    client.rpc.return_value.execute = AsyncMock()
+    return client
+
+
+def _session(client) -> AgentSession:
+    return AgentSession("session-1", MagicMock(), db=client)
+
+
+def _stored(client, items):
+    query = client.table.return_value.select.return_value.eq.return_value
+    query.order.return_value.execute = AsyncMock(
+        return_value=MagicMock(data=[{"item": i} for i in items])
+    )
+    return query
+
+
+@pytest.mark.asyncio
+async def test_get_items_loads_once_then_serves_from_memory():
+    client = _client()
+    query = _stored(client, [{"content": "first"}, {"content": "second"}])
+    session = _session(client)
+
+    assert [i["content"] for i in await session.get_items()] == ["first", "second"]
+    assert [i["content"] for i in await session.get_items(limit=1)] == ["second"]
+
+    client.table.assert_called_once_with("agent_session_items")
+    query.order.assert_called_once_with("seq")
+
+
+@pytest.mark.asyncio
+async def test_add_items_is_visible_immediately_and_flushed_in_one_append():
+    client = _client()
+    _stored(client, [])
+    session = _session(client)
+    await session.get_items()
+
+    await session.add_items([{"role": "user", "content": "marhaba"}])
+    await session.add_items([{"role": "assistant", "content": "ahlan"}])
+
+    assert [i["content"] for i in await session.get_items()] == ["marhaba", "ahlan"]
+    client.rpc.assert_not_called()
+
+    await session.flush()
+
+    client.rpc.assert_called_once_with(
+        "append_agent_session_items",
+        {
+            "p_session_id": "session-1",
+            "p_items": [
+                {"role": "user", "content": "marhaba"},
+                {"role": "assistant", "content": "ahlan"},
+            ],
+        },
+    )
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_items_pending_in_order():
+    client = _client()
+    client.rpc.return_value.execute.side_effect = [RuntimeError("db down"), MagicMock()]
+    session = _session(client)
+
+    await session.add_items([{"content": "a"}])
+    with pytest.raises(RuntimeError):
+        await session.flush()
+    await session.add_items([{"content": "b"}])
+    await session.flush()
+
+    _, payload = client.rpc.call_args.args
+    assert payload["p_items"] == [{"content": "a"}, {"content": "b"}]
+
+
+@pytest.mark.asyncio
+async def test_add_items_flushes_when_buffer_is_full(monkeypatch):
+    monkeypatch.setattr(session_module, "FLUSH_MAX_PENDING", 2)
+    client = _client()
+    session = _session(client)
+
+    await session.add_items([{"content": "a"}, {"content": "b"}])
+
+    client.rpc.assert_called_once()
+
+
+@pytest.mark.asyncio
+async def test_pop_item_drops_unflushed_item_locally():
+    client = _client()
+    _stored(client, [{"content": "stored"}])
+    session = _session(client)
+
+    await session.add_items([{"content": "pending"}])
+    item = await session.pop_item()
+
+    assert item == {"content": "pending"}
+    client.rpc.assert_not_called()
+    assert [i["content"] for i in await session.get_items()] == ["stored"]
+
+
+@pytest.mark.asyncio
+async def test_pop_item_deletes_last_stored_row():
+    client = _client()
+    _stored(client, [{"content": "first"}, {"content": "last"}])
+    session = _session(client)
+
+    item = await session.pop_item()
+
+    assert item == {"content": "last"}
+    client.rpc.assert_called_once_with("pop_agent_session_item", {"p_session_id": "session-1"})
+
+
+@pytest.mark.asyncio
+async def test_pop_item_empty_session():
+    client = _client()
+    _stored(client, [])
+    assert await _session(client).pop_item() is None
+
+
+@pytest.mark.asyncio
+async def test_uncached_limited_read_fetches_only_the_tail():
+    client = _client()
+    query = client.table.return_value.select.return_value.eq.return_value
+    # Newest first, as the descending query returns them
+    query.order.return_value.limit.return_value.execute = AsyncMock(
+        return_value=MagicMock(data=[{"item": {"content": "c"}}, {"item": {"content": "b"}}])
+    )
+    session = AgentSession("session-1", MagicMock(), db=client, cache_history=False)
+
+    assert [i["content"] for i in await session.get_items(limit=2)] == ["b", "c"]
+
+    query.order.assert_called_once_with("seq", desc=True)
+    query.order.return_value.limit.assert_called_once_with(2)
+
+
+@pytest.mark.asyncio
+async def test_first_read_waits_for_an_in_flight_flush():
+    client = _client()
+    stored: list[dict] = []
+    query = client.table.return_value.select.return_value.eq.return_value
+    query.order.return_value.execute = AsyncMock(
+        side_effect=lambda: MagicMock(data=[{"item": i} for i in stored])
+    )
+    release = asyncio.Event()
+
+    async def _append():
+        await release.wait()
+        stored.extend(client.rpc.call_args.args[1]["p_items"])
+
+    client.rpc.return_value.execute = AsyncMock(side_effect=_append)
+    session = _session(client)
+    await session.add_items([{"content": "a"}])
+
+    flush = asyncio.create_task(session.flush())
+    await asyncio.sleep(0)
+    read = asyncio.create_task(session.get_items())
+    await asyncio.sleep(0)
+    release.set()
+    await flush
+
+    assert [i["content"] for i in await read] == ["a"]
+
+
+@pytest.mark.asyncio
+async def test_ensure_exists_creates_the_row_through_the_async_client(monkeypatch):
+    monkeypatch.setattr(session_module, "verify_token", AsyncMock(return_value=MagicMock(id="user-1")))
+    monkeypatch.setattr(session_module, "remember_session_owner", MagicMock())
+    client = _client()
+    table = client.table.return_value
+    table.select.return_value.eq.return_value.execute = AsyncMock(return_value=MagicMock(data=[]))
+    table.insert.return_value.execute = AsyncMock()
+    sync_client = MagicMock()
+    session = AgentSession("session-1", sync_client, "token", db=client)
+
+    await session.ensure_exists()
+
+    table.insert.assert_called_once_with({"user_id": "user-1", "session_id": "session-1", "items": []})
+    table.insert.return_value.execute.assert_awaited_once()
+    sync_client.table.assert_not_called()
@@ -0,0 +1,130 @@
+"""Unit tests for the rule-based Arabizi transliterator, its model fallback and display variants."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from harness import display_cache, scaffolding
+from harness.arabizi import transliterate, transliterate_word
+
+
+@pytest.mark.parametrize(
+    "arabic, expected",
+    [
+        ("مَرْحَبًا", "mar7aban"),
+        ("الشَّمْسُ جَمِيلَةٌ", "ash-shams jameela"),
+        ("وَالْبَيْتُ كَبِيرٌ", "wal-bayt kabeer"),
+        ("لِلْمَدْرَسَةِ", "lil-madrasa"),
+        ("مَدْرَسَةُ البَنَاتِ", "madrasat al-banaat"),
+        ("القَهْوَةُ سَاخِنَةٌ", "al-2ahwa saa5ina"),
+        ("أَكَلُوا الخُبْزَ", "akaloo al-5ubz"),
+        ("كَيْفَ حَالُكَ؟", "kayfa 7aaluk?"),
+        ("بِسْمِ اللهِ", "bism allah"),
+        ("بِاسْمِ", "bism"),
+    ],
+)
+def test_vowelled_text(arabic, expected):
+    result = transliterate(arabic)
+    assert result.text == expected
+    assert result.confident
+
+
+def test_english_digits_and_word_count_are_preserved():
+    text = "I love  قَهْوَة\n٣ كُتُبٍ"
+    result = transliterate(text)
+    assert result.text == "I love  2ahwa\n3 kutub"
+    assert len(result.text.split()) == len(text.split())
+
+
+def test_dialect_letters():
+    assert transliterate_word("جَمِيل", "ar-EG")[0] == "gameel"
+    assert transliterate_word("جَمِيل")[0] == "jameel"
+
+
+def test_unvowelled_words_are_low_confidence():
+    result = transliterate("يَا صديقي hello")
+    assert result.low_confidence == [1]
+    assert result.with_words({1: "sadeeqi"}) == "ya sadeeqi hello"
+
+
+@pytest.mark.parametrize("text, unsure", [
+    ("مرحبا كيف حالك", [2]),
+    ("كيفك يا حبيبي", [0]),
+    ("حَالك", [0]),
+])
+def test_unvowelled_long_vowel_words_are_low_confidence(text, unsure):
+    assert transliterate(text).low_confidence == unsure
+
+
+async def test_unvowelled_long_vowels_go_to_the_model():
+    with patch.object(scaffolding, "_transliterate_with_model", new=AsyncMock(return_value="7aalak")) as model:
+        assert await scaffolding.generate_transliterated_text("مرحبا كيف حالك") == "mar7aba keef 7aalak"
+    model.assert_awaited_once_with("حالك", None)
+
+
+def _completion(content: str) -> MagicMock:
+    return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+
+@pytest.fixture
+def llm():
+    """Model client plus a display cache that always misses."""
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock()
+    with patch.object(scaffolding, "_get_client", return_value=client), \
+            patch.object(display_cache, "get", new=AsyncMock(return_value=None)), \
+            patch.object(display_cache, "put"):
+        yield client
+
+
+async def test_confident_text_skips_the_model():
+    with patch.object(scaffolding, "_transliterate_with_model", new=AsyncMock()) as model:
+        assert await scaffolding.generate_transliterated_text("يَا حَبِيبِي") == "ya 7abeebi"
+    model.assert_not_awaited()
+
+
+async def test_only_unsure_words_go_to_the_model():
+    with patch.object(scaffolding, "_transliterate_with_model", new=AsyncMock(return_value="9adee2i")) as model:
+        assert await scaffolding.generate_transliterated_text("يَا صديقي", dialect="ar-EG") == "ya 9adee2i"
+    model.assert_awaited_once_with("صديقي", "ar-EG")
+
+
+async def test_misaligned_model_output_keeps_rule_output():
+    with patch.object(scaffolding, "_transliterate_with_model", new=AsyncMock(return_value="ya sadeeqi")):
+        assert await scaffolding.generate_transliterated_text("يَا صديقي") == "ya 9dee2i"
+
+
+async def test_display_variants_use_one_call_for_unvowelled_text(llm):
+    llm.chat.completions.create.return_value = _completion(
+        '{"text": "my friend", "highlights": [], "transliteration": "ya 9adee2i"}'
+    )
+
+    variants = await scaffolding.generate_display_variants("يَا صديقي")
+
+    assert variants.scaffolded.text == "my friend"
+    assert variants.transliterated == "ya 9adee2i"
+    llm.chat.completions.create.assert_awaited_once()
+
+
+async def test_display_variants_reject_misaligned_transliteration(llm):
+    llm.chat.completions.create.return_value = _completion(
+        '{"text": "my friend", "highlights": [], "transliteration": "ya sadeeq ee"}'
+    )
+
+    variants = await scaffolding.generate_display_variants("يَا صديقي")
+
+    assert variants.transliterated == "ya 9dee2i"
+
+
+async def test_display_variants_run_two_calls_when_combined_prompt_is_off(llm):
+    llm.chat.completions.create.side_effect = [
+        _completion('{"text": "my friend", "highlights": []}'),
+        _completion("9adee2i"),
+    ]
+
+    with patch.object(scaffolding, "COMBINED_DISPLAY_PROMPT", False):
+        variants = await scaffolding.generate_display_variants("يَا صديقي")
+
+    assert variants.scaffolded.text == "my friend"
+    assert variants.transliterated == "ya 9adee2i"
+    assert llm.chat.completions.create.await_count == 2
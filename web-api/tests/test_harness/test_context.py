@@ -0,0 +1,99 @@
+"""Unit tests for AppContext snapshots (debounced writes and lazy restore)."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from harness import context as context_module
+from harness.context import create_context, get_context, load_context
+
+
+@pytest.fixture
+def db():
+    """Async admin client stand-in; `execute()` is awaited on every query."""
+    client = MagicMock()
+    client.rpc.return_value.execute = AsyncMock()
+    with patch.object(context_module, "get_supabase_async_admin_client", return_value=client):
+        yield client
+    context_module._unsnapshotted.clear()
+
+
+def _written(db) -> list[dict]:
+    return [call.args[1]["p_snapshots"] for call in db.rpc.call_args_list]
+
+
+async def test_changes_are_coalesced_into_one_batched_snapshot(db, monkeypatch):
+    monkeypatch.setattr(context_module, "SNAPSHOT_DEBOUNCE_SECONDS", 0)
+    first = create_context("snap-1")
+    second = create_context("snap-2")
+    first.set_language("ar-EG")
+    first.set_response_mode("canonical")
+
+    await context_module._snapshot_task
+
+    (batch,) = _written(db)
+    assert [s["session_id"] for s in batch] == ["snap-1", "snap-2"]
+    assert batch[0]["context"]["agent"]["language"] == "ar-EG"
+    assert batch[0]["context"]["agent"]["response_mode"] == "canonical"
+    assert second.session_id == "snap-2"
+
+
+async def test_failed_snapshot_is_kept_for_the_next_write(db):
+    db.rpc.return_value.execute = AsyncMock(side_effect=RuntimeError("down"))
+    context_module._unsnapshotted["snap-3"] = create_context("snap-3")
+
+    with pytest.raises(RuntimeError):
+        await context_module.flush_snapshots()
+
+    assert "snap-3" in context_module._unsnapshotted
+
+
+async def test_missing_context_is_restored_from_snapshot(db):
+    snapshot = create_context("snap-4", user_id="user-1", lesson_id="lesson-1")
+    snapshot.set_response_mode("transliterated")
+    stored = snapshot.model_dump(mode="json")
+    context_module.delete_context("snap-4")
+    query = db.table.return_value.select.return_value.eq.return_value.limit.return_value
+    query.execute = AsyncMock(return_value=MagicMock(data=[{"context": stored}]))
+
+    restored = await load_context("snap-4")
+
+    assert restored is not None
+    assert restored.user.user_id == "user-1"
+    assert restored.lesson.lesson_id == "lesson-1"
+    assert restored.agent.response_mode == "transliterated"
+    # Later lookups are served from memory
+    assert get_context("snap-4") is restored
+    assert await load_context("snap-4") is restored
+    query.execute.assert_awaited_once()
+    context_module.delete_context("snap-4")
+
+
+async def test_shutdown_snapshots_every_live_context(db):
+    live = create_context("snap-5")
+    context_module._unsnapshotted.clear()
+
+    await context_module.snapshot_all_contexts()
+
+    assert "snap-5" in [s["session_id"] for batch in _written(db) for s in batch]
+    assert context_module._unsnapshotted == {}
+    context_module.delete_context(live.session_id)
+
+
+async def test_eviction_keeps_the_shared_copy_and_the_pending_snapshot(db, monkeypatch):
+    spawned = []
+    monkeypatch.setattr(context_module.state_store, "is_shared", lambda: True)
+    monkeypatch.setattr(context_module.state_store, "spawn", lambda coro, what: spawned.append(what) or coro.close())
+    evicted = create_context("snap-6")
+    evicted.set_response_mode("canonical")
+
+    context_module.evict_context("snap-6")
+
+    assert get_context("snap-6") is None
+    assert not [what for what in spawned if what.startswith("Deleting")]
+    # Served from the pending snapshot rather than the older table row
+    assert await load_context("snap-6") is evicted
+    db.table.assert_not_called()
+    await context_module.flush_snapshots()
+    assert [s["session_id"] for batch in _written(db) for s in batch] == ["snap-6"]
+    context_module.delete_context("snap-6")
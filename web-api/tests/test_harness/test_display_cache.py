@@ -0,0 +1,78 @@
+"""Unit tests for the scaffolded/transliterated display-text cache."""
+
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from harness import display_cache, scaffolding
+from harness.display_cache import context_bucket, make_key
+
+
+def test_key_ignores_whitespace_and_learned_word_order():
+    assert make_key("scaffold", "مرحبا  بك", "v1", ["b", "a"]) == make_key(
+        "scaffold", " مرحبا بك ", "v1", ["a", "b", "a"]
+    )
+
+
+def test_key_changes_with_prompt_version_mode_learned_words_and_dialect():
+    base = make_key("scaffold", "أحسنت", "v1")
+    assert make_key("scaffold", "أحسنت", "v2") != base
+    assert make_key("transliterate", "أحسنت", "v1") != base
+    assert make_key("scaffold", "أحسنت", "v1", ["sayaara"]) != base
+    assert make_key("scaffold", "أحسنت", "v1", dialect="ar-EG") != base
+
+
+def test_general_messages_share_a_bucket_but_phrase_requests_do_not():
+    assert context_bucket(None) == "none"
+    assert context_bucket("I'm good thanks") == context_bucket("I went to the market") == "general"
+    assert context_bucket("How do I say thank you?") != context_bucket("How do I say goodbye?")
+
+
+def _completion(content: str) -> MagicMock:
+    return MagicMock(choices=[MagicMock(message=MagicMock(content=content))])
+
+
+@pytest.fixture
+def llm_and_db():
+    llm = MagicMock()
+    llm.chat.completions.create = AsyncMock(
+        return_value=_completion('{"text": "well done", "highlights": []}')
+    )
+    db = MagicMock()
+    lookup = db.table.return_value.select.return_value.eq.return_value.limit.return_value
+    lookup.execute = AsyncMock(return_value=MagicMock(data=[]))
+    db.table.return_value.upsert.return_value.execute = AsyncMock()
+    with patch.object(scaffolding, "_get_client", return_value=llm), \
+            patch.object(display_cache, "get_supabase_async_admin_client", return_value=db):
+        yield llm, db, lookup
+    display_cache._memory.clear()
+
+
+async def test_repeated_text_is_scaffolded_once(llm_and_db):
+    llm, db, _ = llm_and_db
+
+    first = await scaffolding.generate_scaffolded_text("أَحْسَنْت", user_message="ok")
+    second = await scaffolding.generate_scaffolded_text("أَحْسَنْت ", user_message="sure")
+
+    await asyncio.gather(*display_cache._background)
+
+    assert first.text == second.text == "well done"
+    llm.chat.completions.create.assert_awaited_once()
+    db.table.return_value.upsert.assert_called_once()
+
+
+async def test_table_hit_skips_the_model(llm_and_db):
+    llm, _, lookup = llm_and_db
+    lookup.execute.return_value = MagicMock(data=[{"result": {"text": "sadeeqi"}}])
+
+    assert await scaffolding.generate_transliterated_text("صديقي") == "sadeeqi"
+    llm.chat.completions.create.assert_not_awaited()
+
+
+async def test_failed_generation_is_not_cached(llm_and_db):
+    llm, _, _ = llm_and_db
+    llm.chat.completions.create.side_effect = RuntimeError("rate limited")
+
+    assert await scaffolding.generate_transliterated_text("صديقي") == "9dee2i"
+    assert len(display_cache._memory) == 0
@@ -0,0 +1,64 @@
+"""Unit tests for the compiled vocabulary matcher and flow highlights."""
+
+from harness.highlights import VocabMatcher, compute_highlights
+from harness.scaffolding import _compute_highlight_offsets
+
+
+def _matches(words: list[str], text: str) -> list[tuple[str, str]]:
+    return [(text[start:end], word) for start, end, word in VocabMatcher(words).finditer(text)]
+
+
+def test_whole_words_only_case_insensitive():
+    assert _matches(["an", "marhaban"], "Marhaban, and an apple") == [("Marhaban", "marhaban"), ("an", "an")]
+
+
+def test_arabizi_digits_match_letter_spellings():
+    text = "marhaba, Khalas! 'arabi and mar7aba's"
+    assert _matches(["mar7aba", "5alas", "3arabi"], text) == [
+        ("marhaba", "mar7aba"), ("Khalas", "5alas"), ("'arabi", "3arabi"), ("mar7aba", "mar7aba"),
+    ]
+
+
+def test_hamza_and_ayn_are_not_dropped():
+    text = "an hour ago, 3an my friend; in 2in, 'in and 'marhaba'"
+    assert _matches(["3an", "2in", "marhaba"], text) == [
+        ("3an", "3an"), ("2in", "2in"), ("'in", "2in"), ("marhaba", "marhaba"),
+    ]
+
+
+def test_longest_entry_wins_and_matches_never_overlap():
+    text = "ahlan wa sahlan, sahlan"
+    assert _matches(["sahlan", "ahlan", "ahlan wa sahlan"], text) == [
+        ("ahlan wa sahlan", "ahlan wa sahlan"), ("sahlan", "sahlan"),
+    ]
+
+
+def test_multi_word_entries_need_the_same_separators():
+    assert _matches(["al-kitab"], "al kitab, al-kitab") == [("al-kitab", "al-kitab")]
+
+
+def test_flow_highlights_keep_the_text_as_written():
+    rows = compute_highlights("Marhaban! Your first dars.", "onboarding")
+    assert rows == [
+        {"word": "Marhaban", "meaning": "hello", "start": 0, "end": 8},
+        {"word": "dars", "meaning": "lesson", "start": 21, "end": 25},
+    ]
+    assert compute_highlights("Marhaban!", None) == []
+
+
+def test_scaffolding_offsets_cover_every_occurrence():
+    highlights = [
+        {"word": "qitta", "meaning": "cat", "canonical": "قطة"},
+        {"word": "missing", "meaning": "?"},
+    ]
+    assert _compute_highlight_offsets("my qitta and your Qitta", highlights) == [
+        {"word": "qitta", "meaning": "cat", "start": 3, "end": 8, "canonical": "قطة"},
+        {"word": "qitta", "meaning": "cat", "start": 18, "end": 23, "canonical": "قطة"},
+    ]
+
+
+def test_scaffolding_offsets_skip_english_lookalikes():
+    text = "an hour ago, and 3an my friend"
+    assert _compute_highlight_offsets(text, [{"word": "3an", "meaning": "about", "canonical": "عن"}]) == [
+        {"word": "3an", "meaning": "about", "start": 17, "end": 20, "canonical": "عن"},
+    ]
@@ -0,0 +1,93 @@
+"""Unit tests for bounded-context history windowing."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from harness import history
+from harness.history import WindowedSession, build_window, window_start
+
+
+def _turns(n: int, size: int = 100) -> list[dict]:
+    items = []
+    for i in range(n):
+        items.append({"role": "user", "content": f"u{i} " + "x" * size})
+        items.append({"type": "message", "role": "assistant", "content": f"a{i} " + "y" * size})
+    return items
+
+
+def _session(summary=None, covered=0):
+    session = MagicMock()
+    session.session_id = "session-1"
+    session.get_history_summary = AsyncMock(return_value=(summary, covered))
+    session.set_history_summary = AsyncMock()
+    return session
+
+
+def test_short_history_fits_entirely():
+    assert window_start(_turns(3), token_budget=10_000) == 0
+
+
+def test_window_cuts_at_user_message():
+    items = _turns(20)
+    cut = window_start(items, token_budget=500)
+
+    assert 0 < cut < len(items)
+    assert items[cut]["role"] == "user"
+
+
+def test_window_always_keeps_minimum_items():
+    items = _turns(5, size=5_000)
+    assert len(items) - window_start(items, token_budget=10) >= history.MIN_VERBATIM_ITEMS
+
+
+@pytest.mark.asyncio
+async def test_build_window_prepends_summary_and_skips_covered_items(monkeypatch):
+    monkeypatch.setattr(history, "_schedule_refresh", MagicMock())
+    items = _turns(20)
+    cut = window_start(items, token_budget=500)
+    session = _session("learner practised greetings", covered=cut)
+
+    windowed = await build_window(session, items, token_budget=500)
+
+    assert windowed[0]["role"] == "system"
+    assert "learner practised greetings" in windowed[0]["content"]
+    assert windowed[1:] == items[cut:]
+    history._schedule_refresh.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_build_window_schedules_refresh_for_newly_folded_items(monkeypatch):
+    schedule = MagicMock()
+    monkeypatch.setattr(history, "_schedule_refresh", schedule)
+    items = _turns(20)
+    cut = window_start(items, token_budget=500)
+    session = _session("old summary", covered=2)
+
+    await build_window(session, items, token_budget=500)
+
+    schedule.assert_called_once_with(session, "old summary", 2, items[2:cut])
+
+
+@pytest.mark.asyncio
+async def test_build_window_drops_overflow_without_summary(monkeypatch):
+    monkeypatch.setattr(history, "_schedule_refresh", MagicMock())
+    items = _turns(50)
+    cut = window_start(items, token_budget=500)
+
+    windowed = await build_window(_session(), items, token_budget=500)
+
+    assert windowed == items[cut:]
+
+
+@pytest.mark.asyncio
+async def test_windowed_session_passes_writes_through():
+    inner = _session()
+    inner.get_items = AsyncMock(return_value=_turns(2))
+    inner.add_items = AsyncMock()
+    session = WindowedSession(inner, token_budget=10_000)
+
+    assert await session.get_items() == _turns(2)
+    await session.add_items([{"role": "user", "content": "hi"}])
+
+    inner.add_items.assert_awaited_once_with([{"role": "user", "content": "hi"}])
@@ -0,0 +1,121 @@
+"""Tests for the in-memory prompt registry."""
+
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from agent.tutor import tutor_instructions
+from harness import prompts
+from harness.context import AppContext
+from services import state_store
+
+
+@pytest.fixture
+def agent_dir(tmp_path, monkeypatch):
+    (tmp_path / "tutor" / "languages").mkdir(parents=True)
+    (tmp_path / "tutor" / "languages" / "ar-AR.md").write_text("You teach Arabic.", encoding="utf-8")
+    (tmp_path / "onboarding").mkdir()
+    (tmp_path / "onboarding" / "system.md").write_text(
+        'Collected: {collected}. Reply {"messages": []} when done.', encoding="utf-8"
+    )
+    monkeypatch.setattr(prompts, "AGENT_DIR", tmp_path)
+    monkeypatch.setattr(prompts, "_entries", {})
+    return tmp_path
+
+
+def test_prompts_are_read_once(agent_dir, monkeypatch):
+    reads = []
+    original = prompts._load
+    monkeypatch.setattr(prompts, "_load", lambda name, path: reads.append(name) or original(name, path))
+
+    first = prompts.get("tutor/languages/ar-AR.md")
+    for _ in range(10):
+        assert prompts.get("tutor/languages/ar-AR.md") is first
+
+    assert reads == ["tutor/languages/ar-AR.md"]
+
+
+def test_hand_edits_change_the_version(agent_dir, monkeypatch):
+    monkeypatch.setattr(prompts, "CHECK_INTERVAL_SECONDS", 0)
+    before = prompts.get("tutor/languages/ar-AR.md")
+
+    path = agent_dir / "tutor" / "languages" / "ar-AR.md"
+    path.write_text("You teach Levantine Arabic.", encoding="utf-8")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    after = prompts.get("tutor/languages/ar-AR.md")
+    assert after.text == "You teach Levantine Arabic."
+    assert after.version != before.version
+
+
+def test_render_fills_only_the_given_fields(agent_dir):
+    prompt = prompts.get("onboarding/system.md")
+
+    assert prompt.render(collected="{'name': 'Sam'}") == (
+        'Collected: {\'name\': \'Sam\'}. Reply {"messages": []} when done.'
+    )
+    assert prompt.render() == prompt.text
+
+
+@pytest.mark.parametrize("name", ["../secrets.md", "tutor/languages/../../../etc/passwd", "onboarding/system.py"])
+def test_names_outside_the_agent_prompts_are_rejected(agent_dir, name):
+    with pytest.raises(ValueError):
+        prompts.get(name)
+    assert not prompts.exists(name)
+
+
+def test_missing_prompt_raises_file_not_found(agent_dir):
+    with pytest.raises(FileNotFoundError):
+        prompts.get("tutor/languages/xx-XX.md")
+
+
+async def test_save_updates_this_worker_and_announces(agent_dir, monkeypatch):
+    published = []
+
+    class _Store:
+        async def publish(self, channel, message):
+            published.append((channel, json.loads(message)))
+
+    monkeypatch.setattr(state_store, "get_state_store", lambda: _Store())
+    prompts.get("tutor/languages/ar-AR.md")
+
+    saved = await prompts.save("tutor/languages/ar-AR.md", "You teach Iraqi Arabic.")
+    for task in list(state_store._background):
+        await task
+
+    assert prompts.get("tutor/languages/ar-AR.md") == saved
+    assert (agent_dir / "tutor" / "languages" / "ar-AR.md").read_text(encoding="utf-8") == "You teach Iraqi Arabic."
+    assert published == [(prompts.PROMPT_CHANNEL, {
+        "name": "tutor/languages/ar-AR.md",
+        "text": "You teach Iraqi Arabic.",
+        "origin": state_store.WORKER_ID,
+    })]
+
+
+async def test_another_workers_save_is_applied_here(agent_dir):
+    before = prompts.get("tutor/languages/ar-AR.md")
+    message = json.dumps({"name": "tutor/languages/ar-AR.md", "text": "Edited elsewhere.", "origin": "other"})
+
+    await state_store.dispatch(prompts.PROMPT_CHANNEL, message)
+
+    after = prompts.get("tutor/languages/ar-AR.md")
+    assert after.text == "Edited elsewhere."
+    assert after.version != before.version
+    assert (agent_dir / "tutor" / "languages" / "ar-AR.md").read_text(encoding="utf-8") == "Edited elsewhere."
+
+
+async def test_tutor_instructions_follow_a_saved_prompt(agent_dir, monkeypatch):
+    monkeypatch.setattr(state_store, "spawn", lambda coro, what: coro.close())
+    wrapper = SimpleNamespace(context=AppContext(session_id="s1", user={"user_name": "Sam"}))
+
+    first = tutor_instructions.get_instructions(wrapper, None)
+    assert first.startswith("You teach Arabic.")
+    assert "- name: Sam" in first
+    assert tutor_instructions.get_instructions(wrapper, None) is first
+
+    await prompts.save("tutor/languages/ar-AR.md", "You teach Arabic slowly.")
+
+    assert tutor_instructions.get_instructions(wrapper, None).startswith("You teach Arabic slowly.")
@@ -0,0 +1,67 @@
+"""Unit tests for the incremental AgentResponse JSON parser."""
+
+import json
+
+import pytest
+
+from harness.response_stream import AgentResponseStreamParser, CompletedMessage, TextDelta
+
+RESPONSE = {
+    "messages": [
+        {"type": "text", "content": {"language": "ar-AR", "text": 'مرحبا "يا" صديقي\n'}},
+        {"type": "image", "content": {"language": "ar-AR", "url": "https://x/y.png", "alt_text": "text"}},
+        {"type": "text", "content": {"text": "bye", "language": "en"}},
+    ]
+}
+
+
+def _feed(raw: str, chunk_size: int) -> list:
+    parser = AgentResponseStreamParser()
+    events = []
+    for i in range(0, len(raw), chunk_size):
+        events.extend(parser.feed(raw[i:i + chunk_size]))
+    return events
+
+
+@pytest.mark.parametrize("chunk_size", [1, 4, 1000])
+@pytest.mark.parametrize("ensure_ascii", [True, False])
+def test_text_deltas_reassemble_each_bubble(chunk_size, ensure_ascii):
+    events = _feed(json.dumps(RESPONSE, ensure_ascii=ensure_ascii), chunk_size)
+
+    texts: dict[int, str] = {}
+    for event in events:
+        if isinstance(event, TextDelta):
+            texts[event.index] = texts.get(event.index, "") + event.delta
+
+    # Only text bubbles' content.text streams; the image's alt_text does not
+    assert texts == {0: 'مرحبا "يا" صديقي\n', 2: "bye"}
+
+
+def test_messages_complete_in_order_as_their_objects_close():
+    raw = json.dumps(RESPONSE)
+    first_close = raw.index("}}") + 2
+    parser = AgentResponseStreamParser()
+
+    early = [e for e in parser.feed(raw[:first_close]) if isinstance(e, CompletedMessage)]
+    rest = [e for e in parser.feed(raw[first_close:]) if isinstance(e, CompletedMessage)]
+
+    assert [(e.index, e.message.type) for e in early] == [(0, "text")]
+    assert [(e.index, e.message.type) for e in rest] == [(1, "image"), (2, "text")]
+
+
+def test_malformed_message_is_skipped_but_keeps_its_index():
+    raw = json.dumps({"messages": [{"type": "unknown"}, {"type": "text", "content": {"language": "en", "text": "ok"}}]})
+
+    completed = [e for e in _feed(raw, 5) if isinstance(e, CompletedMessage)]
+
+    assert [e.index for e in completed] == [1]
+
+
+def test_reset_starts_a_new_response():
+    parser = AgentResponseStreamParser()
+    parser.feed('{"messages": [{"type": "text", "content": {"language": "en", "text": "dra')
+    parser.reset()
+
+    events = parser.feed(json.dumps({"messages": [{"type": "text", "content": {"language": "en", "text": "hi"}}]}))
+
+    assert [e.index for e in events if isinstance(e, CompletedMessage)] == [0]
@@ -0,0 +1,71 @@
+"""Tests for the scaffolding prompt layout and token usage metrics."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from harness import display_cache, scaffolding
+from services import metrics_service
+
+
+def _completion(content: str, prompt_tokens: int = 1200, cached_tokens: int = 0) -> MagicMock:
+    usage = MagicMock(prompt_tokens=prompt_tokens, prompt_tokens_details=MagicMock(cached_tokens=cached_tokens))
+    return MagicMock(choices=[MagicMock(message=MagicMock(content=content))], usage=usage)
+
+
+@pytest.fixture
+def llm():
+    """Model client plus a display cache that always misses."""
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock(return_value=_completion('{"text": "well done", "highlights": []}'))
+    with patch.object(scaffolding, "_get_client", return_value=client), \
+            patch.object(display_cache, "get", new=AsyncMock(return_value=None)), \
+            patch.object(display_cache, "put"):
+        yield client
+
+
+def _sent_messages(llm) -> list[list[dict]]:
+    return [call.kwargs["messages"] for call in llm.chat.completions.create.await_args_list]
+
+
+async def test_instructions_are_the_same_system_prefix_for_every_learner(llm):
+    await scaffolding.generate_scaffolded_text("أَحْسَنْت", learned_words=['"shukran" (شكرا)'], user_message="hi")
+    await scaffolding.generate_scaffolded_text("مَرْحَبًا", user_message="How do I say hello?")
+
+    first, second = _sent_messages(llm)
+    assert first[0] == second[0]
+    assert first[0]["role"] == "system"
+    assert "أَحْسَنْت" not in first[0]["content"]
+    assert "أَحْسَنْت" in first[1]["content"] and "shukran" in first[1]["content"]
+    assert "How do I say hello?" in second[1]["content"]
+
+
+async def test_combined_call_extends_the_scaffolding_prefix(llm):
+    llm.chat.completions.create.return_value = _completion(
+        '{"text": "my friend", "highlights": [], "transliteration": "ya 9adee2i"}'
+    )
+    await scaffolding.generate_scaffolded_text("أَحْسَنْت")
+    await scaffolding.generate_display_variants("يَا صديقي")
+
+    scaffold, combined = _sent_messages(llm)
+    assert combined[0]["content"].startswith(scaffold[0]["content"])
+    assert "transliteration" in combined[0]["content"]
+
+
+async def test_cached_prompt_tokens_are_counted(llm, monkeypatch):
+    monkeypatch.setattr(metrics_service, "_counters", {})
+    monkeypatch.setattr(metrics_service, "_summaries", {})
+    llm.chat.completions.create.side_effect = [
+        _completion('{"text": "a", "highlights": []}', prompt_tokens=1200),
+        _completion('{"text": "b", "highlights": []}', prompt_tokens=1210, cached_tokens=1152),
+    ]
+
+    await scaffolding.generate_scaffolded_text("أَحْسَنْت")
+    await scaffolding.generate_scaffolded_text("مَرْحَبًا")
+
+    snapshot = metrics_service.snapshot()
+    assert snapshot["counters"]["llm.scaffold.requests"] == 2
+    assert snapshot["counters"]["llm.scaffold.input_tokens"] == 2410
+    assert snapshot["counters"]["llm.scaffold.cached_tokens"] == 1152
+    assert snapshot["summaries"]["llm.scaffold.latency_ms.cached"]["count"] == 1
+    assert snapshot["summaries"]["llm.scaffold.latency_ms.uncached"]["count"] == 1
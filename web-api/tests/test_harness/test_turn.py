@@ -0,0 +1,179 @@
+"""Unit tests for run_turn's scaffolding and persistence of multi-bubble responses."""
+
+import asyncio
+import time
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from harness import turn as turn_module
+from harness.response import AgentResponse
+from harness.scaffolding import DisplayVariants, ScaffoldedResult
+from harness.turn import TurnConfig, run_turn
+
+# Simulated gpt-4o-mini scaffolding round trip
+SCAFFOLD_LATENCY_SECONDS = 0.1
+
+
+def _response(*messages: dict) -> MagicMock:
+    return MagicMock(final_output=AgentResponse.model_validate({"messages": list(messages)}))
+
+
+def _text(text: str) -> dict:
+    return {"type": "text", "content": {"language": "ar-AR", "text": text}}
+
+
+async def _slow_scaffold(arabic_text: str, learned_words=None, user_message=None, dialect=None) -> DisplayVariants:
+    await asyncio.sleep(SCAFFOLD_LATENCY_SECONDS)
+    return DisplayVariants(ScaffoldedResult(text=f"display({arabic_text})"), f"arabizi({arabic_text})")
+
+
+def _echo_rows(session_id, drafts):
+    return [MagicMock(message_text=d.message_text, message_kind=d.message_kind) for d in drafts]
+
+
+@pytest.fixture
+def turn_io():
+    run_agent = AsyncMock()
+    persist = AsyncMock(side_effect=_echo_rows)
+    with patch.object(turn_module, "_run_agent", run_agent), \
+            patch.object(turn_module, "create_transcript_messages", persist), \
+            patch.object(turn_module, "generate_display_variants", side_effect=_slow_scaffold), \
+            patch.object(turn_module, "select_learned_words_for_session", AsyncMock(return_value=[])), \
+            patch.object(turn_module, "_record_analytics"):
+        yield run_agent, persist
+
+
+async def test_text_bubbles_are_scaffolded_concurrently_in_order(turn_io):
+    run_agent, persist = turn_io
+    run_agent.return_value = _response(_text("one"), _text("two"), _text("three"))
+
+    started = time.monotonic()
+    result = await run_turn("session-1", "hi", agent=MagicMock(), config=TurnConfig(scaffold=True))
+    elapsed = time.monotonic() - started
+
+    assert elapsed < 2 * SCAFFOLD_LATENCY_SECONDS
+    assert [m.message_text for m in result.persisted_messages] == [
+        "display(one)", "display(two)", "display(three)",
+    ]
+    assert result.canonical_text == "one two three"
+    persist.assert_awaited_once()
+    drafts = persist.await_args.args[1]
+    assert [d.message_text_transliterated for d in drafts] == [
+        "arabizi(one)", "arabizi(two)", "arabizi(three)",
+    ]
+
+
+async def test_components_keep_their_position_between_bubbles(turn_io):
+    run_agent, persist = turn_io
+    image = {"type": "image", "content": {"language": "ar-AR", "url": "https://x/y.png"}}
+    run_agent.return_value = _response(_text("one"), image, _text("two"))
+
+    result = await run_turn("session-1", "hi", agent=MagicMock(), config=TurnConfig())
+
+    assert [m.message_kind for m in result.persisted_messages] == ["text", "component", "text"]
+
+
+async def test_timings_include_each_bubble(turn_io):
+    run_agent, _ = turn_io
+    run_agent.return_value = _response(_text("one"), _text("two"))
+
+    result = await run_turn("session-1", "hi", agent=MagicMock(), config=TurnConfig(scaffold=True))
+
+    assert result.timings["bubble_0_scaffold_ms"] >= SCAFFOLD_LATENCY_SECONDS * 1000 * 0.9
+    assert "bubble_1_scaffold_ms" in result.timings
+    assert {"total_ms", "llm_ms", "scaffolding_ms", "persist_ms"} <= set(result.timings)
+
+
+async def test_persist_failure_does_not_fail_the_turn(turn_io):
+    run_agent, persist = turn_io
+    run_agent.return_value = _response(_text("one"), _text("two"))
+    persist.side_effect = ValueError("Session not found")
+
+    result = await run_turn("session-1", "hi", agent=MagicMock(), config=TurnConfig())
+
+    assert result.persisted_messages == []
+    assert result.display_text == "one two"
+
+
+async def test_first_bubble_is_emitted_before_later_bubbles_finish(turn_io):
+    run_agent, persist = turn_io
+    run_agent.return_value = _response(_text("quick"), _text("slow"))
+
+    async def uneven_scaffold(arabic_text, learned_words=None, user_message=None, dialect=None):
+        await asyncio.sleep(SCAFFOLD_LATENCY_SECONDS * (3 if arabic_text == "slow" else 1))
+        return DisplayVariants(ScaffoldedResult(text=arabic_text), arabic_text)
+
+    emitted_at: dict[str, float] = {}
+
+    async def emit(row):
+        emitted_at[row.message_text] = time.monotonic()
+
+    started = time.monotonic()
+    with patch.object(turn_module, "generate_display_variants", side_effect=uneven_scaffold):
+        result = await run_turn(
+            "session-1", "hi", agent=MagicMock(), config=TurnConfig(scaffold=True), emit=emit
+        )
+
+    assert emitted_at["quick"] - started < 2 * SCAFFOLD_LATENCY_SECONDS
+    assert emitted_at["slow"] > emitted_at["quick"]
+    assert persist.await_count == 2
+    assert result.timings["first_bubble_ms"] < result.timings["total_ms"]
+
+
+def _streamed(response: MagicMock, chunk_size: int = 7) -> MagicMock:
+    raw = response.final_output.model_dump_json()
+
+    async def stream_events():
+        yield SimpleNamespace(type="raw_response_event", data=SimpleNamespace(type="response.created"))
+        for i in range(0, len(raw), chunk_size):
+            delta = SimpleNamespace(type="response.output_text.delta", delta=raw[i:i + chunk_size])
+            yield SimpleNamespace(type="raw_response_event", data=delta)
+            await asyncio.sleep(0)
+
+    return MagicMock(stream_events=stream_events, final_output=response.final_output)
+
+
+async def test_streamed_turn_emits_deltas_then_rows_in_order(turn_io):
+    response = _response(_text("one"), _text("two"))
+    emitted: list = []
+
+    async def emit(row):
+        emitted.append(("row", row.message_text))
+
+    async def emit_text_delta(index, delta):
+        emitted.append(("delta", index, delta))
+
+    with patch.object(turn_module, "_run_agent_streamed", AsyncMock(return_value=_streamed(response))):
+        result = await turn_module.run_turn_streamed(
+            "session-1", "hi", agent=MagicMock(), config=TurnConfig(scaffold=True),
+            emit=emit, emit_text_delta=emit_text_delta,
+        )
+
+    rows = [e[1] for e in emitted if e[0] == "row"]
+    assert rows == ["display(one)", "display(two)"]
+    streamed_text = "".join(e[2] for e in emitted if e[0] == "delta" and e[1] == 0)
+    assert streamed_text == "one"
+    # Bubble 0's text streamed before any row went out
+    assert emitted.index(("row", "display(one)")) > next(i for i, e in enumerate(emitted) if e[0] == "delta")
+    assert [m.message_text for m in result.persisted_messages] == rows
+
+
+async def test_streamed_turn_falls_back_to_final_output_for_missed_messages(turn_io):
+    response = _response(_text("one"), _text("two"))
+    streamed = _streamed(response)
+
+    async def no_events():
+        return
+        yield
+
+    streamed.stream_events = no_events
+    emit = AsyncMock()
+    with patch.object(turn_module, "_run_agent_streamed", AsyncMock(return_value=streamed)):
+        result = await turn_module.run_turn_streamed(
+            "session-1", "hi", agent=MagicMock(), config=TurnConfig(), emit=emit,
+        )
+
+    assert [m.message_text for m in result.persisted_messages] == ["one", "two"]
+    assert emit.await_count == 2
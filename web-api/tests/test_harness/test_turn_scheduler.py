@@ -0,0 +1,96 @@
+"""Unit tests for the per-session turn scheduler."""
+
+import asyncio
+
+from harness import turn_scheduler
+from harness.turn_scheduler import FOLLOWUP, OPENER, USER, schedule_turn
+from services import metrics_service
+
+
+def _turn(log: list, name: str, seconds: float = 0.05):
+    async def run():
+        log.append(f"start {name}")
+        await asyncio.sleep(seconds)
+        log.append(f"end {name}")
+        return name
+
+    return run
+
+
+async def test_turns_on_one_session_run_one_at_a_time():
+    log: list = []
+
+    results = await asyncio.gather(
+        schedule_turn("sched-1", _turn(log, "a"), kind=OPENER),
+        schedule_turn("sched-1", _turn(log, "b")),
+    )
+
+    assert results == ["a", "b"]
+    assert log == ["start a", "end a", "start b", "end b"]
+    assert "sched-1" not in turn_scheduler._sessions
+
+
+async def test_other_sessions_are_not_blocked():
+    log: list = []
+
+    await asyncio.gather(
+        schedule_turn("sched-2", _turn(log, "a")),
+        schedule_turn("sched-3", _turn(log, "b")),
+    )
+
+    assert log[:2] == ["start a", "start b"]
+
+
+async def test_user_message_drops_a_queued_followup():
+    log: list = []
+    dropped_before = metrics_service.snapshot()["counters"].get("turns.followups_dropped", 0)
+
+    opener = asyncio.create_task(schedule_turn("sched-4", _turn(log, "opener"), kind=OPENER))
+    await asyncio.sleep(0)
+    followup = asyncio.create_task(schedule_turn("sched-4", _turn(log, "followup"), kind=FOLLOWUP))
+    await asyncio.sleep(0)
+    reply = await schedule_turn("sched-4", _turn(log, "reply"))
+
+    assert await opener == "opener"
+    assert await followup is None
+    assert reply == "reply"
+    assert "start followup" not in log
+    assert metrics_service.snapshot()["counters"]["turns.followups_dropped"] == dropped_before + 1
+
+
+async def test_user_message_cancels_a_running_followup():
+    log: list = []
+
+    followup = asyncio.create_task(
+        schedule_turn("sched-5", _turn(log, "followup", seconds=1), kind=FOLLOWUP)
+    )
+    await asyncio.sleep(0.01)
+    reply = await schedule_turn("sched-5", _turn(log, "reply"))
+
+    assert await followup is None
+    assert reply == "reply"
+    assert "end followup" not in log
+
+
+async def test_barge_in_cancels_the_running_user_turn():
+    log: list = []
+
+    first = asyncio.create_task(schedule_turn("sched-6", _turn(log, "first", seconds=1), kind=USER))
+    await asyncio.sleep(0.01)
+    second = await schedule_turn("sched-6", _turn(log, "second"), barge_in=True)
+
+    assert await first is None
+    assert second == "second"
+    assert log == ["start first", "start second", "end second"]
+
+
+async def test_without_barge_in_user_turns_queue():
+    log: list = []
+
+    first = asyncio.create_task(schedule_turn("sched-7", _turn(log, "first")))
+    await asyncio.sleep(0.01)
+    second = await schedule_turn("sched-7", _turn(log, "second"))
+
+    assert await first == "first"
+    assert second == "second"
+    assert metrics_service.snapshot()["summaries"]["turns.wait_ms"]["count"] >= 2
@@ -0,0 +1,106 @@
+"""Unit tests for lazy display variants and the background backfill queue."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from harness import variant_backfill
+from harness.scaffolding import DisplayVariants, ScaffoldedResult
+
+VOWELLED = "يَا حَبِيبِي"
+
+
+async def test_canonical_mode_keeps_the_free_transliteration():
+    display = await variant_backfill.render_for_mode(VOWELLED, "canonical")
+
+    assert display.text == VOWELLED
+    assert display.columns == {"message_text_transliterated": "ya 7abeebi"}
+    assert display.missing == ["scaffolded"]
+
+
+async def test_transliterated_mode_leaves_scaffolding_for_later():
+    with patch.object(variant_backfill, "generate_display_variants", new=AsyncMock()) as scaffold:
+        display = await variant_backfill.render_for_mode(VOWELLED, "transliterated")
+
+    assert display.text == "ya 7abeebi"
+    assert display.missing == ["scaffolded"]
+    scaffold.assert_not_awaited()
+
+
+@pytest.fixture
+async def backfill_io():
+    update = AsyncMock()
+    listener = AsyncMock()
+    scaffold = AsyncMock(
+        side_effect=lambda text, learned_words=None, user_message=None, dialect=None: DisplayVariants(
+            ScaffoldedResult(text=f"en({text})"), f"arabizi({text})"
+        )
+    )
+    with patch.object(variant_backfill.transcript_service, "update_transcript_variants", update), \
+            patch.object(
+                variant_backfill.vocab_service, "select_learned_words_for_session", AsyncMock(return_value=[])
+            ), \
+            patch.object(variant_backfill, "generate_display_variants", scaffold), \
+            patch.object(variant_backfill._backfiller, "_listeners", [listener]):
+        yield update, listener, scaffold
+        await variant_backfill.drain()
+
+
+async def test_scheduled_variant_is_stored_and_pushed(backfill_io):
+    update, listener, _ = backfill_io
+
+    variant_backfill.schedule("s1", "m1", VOWELLED, ["scaffolded"], user_message="hi")
+    await variant_backfill.drain()
+
+    columns = {"message_text_scaffolded": f"en({VOWELLED})", "highlights": []}
+    update.assert_awaited_once_with("s1", "m1", columns)
+    listener.assert_awaited_once_with("s1", "m1", columns)
+
+
+async def test_backfilled_scaffolding_uses_the_sessions_dialect(backfill_io):
+    _, _, scaffold = backfill_io
+
+    variant_backfill.schedule("s1", "m1", VOWELLED, ["scaffolded"], learned_words=[], dialect="ar-EG")
+    await variant_backfill.drain()
+
+    scaffold.assert_awaited_once_with(VOWELLED, learned_words=[], user_message=None, dialect="ar-EG")
+
+
+async def test_mode_switch_jumps_the_queue(backfill_io):
+    update, _, _ = backfill_io
+    missing = AsyncMock(return_value=[{"message_id": "old", "message_text_canonical": "قديم"}])
+
+    with patch.object(variant_backfill, "BACKFILL_CONCURRENCY", 1), \
+            patch.object(variant_backfill.transcript_service, "get_messages_missing_variant", missing):
+        variant_backfill.schedule("s1", "new", "جديد", ["scaffolded"])
+        assert await variant_backfill.backfill_session("s1", "scaffolded") == 1
+        await variant_backfill.drain()
+
+    assert [c.args[1] for c in update.await_args_list] == ["old", "new"]
+
+
+async def test_mode_switch_queues_only_the_newest_rows_that_fit(backfill_io):
+    update, _, _ = backfill_io
+    # Newest first, as the query returns them
+    rows = [{"message_id": f"m{i}", "message_text_canonical": VOWELLED} for i in range(10, 0, -1)]
+    missing = AsyncMock(side_effect=lambda session_id, column, limit=None: rows[:limit])
+
+    with patch.object(variant_backfill, "MAX_QUEUED_JOBS", 3), \
+            patch.object(variant_backfill, "BACKFILL_CONCURRENCY", 1), \
+            patch.object(variant_backfill.transcript_service, "get_messages_missing_variant", missing):
+        assert await variant_backfill.backfill_session("s1", "scaffolded") == 3
+        await variant_backfill.drain()
+
+    missing.assert_awaited_once_with("s1", "message_text_scaffolded", limit=3)
+    assert [c.args[1] for c in update.await_args_list] == ["m10", "m9", "m8"]
+
+
+async def test_failed_render_is_not_pushed(backfill_io):
+    update, listener, scaffold = backfill_io
+    scaffold.side_effect = RuntimeError("rate limited")
+
+    variant_backfill.schedule("s1", "m1", VOWELLED, ["scaffolded"])
+    await variant_backfill.drain()
+
+    update.assert_not_awaited()
+    listener.assert_not_awaited()
@@ -74,31 +74,37 @@ class TestListUserSessions:
 class TestSendChatMessage:
     """Tests for POST /sessions/{session_id}/chat endpoint."""
 
-    @patch("routes.session.scaffolding_service.generate_scaffolded_text")
-    @patch("routes.session.context_service.get_context")
+    @patch("routes.session.variant_backfill.schedule")
+    @patch("routes.session.variant_backfill.render_for_mode")
+    @patch("routes.session.vocab_service.select_learned_words")
+    @patch("routes.session.context_service.load_context")
     @patch("routes.session.agent_service.generate_agent_response")
     @patch("routes.session.transcript_service.create_transcript_message")
     @patch("routes.session.session_service.get_session")
     @patch("routes.session.get_current_user_token")
     def test_send_message_success(
         self, mock_auth, mock_get_session, mock_create_transcript, mock_generate_response,
-        mock_get_context, mock_scaffold, client
+        mock_get_context, mock_select_words, mock_render, mock_schedule, client
     ):
         """Test successful chat message."""
         # Arrange
         mock_auth.return_value = "test-token"
         mock_get_session.return_value = {"session_id": "session-123"}
-        mock_create_transcript.return_value = None
+        mock_create_transcript.return_value = Mock(message_id="message-1")
         mock_generate_response.return_value = "مرحبا! كيف يمكنني مساعدتك؟"
 
         mock_context = Mock()
         mock_context.agent.response_mode = "scaffolded"
+        mock_context.agent.language = "ar-EG"
         mock_get_context.return_value = mock_context
+        mock_select_words.return_value = ['"marhaba" (مرحبا)']
 
-        mock_result = Mock()
-        mock_result.text = "Hello! How can I help you?"
-        mock_result.highlights = []
-        mock_scaffold.return_value = mock_result
+        mock_render.return_value = Mock(
+            text="Hello! How can I help you?",
+            highlights=[],
+            columns={"message_text_scaffolded": "Hello! How can I help you?"},
+            missing=["transliterated"],
+        )
 
         # Act
         response = client.post(
@@ -111,7 +117,12 @@ class TestSendChatMessage:
         assert response.status_code == 200
         assert response.json() == {"text": "Hello! How can I help you?", "highlights": []}
         mock_generate_response.assert_called_once_with("session-123", "Hello", "test-token")
-        mock_scaffold.assert_called_once_with("مرحبا! كيف يمكنني مساعدتك؟", user_message="Hello")
+        mock_render.assert_called_once_with(
+            "مرحبا! كيف يمكنني مساعدتك؟", "scaffolded",
+            user_message="Hello", learned_words=['"marhaba" (مرحبا)'], dialect="ar-EG",
+        )
+        # Other variants wait for a mode switch
+        mock_schedule.assert_not_called()
 
     @patch("routes.session.session_service.get_session")
     @patch("routes.session.get_current_user_token")
@@ -136,7 +147,7 @@ class TestSendChatMessage:
 class TestUpdateContext:
     """Tests for PATCH /sessions/{session_id}/context endpoint."""
 
-    @patch("routes.session.context_service.get_context")
+    @patch("routes.session.context_service.load_context")
     @patch("routes.session.session_service.get_session")
     @patch("routes.session.get_current_user_token")
     def test_update_audio_enabled(self, mock_auth, mock_get_session, mock_get_context, client):
@@ -166,7 +177,7 @@ class TestUpdateContext:
         assert data["audio_enabled"] is True
         mock_context.set_audio_enabled.assert_called_once_with(True)
 
-    @patch("routes.session.context_service.get_context")
+    @patch("routes.session.context_service.load_context")
     @patch("routes.session.session_service.get_session")
     @patch("routes.session.get_current_user_token")
     def test_update_language(self, mock_auth, mock_get_session, mock_get_context, client):
@@ -0,0 +1,88 @@
+"""Tests for the bounded in-memory registry."""
+
+from services import metrics_service, registry
+from services.registry import BoundedRegistry
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _registry(monkeypatch, **kwargs):
+    clock = _Clock()
+    monkeypatch.setattr(registry.time, "monotonic", clock)
+    evicted = []
+    reg = BoundedRegistry(
+        kwargs.pop("name", "test"),
+        on_evict=lambda key, value: evicted.append((key, value)),
+        **kwargs,
+    )
+    return reg, clock, evicted
+
+
+def test_least_recently_used_entry_is_evicted_past_max_size(monkeypatch):
+    reg, _, evicted = _registry(monkeypatch, max_size=2)
+    reg["a"] = 1
+    reg["b"] = 2
+    reg["a"]  # refresh
+    reg["c"] = 3
+
+    assert evicted == [("b", 2)]
+    assert set(reg) == {"a", "c"}
+
+
+def test_idle_entries_expire_on_access(monkeypatch):
+    reg, clock, evicted = _registry(monkeypatch, idle_ttl=60)
+    reg["a"] = 1
+
+    clock.now += 61
+
+    assert "a" not in reg
+    assert reg.get("a") is None
+    assert evicted == [("a", 1)]
+
+
+def test_reads_keep_entries_alive(monkeypatch):
+    reg, clock, evicted = _registry(monkeypatch, idle_ttl=60)
+    reg["a"] = 1
+    for _ in range(3):
+        clock.now += 40
+        assert reg["a"] == 1
+
+    assert evicted == []
+
+
+def test_sweep_evicts_idle_entries_in_bulk(monkeypatch):
+    reg, clock, evicted = _registry(monkeypatch, idle_ttl=60)
+    reg["a"] = 1
+    reg["b"] = 2
+    clock.now += 30
+    reg["c"] = 3
+    clock.now += 40
+
+    registry.sweep_all()
+
+    assert [key for key, _ in evicted] == ["a", "b"]
+    assert list(reg) == ["c"]
+
+
+def test_explicit_delete_does_not_call_eviction_callback(monkeypatch):
+    reg, _, evicted = _registry(monkeypatch, max_size=10)
+    reg["a"] = 1
+
+    assert reg.pop("a") == 1
+    assert evicted == []
+
+
+def test_size_and_evictions_are_published(monkeypatch):
+    reg, _, _ = _registry(monkeypatch, name="metrics_probe", max_size=1)
+    reg["a"] = 1
+    reg["b"] = 2
+
+    snapshot = metrics_service.snapshot()
+    assert snapshot["gauges"]["registry.metrics_probe.size"] == 1
+    assert snapshot["counters"]["registry.metrics_probe.evictions.size"] == 1
@@ -0,0 +1,133 @@
+"""Tests for the shared state store and the state that lives behind it."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from channels.chat import connection_manager
+from channels.chat.connection_manager import Message
+from harness import context
+from services import soniox_service, state_store
+from services.state_store import MemoryStateStore
+
+
+@pytest.fixture
+def shared_store():
+    store = MemoryStateStore(shared=True)
+    state_store.set_state_store(store)
+    yield store
+    state_store.set_state_store(None)
+
+
+async def _settle() -> None:
+    """Wait for background store writes."""
+    while state_store._background:
+        await asyncio.gather(*list(state_store._background))
+
+
+async def test_memory_store_expires_keys(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(state_store.time, "monotonic", lambda: now[0])
+    store = MemoryStateStore()
+    await store.set("a", "1", ttl=10)
+    await store.set("b", "2")
+
+    now[0] += 11
+
+    assert await store.get("a") is None
+    assert await store.get("b") == "2"
+
+
+async def test_memory_store_is_not_shared_by_default():
+    state_store.set_state_store(None)
+    try:
+        assert state_store.is_shared() is False
+    finally:
+        state_store.set_state_store(None)
+
+
+async def test_context_is_loaded_by_another_worker(shared_store):
+    created = context.create_context("ctx-1", user_id="user-1")
+    created.set_language("ar-EG")
+    await _settle()
+
+    # Another worker has no local copy
+    context._contexts.pop("ctx-1")
+    loaded = await context.load_context("ctx-1")
+
+    assert loaded is not None and loaded is not created
+    assert loaded.user.user_id == "user-1"
+    assert loaded.agent.language == "ar-EG"
+    assert context.get_context("ctx-1") is loaded
+    context.delete_context("ctx-1")
+    await _settle()
+
+
+async def test_changes_from_another_worker_invalidate_local_copy(shared_store):
+    context.create_context("ctx-2")
+    await _settle()
+
+    other_worker = json.dumps({"session_id": "ctx-2", "origin": "other-worker"})
+    await shared_store.publish(context.CONTEXT_CHANNEL, other_worker)
+    assert context.get_context("ctx-2") is None
+
+    # Our own announcements keep the local copy
+    context.create_context("ctx-2")
+    await _settle()
+    assert context.get_context("ctx-2") is not None
+    context.delete_context("ctx-2")
+    await _settle()
+
+
+async def test_deleted_context_is_gone_for_every_worker(shared_store):
+    context.create_context("ctx-3")
+    await _settle()
+    context.delete_context("ctx-3")
+    await _settle()
+
+    assert await context.load_context("ctx-3") is None
+
+
+async def test_send_message_is_relayed_to_the_owning_worker(shared_store):
+    relayed = []
+    state_store.subscribe("ws:other-worker", relayed.append)
+    await shared_store.set(connection_manager.OWNER_KEY_PREFIX + "ws-1", "other-worker")
+    try:
+        await connection_manager.send_message("ws-1", Message(kind="transcript", data={"text": "hi"}))
+    finally:
+        state_store._handlers.pop("ws:other-worker")
+
+    assert json.loads(relayed[0]) == {
+        "session_id": "ws-1",
+        "message": {"kind": "transcript", "data": {"text": "hi"}},
+    }
+
+
+async def test_relayed_message_reaches_local_socket(shared_store):
+    websocket = AsyncMock()
+    connection_manager.register_websocket("ws-2", websocket)
+    await _settle()
+    assert await shared_store.get(connection_manager.OWNER_KEY_PREFIX + "ws-2") == state_store.WORKER_ID
+
+    payload = json.dumps({"session_id": "ws-2", "message": {"kind": "audio", "data": {}}})
+    await shared_store.publish(connection_manager.RELAY_CHANNEL, payload)
+    connection_manager.unregister_websocket("ws-2")
+    await _settle()
+
+    websocket.send_json.assert_awaited_once_with({"kind": "audio", "data": {}})
+    assert await shared_store.get(connection_manager.OWNER_KEY_PREFIX + "ws-2") is None
+
+
+async def test_send_message_without_any_owner_raises(shared_store):
+    with pytest.raises(ValueError):
+        await connection_manager.send_message("ws-none", Message(kind="error", data={}))
+
+
+async def test_transcription_jobs_live_in_the_shared_store(shared_store):
+    await shared_store.set(soniox_service.TRANSCRIPTION_JOB_KEY_PREFIX + "job-1", "session-1")
+
+    assert await soniox_service.get_session_id("job-1") == "session-1"
+    await soniox_service.remove_transcription_job("job-1")
+    assert await soniox_service.get_session_id("job-1") is None
@@ -0,0 +1,53 @@
+"""Tests for the process-wide Supabase client pool."""
+
+import pytest
+
+from services import metrics_service, supabase_client
+
+
+@pytest.fixture(autouse=True)
+async def pool(monkeypatch):
+    monkeypatch.setenv("SUPABASE_URL", "https://test.supabase.co")
+    monkeypatch.setenv("SUPABASE_SECRET_KEY", "test-secret-key")
+    monkeypatch.setenv("SUPABASE_PUBLISHABLE_KEY", "test-publishable-key")
+    await supabase_client.close_clients()
+    yield
+    await supabase_client.close_clients()
+
+
+def test_admin_client_is_created_once():
+    assert supabase_client.get_supabase_admin_client() is supabase_client.get_supabase_admin_client()
+    assert (
+        supabase_client.get_supabase_async_admin_client()
+        is supabase_client.get_supabase_async_admin_client()
+    )
+
+
+def test_user_views_are_reused_per_token_and_share_the_pool():
+    admin = supabase_client.get_supabase_admin_client()
+    first = supabase_client.get_supabase_user_client("token-a")
+    other = supabase_client.get_supabase_user_client("token-b")
+
+    assert supabase_client.get_supabase_user_client("token-a") is first
+    assert first.postgrest.headers["Authorization"] == "Bearer token-a"
+    assert other.postgrest.headers["Authorization"] == "Bearer token-b"
+    assert first.postgrest.session is admin.postgrest.session is other.postgrest.session
+
+
+def test_user_view_cache_evicts_least_recently_used(monkeypatch):
+    monkeypatch.setattr(supabase_client, "USER_CLIENT_CACHE_SIZE", 2)
+    first = supabase_client.get_supabase_async_user_client("token-a")
+    supabase_client.get_supabase_async_user_client("token-b")
+    supabase_client.get_supabase_async_user_client("token-a")
+    supabase_client.get_supabase_async_user_client("token-c")
+
+    assert supabase_client.get_supabase_async_user_client("token-a") is first
+    assert list(supabase_client._async_user_clients) == ["token-c", "token-a"]
+
+
+def test_pool_gauges_are_published():
+    supabase_client.get_supabase_user_client("token-a")
+
+    gauges = metrics_service.snapshot()["gauges"]
+    assert gauges["supabase.pool.sync.user_clients"] == 1
+    assert gauges["supabase.pool.max_connections"] == supabase_client.HTTP_POOL_LIMITS.max_connections
@@ -0,0 +1,93 @@
+"""Tests for local Supabase access-token verification."""
+
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import jwt
+import pytest
+
+from services import token_service
+from services.token_service import InvalidTokenError, verify_token
+
+SECRET = "test-jwt-secret-with-enough-bytes-for-hs256"
+
+
+def _token(secret: str = SECRET, **claims) -> str:
+    payload = {
+        "sub": "user-1",
+        "email": "learner@example.com",
+        "aud": "authenticated",
+        "role": "authenticated",
+        "is_anonymous": False,
+        "exp": int(time.time()) + 3600,
+        **claims,
+    }
+    return jwt.encode(payload, secret, algorithm="HS256")
+
+
+@pytest.fixture(autouse=True)
+def jwt_secret(monkeypatch):
+    monkeypatch.setenv("SUPABASE_JWT_SECRET", SECRET)
+    token_service.clear_cache()
+    yield
+    token_service.clear_cache()
+
+
+async def test_valid_token_is_verified_locally():
+    with patch.object(token_service, "_fetch_from_auth", new=AsyncMock()) as network:
+        user = await verify_token(_token())
+
+    assert user.id == "user-1"
+    assert user.email == "learner@example.com"
+    assert user.is_anonymous is False
+    network.assert_not_awaited()
+
+
+async def test_expired_token_is_rejected():
+    with pytest.raises(InvalidTokenError):
+        await verify_token(_token(exp=int(time.time()) - 3600))
+
+
+async def test_token_signed_with_another_secret_is_rejected():
+    with pytest.raises(InvalidTokenError):
+        await verify_token(_token(secret="some-other-secret-with-enough-bytes-too"))
+
+
+async def test_wrong_audience_is_rejected():
+    with pytest.raises(InvalidTokenError):
+        await verify_token(_token(aud="service"))
+
+
+async def test_repeat_verification_is_served_from_cache():
+    token = _token()
+    with patch.object(token_service.jwt, "decode", wraps=jwt.decode) as decode:
+        await verify_token(token)
+        await verify_token(token)
+
+    assert decode.call_count == 1
+
+
+async def test_check_revocation_always_asks_supabase_auth():
+    token = _token()
+    await verify_token(token)
+    auth_user = MagicMock(id="user-1", email="learner@example.com", is_anonymous=False, role="authenticated")
+    admin = MagicMock()
+    admin.auth.get_user = AsyncMock(return_value=MagicMock(user=auth_user))
+
+    with patch("services.supabase_client.get_supabase_async_admin_client", return_value=admin):
+        user = await verify_token(token, check_revocation=True)
+
+    assert user.id == "user-1"
+    admin.auth.get_user.assert_awaited_once_with(token)
+
+
+async def test_falls_back_to_supabase_auth_without_local_key(monkeypatch):
+    monkeypatch.delenv("SUPABASE_JWT_SECRET")
+    admin = MagicMock()
+    admin.auth.get_user = AsyncMock(return_value=None)
+
+    with patch("services.supabase_client.get_supabase_async_admin_client", return_value=admin):
+        with pytest.raises(InvalidTokenError):
+            await verify_token(_token())
+
+    admin.auth.get_user.assert_awaited_once()
@@ -0,0 +1,329 @@
+"""Tests for transcript persistence on the async Supabase client."""
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from services import session_owner_service, transcript_service
+
+# Simulated Supabase round trip
+DB_LATENCY_SECONDS = 0.05
+TICK_SECONDS = 0.005
+
+
+class _SlowQuery:
+    """Async query builder stand-in: every builder call chains, `execute` waits on I/O."""
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    async def execute(self):
+        await asyncio.sleep(DB_LATENCY_SECONDS)
+        return MagicMock(data=[{"user_id": "user-1"}])
+
+
+def _patch_client(client):
+    """Route the owner lookup and the insert to the same stand-in client."""
+    return patch(
+        "services.transcript_service.get_supabase_async_admin_client", return_value=client
+    ), patch.object(session_owner_service, "get_supabase_async_admin_client", return_value=client)
+
+
+@pytest.fixture(autouse=True)
+def _clear_owners():
+    session_owner_service._owners.clear()
+    yield
+    session_owner_service._owners.clear()
+
+
+async def _max_loop_lag(work) -> float:
+    """Run `work` while a ticker measures how late the event loop wakes it up."""
+    lags: list[float] = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(TICK_SECONDS)
+            lags.append(time.perf_counter() - start - TICK_SECONDS)
+
+    tick_task = asyncio.create_task(ticker())
+    try:
+        await work
+    finally:
+        done.set()
+        await tick_task
+    return max(lags)
+
+
+@pytest.mark.asyncio
+async def test_create_transcript_message_returns_message():
+    client = MagicMock()
+    client.table.return_value = _SlowQuery()
+    transcript_patch, owner_patch = _patch_client(client)
+    with transcript_patch, owner_patch:
+        message = await transcript_service.create_transcript_message(
+            session_id="session-1",
+            message_source="tutor",
+            message_kind="text",
+            message_text="marhaba",
+        )
+        await transcript_service.flush_transcript_writes()
+
+    assert message.user_id == "user-1"
+    assert message.message_text == "marhaba"
+
+
+@pytest.mark.asyncio
+async def test_event_loop_lag_stays_flat_under_100_concurrent_persists():
+    client = MagicMock()
+    client.table.side_effect = lambda name: _SlowQuery()
+
+    async def persist(i: int):
+        await transcript_service.create_transcript_message(
+            session_id=f"session-{i}",
+            message_source="tutor",
+            message_kind="text",
+            message_text=f"message {i}",
+        )
+
+    transcript_patch, owner_patch = _patch_client(client)
+    with transcript_patch, owner_patch:
+        started = time.perf_counter()
+        lag = await _max_loop_lag(asyncio.gather(*(persist(i) for i in range(100))))
+        await transcript_service.flush_transcript_writes()
+        elapsed = time.perf_counter() - started
+
+    # An owner lookup per message plus batched inserts; if they blocked the
+    # loop this would take seconds and a tick could wait seconds. Allow for a slow,
+    # shared CI machine rather than expecting sub-latency ticks.
+    assert elapsed < 10 * DB_LATENCY_SECONDS
+    assert lag < 4 * DB_LATENCY_SECONDS
+
+
+@pytest.mark.asyncio
+async def test_batched_messages_are_inserted_once_in_order():
+    client = MagicMock()
+    client.table.return_value = _SlowQuery()
+    drafts = [
+        transcript_service.TranscriptMessageInput(message_source="tutor", message_kind="text", message_text=text)
+        for text in ("one", "two", "three")
+    ]
+    transcript_patch, owner_patch = _patch_client(client)
+    with transcript_patch, owner_patch, \
+            patch.object(_SlowQuery, "insert", create=True) as insert:
+        insert.return_value = _SlowQuery()
+        messages = await transcript_service.create_transcript_messages("session-1", drafts)
+        await transcript_service.flush_transcript_writes()
+
+    (rows,), _ = insert.call_args
+    assert [row["message_text"] for row in rows] == ["one", "two", "three"]
+    assert [m.message_text for m in messages] == ["one", "two", "three"]
+    assert messages[0].created_at < messages[1].created_at < messages[2].created_at
+
+
+@pytest.mark.asyncio
+async def test_known_owner_makes_an_insert_a_single_round_trip():
+    client = MagicMock()
+    client.table.side_effect = lambda name: _SlowQuery()
+    session_owner_service.remember_session_owner("session-1", "user-1")
+
+    transcript_patch, owner_patch = _patch_client(client)
+    with transcript_patch, owner_patch:
+        message = await transcript_service.create_transcript_message(
+            session_id="session-1",
+            message_source="user",
+            message_kind="text",
+            message_text="ahlan",
+        )
+        await transcript_service.flush_transcript_writes()
+
+    assert message.user_id == "user-1"
+    assert [c.args[0] for c in client.table.call_args_list] == ["transcript_messages"]
+
+
+@pytest.mark.asyncio
+async def test_owner_is_looked_up_once_per_session():
+    client = MagicMock()
+    client.table.side_effect = lambda name: _SlowQuery()
+
+    transcript_patch, owner_patch = _patch_client(client)
+    with transcript_patch, owner_patch:
+        for text in ("one", "two"):
+            await transcript_service.create_transcript_message(
+                session_id="session-2",
+                message_source="user",
+                message_kind="text",
+                message_text=text,
+            )
+        await transcript_service.flush_transcript_writes()
+
+    tables = [c.args[0] for c in client.table.call_args_list]
+    assert tables.count("agent_sessions") == 1
+    # Both rows reached the writer within one flush interval
+    assert tables.count("transcript_messages") == 1
+
+
+class _RecordingQuery(_SlowQuery):
+    """Records each insert's rows; fails inserts containing a row marked 'bad'."""
+
+    inserts: list[list[str]] = []
+    _rows: list[dict] = []
+
+    def insert(self, rows):
+        self._rows = rows
+        return self
+
+    async def execute(self):
+        await asyncio.sleep(DB_LATENCY_SECONDS)
+        texts = [row["message_text"] for row in self._rows]
+        if "bad" in texts:
+            raise RuntimeError("insert failed")
+        if texts:
+            _RecordingQuery.inserts.append(texts)
+        return MagicMock(data=[{"user_id": "user-1"}])
+
+
+@pytest.fixture
+def recording_client():
+    _RecordingQuery.inserts = []
+    client = MagicMock()
+    client.table.side_effect = lambda name: _RecordingQuery()
+    transcript_patch, owner_patch = _patch_client(client)
+    with transcript_patch, owner_patch:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_rows_are_returned_before_the_insert_and_batched_in_order(recording_client):
+    started = time.perf_counter()
+    for text in ("one", "two", "three"):
+        await transcript_service.create_transcript_message(
+            session_id="session-1", message_source="user", message_kind="text", message_text=text,
+        )
+    # Only the owner lookup was waited for
+    assert time.perf_counter() - started < 2 * DB_LATENCY_SECONDS
+    assert _RecordingQuery.inserts == []
+
+    await transcript_service.flush_transcript_writes()
+
+    assert _RecordingQuery.inserts == [["one", "two", "three"]]
+
+
+@pytest.mark.asyncio
+async def test_full_queue_makes_writers_wait(recording_client, monkeypatch):
+    monkeypatch.setattr(transcript_service, "MAX_PENDING_WRITES", 2)
+    monkeypatch.setattr(transcript_service, "WRITE_BATCH_SIZE", 2)
+    monkeypatch.setattr(transcript_service, "_writer", transcript_service._TranscriptWriter())
+    session_owner_service.remember_session_owner("session-1", "user-1")
+
+    started = time.perf_counter()
+    for i in range(6):
+        await transcript_service.create_transcript_message(
+            session_id="session-1", message_source="user", message_kind="text", message_text=str(i),
+        )
+    elapsed = time.perf_counter() - started
+    await transcript_service.flush_transcript_writes()
+
+    # The last rows had to wait for earlier batches to be written
+    assert elapsed >= DB_LATENCY_SECONDS
+    assert [t for batch in _RecordingQuery.inserts for t in batch] == [str(i) for i in range(6)]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_keeps_the_good_rows(recording_client, monkeypatch):
+    monkeypatch.setattr(transcript_service, "WRITE_RETRY_DELAY_SECONDS", 0)
+    for text in ("one", "bad", "three"):
+        await transcript_service.create_transcript_message(
+            session_id="session-1", message_source="user", message_kind="text", message_text=text,
+        )
+
+    await transcript_service.flush_transcript_writes()
+
+    assert _RecordingQuery.inserts == [["one"], ["three"]]
+
+
+@pytest.mark.asyncio
+async def test_session_flush_does_not_wait_for_other_sessions(recording_client, monkeypatch):
+    monkeypatch.setattr(transcript_service, "WRITE_BATCH_SIZE", 1)
+    writer = transcript_service._TranscriptWriter()
+    await writer.enqueue("session-a", [{"session_id": "session-a", "message_text": "mine"}])
+    await writer.enqueue(
+        "session-b", [{"session_id": "session-b", "message_text": f"other {i}"} for i in range(5)]
+    )
+
+    await writer.flush_session("session-a")
+
+    assert _RecordingQuery.inserts == [["mine"]]
+    await writer.flush()
+    assert len(_RecordingQuery.inserts) == 6
+
+
+def _page_query(rows: list[dict]) -> MagicMock:
+    """Builder stand-in for a page read; returns `rows` from `execute`."""
+    query = MagicMock()
+    for name in ("select", "eq", "or_", "order", "limit"):
+        getattr(query, name).return_value = query
+
+    async def execute():
+        return MagicMock(data=rows)
+
+    query.execute = execute
+    return query
+
+
+def _row(i: int) -> dict:
+    return {
+        "message_id": f"00000000-0000-0000-0000-{i:012d}",
+        "created_at": f"2026-05-04T12:00:00.{i:06d}+00:00",
+        "message_text": f"message {i}",
+        "highlights": None,
+    }
+
+
+@pytest.mark.asyncio
+async def test_page_reads_one_extra_row_to_detect_more():
+    query = _page_query([_row(i) for i in range(3)])
+    client = MagicMock()
+    client.table.return_value = query
+    with patch("services.transcript_service.get_supabase_async_admin_client", return_value=client):
+        page = await transcript_service.get_session_messages_page(
+            "session-1", limit=2, columns=["message_text", "highlights"]
+        )
+
+    query.limit.assert_called_once_with(3)
+    query.select.assert_called_once_with("message_text,highlights,created_at,message_id")
+    assert page.has_more
+    assert page.rows == [
+        {"message_text": "message 0", "highlights": []},
+        {"message_text": "message 1", "highlights": []},
+    ]
+    assert transcript_service.decode_cursor(page.cursor) == (
+        _row(1)["created_at"], _row(1)["message_id"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_page_after_cursor_filters_on_created_at_then_message_id():
+    cursor = transcript_service.encode_cursor(_row(5)["created_at"], _row(5)["message_id"])
+    query = _page_query([])
+    client = MagicMock()
+    client.table.return_value = query
+    with patch("services.transcript_service.get_supabase_async_admin_client", return_value=client):
+        page = await transcript_service.get_session_messages_page("session-1", after=cursor)
+
+    (condition,), _ = query.or_.call_args
+    assert condition == (
+        f'created_at.gt."{_row(5)["created_at"]}",'
+        f'and(created_at.eq."{_row(5)["created_at"]}",message_id.gt.{_row(5)["message_id"]})'
+    )
+    # An empty refresh keeps the caller's position
+    assert page.rows == [] and page.cursor == cursor and not page.has_more
+
+
+@pytest.mark.asyncio
+async def test_malformed_cursor_is_rejected():
+    with pytest.raises(ValueError):
+        await transcript_service.get_session_messages_page("session-1", after="not-a-cursor")
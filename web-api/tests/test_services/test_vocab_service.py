@@ -0,0 +1,127 @@
+"""Tests for the per-user learned-vocabulary index."""
+
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from services import vocab_service
+from services.vocab_service import VocabEntry, stem
+
+
+@pytest.fixture(autouse=True)
+def _clear_indexes():
+    vocab_service._indexes.clear()
+    yield
+    vocab_service._indexes.clear()
+
+
+class _Query:
+    """Async query builder stand-in returning fixed rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.executions = 0
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    async def execute(self):
+        self.executions += 1
+        return MagicMock(data=self.rows)
+
+
+def _patch_client(rows):
+    query = _Query(rows)
+    client = MagicMock()
+    client.table.return_value = query
+    client.rpc.return_value = MagicMock(execute=AsyncMock())
+    return patch.object(vocab_service, "get_supabase_async_admin_client", return_value=client), query, client
+
+
+def _row(stem_: str, canonical: str, arabizi: str, seen_count: int = 1, flashcard: bool = False,
+         last_seen_at: str = "2026-05-01T10:00:00+00:00") -> dict:
+    return {
+        "stem": stem_,
+        "canonical": canonical,
+        "arabizi": arabizi,
+        "meaning": None,
+        "seen_count": seen_count,
+        "flashcard": flashcard,
+        "last_seen_at": last_seen_at,
+    }
+
+
+@pytest.mark.parametrize("word", ["سيارة", "السيارات", "سيارتي", "وسيارتي", "سَيَّارَة"])
+def test_inflections_share_a_stem(word):
+    assert stem(word) == "سيار"
+
+
+def test_short_words_are_not_stripped_to_nothing():
+    assert stem("بيت") == "بيت"
+    assert stem("البيت") == "بيت"
+
+
+async def test_only_words_in_the_text_are_selected_best_known_first():
+    rows = [
+        _row("سيار", "سيارة", "sayyara", seen_count=2),
+        _row("بيت", "بيت", "bayt", seen_count=9),
+        _row("كتاب", "كتاب", "kitab", seen_count=1, flashcard=True),
+    ]
+    patcher, _, _ = _patch_client(rows)
+    with patcher:
+        words = await vocab_service.select_learned_words("user-1", "عندي سيارتي والكتاب")
+
+    assert words == ['"kitab" (كتاب)', '"sayyara" (سيارة)']
+
+
+async def test_ties_go_to_the_word_seen_most_recently():
+    rows = [
+        _row("سيار", "سيارة", "sayyara", last_seen_at="2026-05-01T10:00:00+00:00"),
+        _row("بيت", "بيت", "bayt", last_seen_at="2026-05-03T08:30:00.123456Z"),
+    ]
+    patcher, _, _ = _patch_client(rows)
+    with patcher:
+        words = await vocab_service.select_learned_words("user-1", "سيارتي في البيت", limit=1)
+
+    assert words == ['"bayt" (بيت)']
+
+
+async def test_selection_is_capped_and_loads_once():
+    rows = [_row(f"كلم{chr(0x628 + i)}", f"كلم{chr(0x628 + i)}", f"w{i}", seen_count=i) for i in range(20)]
+    text = " ".join(r["canonical"] for r in rows)
+    patcher, query, _ = _patch_client(rows)
+    with patcher:
+        first = await vocab_service.select_learned_words("user-1", text, limit=5)
+        await vocab_service.select_learned_words("user-1", text, limit=5)
+
+    assert len(first) == 5
+    assert first[0] == f'"w19" ({rows[19]["canonical"]})'
+    assert query.executions == 1
+
+
+async def test_recorded_words_update_a_loaded_index():
+    patcher, _, client = _patch_client([])
+    with patcher:
+        assert await vocab_service.select_learned_words("user-1", "السيارة") == []
+        vocab_service.record_highlights(
+            "user-1", [{"word": "sayyara", "canonical": "سيارة"}, {"word": "shukran"}]
+        )
+        words = await vocab_service.select_learned_words("user-1", "السيارة")
+        for task in list(vocab_service._background):
+            await task
+
+    assert words == ['"sayyara" (سيارة)']
+    (rpc_name, params), _ = client.rpc.call_args
+    assert rpc_name == vocab_service.RECORD_RPC
+    assert [w["stem"] for w in params["p_words"]] == ["سيار"]
+
+
+async def test_lookup_failure_selects_nothing():
+    with patch.object(vocab_service, "get_supabase_async_admin_client", side_effect=RuntimeError("down")):
+        assert await vocab_service.select_learned_words("user-1", "السيارة") == []
+
+
+def test_flashcards_outrank_a_few_sightings():
+    card = VocabEntry(stem="a", canonical="a", seen_count=1, flashcard=True)
+    seen = VocabEntry(stem="b", canonical="b", seen_count=3)
+    assert card.rank() > seen.rank()
@@ -131,6 +131,9 @@ export function useOnboardingSession(enabled: boolean): OnboardingSessionState {
                 if (ctx.onboarding.collected) setCollected(ctx.onboarding.collected);
                 if (ctx.onboarding.completed) setCompleted(true);
               }
+            } else if (msg.kind === 'transcript_delta') {
+              // Live text of a streamed bubble; the finished row arrives via
+              // Realtime, which is all this view renders
             } else if (msg.kind === 'error') {
               const d = msg.data as { message: string };
               setError(d.message);
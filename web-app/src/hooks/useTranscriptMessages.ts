@@ -2,6 +2,8 @@
  * Hook for subscribing to transcript messages via Supabase Realtime.
  *
  * Fetches initial messages and subscribes to new messages for the active session.
+ * Also applies row updates, which is how display variants (scaffolded /
+ * transliterated) generated in the background after a message arrive.
  */
 
 import { useEffect, useRef } from 'react';
@@ -14,6 +16,7 @@ export function useTranscriptMessages() {
   const activeSessionId = useStore((s) => s.session.activeSessionId);
   const setMessages = useStore((s) => s.session.setMessages);
   const addMessage = useStore((s) => s.session.addMessage);
+  const updateMessage = useStore((s) => s.session.updateMessage);
 
   // Track message IDs we've already seen to avoid duplicates
   const seenMessageIds = useRef<Set<string>>(new Set());
@@ -70,10 +73,22 @@ export function useTranscriptMessages() {
           addMessage(newMessage);
         }
       )
+      .on(
+        'postgres_changes',
+        {
+          event: 'UPDATE',
+          schema: 'public',
+          table: 'transcript_messages',
+          filter: `session_id=eq.${activeSessionId}`,
+        },
+        (payload) => {
+          updateMessage(payload.new as TranscriptMessage);
+        }
+      )
       .subscribe();
 
     return () => {
       supabase.removeChannel(channel);
     };
-  }, [supabase, activeSessionId, setMessages, addMessage]);
+  }, [supabase, activeSessionId, setMessages, addMessage, updateMessage]);
 }
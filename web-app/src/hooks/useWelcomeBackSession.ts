@@ -98,6 +98,9 @@ export function useWelcomeBackSession(enabled: boolean): WelcomeBackSessionState
             if (msg.kind === 'context') {
               const ctx = msg.data as { welcome_back?: { completed?: boolean } };
               if (ctx.welcome_back?.completed) setCompleted(true);
+            } else if (msg.kind === 'transcript_delta') {
+              // Live text of a streamed bubble; the finished row arrives via
+              // Realtime, which is all this view renders
             } else if (msg.kind === 'error') {
               const d = msg.data as { message: string };
               setError(d.message);
@@ -21,6 +21,7 @@ export interface SessionState {
   setActiveSessionId: (sessionId: string | null) => void;
   loadSessions: () => Promise<void>;
   addMessage: (message: TranscriptMessage) => void;
+  updateMessage: (message: TranscriptMessage) => void;
   setMessages: (messages: TranscriptMessage[]) => void;
   clearMessages: () => void;
   reset: () => void;
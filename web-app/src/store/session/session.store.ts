@@ -112,6 +112,16 @@ export const createSessionSlice: StateCreator<SessionSlice> = (set, get) => ({
         },
       })),
 
+    updateMessage: (message) =>
+      set((state) => ({
+        session: {
+          ...state.session,
+          messages: state.session.messages.map((m) =>
+            m.message_id === message.message_id ? { ...m, ...message } : m,
+          ),
+        },
+      })),
+
     setMessages: (messages) =>
       set((state) => ({
         session: {
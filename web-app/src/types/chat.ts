@@ -13,10 +13,19 @@ export type AgentState = 'idle' | 'listening' | 'thinking' | 'speaking';
  * WebSocket message types received from the backend
  */
 export interface WebSocketMessage {
-  kind: 'transcript' | 'audio' | 'context';
+  kind: 'transcript' | 'transcript_delta' | 'transcript_update' | 'audio' | 'context';
   data: Record<string, any>;
 }
 
+/**
+ * Text of a tutor bubble still being generated (streamed turns only). The
+ * finished bubble follows as a `transcript` message and the row via Realtime.
+ */
+export interface TranscriptDeltaData {
+  index: number; // Bubble index within the turn
+  delta: string; // Text appended since the previous delta
+}
+
 export interface AudioMessageData {
   audio_data: string; // Base64 encoded audio
   format: 'mp3' | 'wav' | 'webm';